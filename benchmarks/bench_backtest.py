@@ -0,0 +1,86 @@
+"""Decision-tree backtest wall time over a large contacts table.
+
+Run from the repo root:
+
+    uv run python -m benchmarks.bench_backtest --contacts 50000
+
+Builds a throwaway SQLite file with --contacts routed contacts (each with an
+OutboundEmail baseline) spread over the seeded chargers, then times
+backtest_tree() for the example decision tree.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import server.models  # noqa: F401
+import yaml  # type: ignore
+from server.backtest_service import backtest_tree
+from server.db import Base, get_engine
+from server.models import Charger, Contact, OutboundEmail
+from server.seed import seed_chargers
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+_TREE_PATH = Path(__file__).parent.parent / "decision_tree.example.yaml"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contacts", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(_TREE_PATH) as f:
+        tree = yaml.safe_load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        seed_chargers(session)
+        session.commit()
+        chargers = [(c.id, c.state) for c in session.query(Charger).all()]
+
+        rng = random.Random(0)
+        now = datetime.now(timezone.utc)
+        contacts, emails = [], []
+        for i in range(args.contacts):
+            charger_id, state = rng.choice(chargers)
+            contacts.append({
+                "id": f"msg_{i:07d}",
+                "address": f"{i} Main St, Somewhere, {state} 00000",
+                "parse_status": "parsed",
+                "nearest_charger_id": charger_id,
+                "distance_miles": rng.uniform(0, 150),
+                "geocache_hit": True,
+                "hubspot_status": "skipped",
+            })
+            emails.append({
+                "id": f"out_{i:07d}",
+                "contact_id": f"msg_{i:07d}",
+                "routed_template": rng.choice(["waitlist", "tell_me_more_general", None]),
+                "status": "pending",
+                "sent_by": "auto",
+                "created_at": now,
+            })
+        session.execute(insert(Contact), contacts)
+        session.execute(insert(OutboundEmail), emails)
+        session.commit()
+
+        start = time.perf_counter()
+        result = list(backtest_tree(session, tree, batch_size=args.batch_size))[-1]
+        elapsed = time.perf_counter() - start
+        session.close()
+        engine.dispose()
+
+    print(f"{args.contacts:,} contacts in batches of {args.batch_size}")
+    print(f"  backtest: {elapsed:6.2f} s ({args.contacts / elapsed:,.0f} contacts/s)")
+    print(f"  {result['changed']:,} would change route")
+
+
+if __name__ == "__main__":
+    main()
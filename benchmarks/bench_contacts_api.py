@@ -0,0 +1,78 @@
+"""Requests/sec on GET /api/contacts: shared engine vs. a new engine per request.
+
+Run from the repo root:
+
+    uv run python -m benchmarks.bench_contacts_api --contacts 500 --requests 300
+
+The "per-request engine" mode overrides the DB dependency with the old
+behaviour (build an engine + pool inside every request) so both numbers come
+from the same process and the same database.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import server.main
+from fastapi.testclient import TestClient
+from server.db import get_db, get_engine, get_session
+from server.models import Contact
+from sqlalchemy.orm import sessionmaker
+
+
+def _per_request_engine_db():
+    engine = get_engine(server.main.DB_URL)
+    s = sessionmaker(bind=engine)()
+    try:
+        yield s
+    finally:
+        s.close()
+
+
+def _seed(n: int) -> None:
+    with get_session(get_engine(server.main.DB_URL)) as session:
+        for i in range(n):
+            session.add(
+                Contact(
+                    id=f"bench-{i}",
+                    name=f"Driver {i}",
+                    address=f"{i} Main St, Brooklyn, NY 11201",
+                    parse_status="parsed",
+                )
+            )
+
+
+def _rps(client: TestClient, n: int) -> float:
+    client.get("/api/contacts")  # warm-up
+    start = time.perf_counter()
+    for _ in range(n):
+        resp = client.get("/api/contacts")
+        resp.raise_for_status()
+    return n / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contacts", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server.main.DB_URL = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        app = server.main.app
+        with TestClient(app) as client:
+            _seed(args.contacts)
+
+            app.dependency_overrides[get_db] = _per_request_engine_db
+            before = _rps(client, args.requests)
+            app.dependency_overrides.clear()
+            after = _rps(client, args.requests)
+
+    print(f"GET /api/contacts ({args.contacts} contacts, {args.requests} requests)")
+    print(f"  per-request engine: {before:8.1f} req/s")
+    print(f"  shared engine:      {after:8.1f} req/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
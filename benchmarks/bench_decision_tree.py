@@ -0,0 +1,99 @@
+"""Decision-tree evaluations/sec: evaluate() vs. the compile_tree() callable.
+
+Run from the repo root:
+
+    uv run python -m benchmarks.bench_decision_tree --depth 50 --states 10
+
+The tree is a chain of --depth branches, each testing driver_state against
+its own list of --states state codes (the shape a per-state routing tree
+grows into), ending in a distance check. Contexts are spread across every
+depth, so the mean context walks half the chain. The same routing written as
+one dispatch node is timed alongside.
+"""
+
+import argparse
+import random
+import string
+import time
+
+from src.itselectric.decision_tree import compile_tree, evaluate
+
+
+def _state_chain(depth: int, states: int) -> tuple[dict, list[str]]:
+    codes = [a + b for a in string.ascii_uppercase for b in string.ascii_uppercase]
+    random.Random(0).shuffle(codes)
+    node: dict = {
+        "condition": {"field": "distance_miles", "op": "lte", "value": 5},
+        "then": {"template": "tell_me_more_general"},
+        "else": {"template": "waitlist"},
+    }
+    for level in reversed(range(depth)):
+        node = {
+            "condition": {
+                "field": "driver_state",
+                "op": "in",
+                "value": codes[level * states : (level + 1) * states],
+            },
+            "then": {"template": f"state_group_{level}"},
+            "else": node,
+        }
+    return node, codes[: depth * states + states]
+
+
+def _as_dispatch(depth: int, states: int, codes: list[str], fallback: dict) -> dict:
+    cases = {
+        code: {"template": f"state_group_{level}"}
+        for level in range(depth)
+        for code in codes[level * states : (level + 1) * states]
+    }
+    return {"dispatch": {"field": "driver_state", "cases": cases, "default": fallback}}
+
+
+def _rate(fn, contexts: list[dict], seconds: float) -> float:
+    done = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        for ctx in contexts:
+            fn(ctx)
+        done += len(contexts)
+    return done / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=50)
+    parser.add_argument("--states", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    tree, codes = _state_chain(args.depth, args.states)
+    rng = random.Random(1)
+    contexts = [
+        {
+            "driver_state": rng.choice(codes).lower(),
+            "charger_state": "NY",
+            "charger_city": "Brooklyn",
+            "distance_miles": rng.uniform(0, 10),
+        }
+        for _ in range(1000)
+    ]
+
+    start = time.perf_counter()
+    route = compile_tree(tree)
+    compile_ms = (time.perf_counter() - start) * 1000
+    assert all(route(c) == evaluate(tree, c) for c in contexts)
+
+    interpreted = _rate(lambda c: evaluate(tree, c), contexts, args.seconds)
+    compiled = _rate(route, contexts, args.seconds)
+    dispatch_tree = _as_dispatch(args.depth, args.states, codes, _state_chain(0, 0)[0])
+    dispatch = compile_tree(dispatch_tree)
+    assert all(dispatch(c) == route(c) for c in contexts)
+    table = _rate(dispatch, contexts, args.seconds)
+    print(f"depth {args.depth}, {args.states} states per branch, compiled in {compile_ms:.1f} ms")
+    print(f"  evaluate():      {interpreted:12,.0f} evals/s")
+    print(f"  compile_tree():  {compiled:12,.0f} evals/s  ({compiled / interpreted:.1f}x)")
+    print(f"  dispatch node:   {table:12,.0f} evals/s  ({table / interpreted:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Personalised emails rendered/sec: per-call Markdown vs. compiled templates.
+
+Run from the repo root:
+
+    uv run python -m benchmarks.bench_email_render --emails 10000
+
+"per-call" is the old path: substitute the contact's variables into the
+Markdown, then build a fresh Markdown instance to convert it. "compiled"
+renders each template once per (name, updated_at) and substitutes escaped
+values into the cached HTML.
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+import markdown
+from src.itselectric.email_layout import _LAYOUT_HEAD, _LAYOUT_TAIL, render_template
+
+_TEMPLATES = {
+    "tell_me_more_brooklyn": """\
+# Hi {name}!
+
+Thanks for telling us about your EV. There's an **It's Electric** charger in
+{city}, close to {address}.
+
+- Curbside, no app required
+- Pay per kWh, no subscription
+
+[See it on the map](https://itselectric.us/map?near={address})
+
+Reply to this email with any questions.
+""",
+    "waitlist": """\
+Hi {name},
+
+We're not in {state} yet, but you're on the list. We'll write as soon as a
+charger opens near {address}.
+
+> It's Electric builds curbside chargers for people without driveways.
+""",
+}
+
+
+def _per_call(md: str, variables: dict) -> str:
+    body = markdown.markdown(md.format_map(variables), extensions=["extra"])
+    return _LAYOUT_HEAD + body + _LAYOUT_TAIL
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=10_000)
+    args = parser.parse_args()
+
+    updated_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    names = list(_TEMPLATES)
+    jobs = [
+        (
+            names[i % len(names)],
+            {
+                "name": f"Driver {i}",
+                "address": f"{i} Atlantic Ave, Brooklyn, NY 11201",
+                "city": "Brooklyn",
+                "state": "NY",
+            },
+        )
+        for i in range(args.emails)
+    ]
+
+    start = time.perf_counter()
+    for name, variables in jobs:
+        _per_call(_TEMPLATES[name], variables)
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name, variables in jobs:
+        render_template(name, updated_at, _TEMPLATES[name], variables)
+    compiled = time.perf_counter() - start
+
+    print(f"{args.emails:,} personalised emails over {len(names)} templates")
+    print(f"  per-call Markdown: {per_call:7.2f} s ({args.emails / per_call:10,.0f} emails/s)")
+    print(
+        f"  compiled template: {compiled:7.2f} s ({args.emails / compiled:10,.0f} emails/s)"
+        f"  ({per_call / compiled:.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Per-send Gmail client overhead: build() on every send vs. the cached get_service().
+
+Run from the repo root:
+
+    uv run python -m benchmarks.bench_google_service --sends 500
+
+Times --sends send_email() calls with HttpRequest.execute stubbed out, first
+rebuilding the Gmail client for each send (what every send did before
+google_api.get_service) and then reusing the cached one. Only the client-side
+cost is measured: each rebuilt client also opened a new HTTPS connection,
+so against the live API the saving per send is larger.
+"""
+
+import argparse
+import time
+from unittest.mock import patch
+
+from google.oauth2.credentials import Credentials
+from src.itselectric.gmail import send_email
+from src.itselectric.google_api import clear_service_cache, discovery_document
+
+
+def _run(sends: int, rebuild: bool) -> float:
+    creds = Credentials(token="bench")
+    clear_service_cache()
+    with patch("googleapiclient.http.HttpRequest.execute", return_value={"id": "m"}):
+        send_email(creds, "driver@example.com", "Hi", "<p>Hi</p>")  # warm-up
+        start = time.perf_counter()
+        for _ in range(sends):
+            if rebuild:
+                clear_service_cache()
+                discovery_document.cache_clear()  # build() re-read the document too
+            send_email(creds, "driver@example.com", "Hi", "<p>Hi</p>")
+        elapsed = time.perf_counter() - start
+    return elapsed / sends * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sends", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.sends} send_email() calls, Gmail API execute() stubbed")
+    rebuilt = _run(args.sends, rebuild=True)
+    print(f"  client built per send: {rebuilt:7.3f} ms/send")
+    cached = _run(args.sends, rebuild=False)
+    print(f"  cached client:         {cached:7.3f} ms/send  ({rebuilt / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
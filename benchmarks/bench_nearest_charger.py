@@ -0,0 +1,72 @@
+"""Nearest-charger lookups/sec: linear scan vs. ChargerIndex vs. batch API.
+
+Run from the repo root:
+
+    uv run python -m benchmarks.bench_nearest_charger --chargers 20000 --queries 200
+
+Chargers are synthetic points scattered over the continental US, roughly the
+density of the national public charger dataset.
+"""
+
+import argparse
+import random
+import time
+
+from geopy.distance import geodesic  # type: ignore
+from src.itselectric.geo import ChargerIndex, nearest_chargers_batch
+
+
+def _linear(lat: float, lon: float, chargers: list[dict]) -> tuple[dict, float]:
+    point = (lat, lon)
+    nearest = min(chargers, key=lambda c: geodesic(point, (c["lat"], c["lon"])).miles)
+    return nearest, round(geodesic(point, (nearest["lat"], nearest["lon"])).miles, 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chargers", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--linear-queries", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    chargers = [
+        {"name": f"C{i}", "lat": rng.uniform(25, 49), "lon": rng.uniform(-124, -67)}
+        for i in range(args.chargers)
+    ]
+    queries = [(rng.uniform(25, 49), rng.uniform(-124, -67)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    index = ChargerIndex(chargers)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.nearest(lat, lon) for lat, lon in queries]
+    index_qps = len(queries) / (time.perf_counter() - start)
+
+    sample = queries[: args.linear_queries]
+    start = time.perf_counter()
+    linear = [_linear(lat, lon, chargers) for lat, lon in sample]
+    linear_qps = len(sample) / (time.perf_counter() - start)
+
+    assert all(a == b for a, b in zip(indexed, linear)), "index disagrees with linear scan"
+
+    lats = [lat for lat, _ in queries]
+    lons = [lon for _, lon in queries]
+    start = time.perf_counter()
+    nearest_chargers_batch(lats, lons, index)
+    batch_qps = len(queries) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    nearest_chargers_batch(lats, lons, index, exact=True)
+    exact_qps = len(queries) / (time.perf_counter() - start)
+
+    print(f"{args.chargers} chargers")
+    print(f"  index build:  {build_s * 1000:8.1f} ms")
+    print(f"  linear scan:  {linear_qps:8.2f} lookups/s  ({len(sample)} queries)")
+    print(f"  ChargerIndex: {index_qps:8.1f} lookups/s  ({index_qps / linear_qps:.0f}x)")
+    print(f"  batch:        {batch_qps:8.1f} lookups/s  (haversine)")
+    print(f"  batch exact:  {exact_qps:8.1f} lookups/s  (geodesic-refined)")
+
+
+if __name__ == "__main__":
+    main()
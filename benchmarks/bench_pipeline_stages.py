@@ -0,0 +1,102 @@
+"""Pipeline messages/sec as stage worker counts grow, against stub services.
+
+Run from the repo root:
+
+    uv run python -m benchmarks.bench_pipeline_stages --messages 60 --latency-ms 50
+
+HubSpot batch upserts and the geocoder are replaced by stubs that sleep for
+--latency-ms per call, so the numbers show how well the stages overlap rather
+than real API speed. The run uses auto_send, which only queues send_email
+jobs (server/job_queue.py), so Gmail sends are no longer on the pipeline's
+clock.
+"""
+
+import argparse
+import base64
+import time
+from unittest.mock import MagicMock, patch
+
+import server.models  # noqa: F401
+from server.db import Base
+from server.models import AppConfig, Charger, Template
+from server.pipeline_service import run_pipeline
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+_TREE = {
+    "condition": {"field": "distance_miles", "op": "lte", "value": 999},
+    "then": {"template": "tell_me_more_general"},
+    "else": {"template": None},
+}
+
+
+def _message(i: int) -> dict:
+    text = (
+        f"[plain]: it's electric Driver {i} "
+        f"The user has an address of {i} Atlantic Ave Brooklyn NY 11201 "
+        f"and has an email of driver{i}@example.com\n"
+        f"Email address submitted in form\ndriver{i}@example.com"
+    )
+    return {
+        "id": f"msg_{i}",
+        "internalDate": "1704067200000",
+        "payload": {
+            "mimeType": "text/plain",
+            "body": {"data": base64.urlsafe_b64encode(text.encode()).decode()},
+        },
+    }
+
+
+def _run(workers: int, messages: list[dict], latency: float) -> float:
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Charger(street="1 Main St", city="Brooklyn", state="NY", lat=40.69, lon=-73.92))
+    session.add(Template(name="tell_me_more_general", subject="Hi", body_md="<p>Hi {name}</p>"))
+    session.add(AppConfig(key="hubspot_access_token", value="stub"))
+    session.add(AppConfig(key="pipeline_geocode_workers", value=str(workers)))
+    session.commit()
+
+    def _upsert(token, contacts, base_url):
+        time.sleep(latency)  # one batch request, however many contacts
+        return {email: "hs" for _, email, _ in contacts}
+
+    def _geocode(*args, **kwargs):
+        time.sleep(latency)
+        return (40.69, -73.99)
+
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("src.itselectric.hubspot.upsert_contacts", side_effect=_upsert),
+        patch("server.pipeline_service.geocode_address", side_effect=_geocode),
+    ):
+        start = time.perf_counter()
+        run_pipeline(
+            session, decision_tree=_TREE, auto_send=True,
+            fixture_messages=messages, log=lambda m: None,
+        )
+        elapsed = time.perf_counter() - start
+    session.close()
+    return len(messages) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=60)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    # Distinct addresses, so every message misses the geocache.
+    messages = [_message(i) for i in range(args.messages)]
+    latency = args.latency_ms / 1000
+    serial = args.messages / (2 * latency * args.messages)
+    print(f"{args.messages} messages, 2 stub calls each at {args.latency_ms:g} ms")
+    print(f"  fully serial bound: {serial:8.1f} msg/s")
+    for workers in args.workers:
+        rate = _run(workers, messages, latency)
+        print(f"  {workers:2d} worker(s)/stage: {rate:8.1f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
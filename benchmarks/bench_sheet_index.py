@@ -0,0 +1,84 @@
+"""Sheets dedup cost per call: full download vs. the incremental SheetHashIndex.
+
+Run from the repo root:
+
+    uv run python -m benchmarks.bench_sheet_index --rows 20000 --new 20
+
+Serves a --rows sheet from memory through a stub values().get, then appends
+--new rows before each of --calls dedup calls. Reports rows downloaded and
+hashed per call and the wall time, without network latency.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.itselectric.sheets import (
+    COLUMNS,
+    SheetHashIndex,
+    get_existing_hashes,
+    sync_sheet_index,
+)
+
+
+def _row(i: int) -> list[str]:
+    return ["2024-01-01", f"Driver {i}", f"{i} Main St", f"d{i}@example.com", "", "body"]
+
+
+class _StubSheet:
+    def __init__(self, rows: list[list[str]]):
+        self.rows = rows
+        self.downloaded = 0
+        self.service = MagicMock()
+        self.service.spreadsheets().values().get.side_effect = self._get
+
+    def _get(self, spreadsheetId, range):
+        start = int(range.split("!A")[1].split(":")[0] or 1)
+        values = self.rows[start - 1 :]
+        self.downloaded += len(values)
+        request = MagicMock()
+        request.execute.return_value = {"values": values}
+        return request
+
+
+def _hashes(index: SheetHashIndex | None) -> set[str]:
+    if index is None:
+        return get_existing_hashes(MagicMock(), "sid", "Sheet1", 5000)
+    sync_sheet_index(MagicMock(), "sid", "Sheet1", 5000, index)
+    return index.hashes("sid", "Sheet1")
+
+
+def _run(rows: int, new: int, calls: int, index: SheetHashIndex | None) -> tuple[float, float]:
+    sheet = _StubSheet([COLUMNS] + [_row(i) for i in range(rows)])
+    with patch("src.itselectric.sheets.get_service", return_value=sheet.service):
+        _hashes(index)  # first sync
+        sheet.downloaded = 0
+        start = time.perf_counter()
+        for c in range(calls):
+            sheet.rows += [_row(rows + c * new + j) for j in range(new)]
+            _hashes(index)
+        elapsed = time.perf_counter() - start
+    return sheet.downloaded / calls, elapsed / calls * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--new", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.rows:,}-row sheet, {args.new} rows appended before each of {args.calls} calls")
+    rows, ms = _run(args.rows, args.new, args.calls, None)
+    print(f"  full download:     {rows:9,.0f} rows/call  {ms:8.2f} ms/call")
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SheetHashIndex(Path(tmp) / "index.sqlite3")
+        rows, ms = _run(args.rows, args.new, args.calls, index)
+        index.close()
+    print(f"  incremental index: {rows:9,.0f} rows/call  {ms:8.2f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Replay a candidate decision tree over every stored contact.
+
+Routing inputs come from what the pipeline already stored (distance_miles,
+the nearest charger and the state extracted from the address), so nothing is
+re-parsed or geocoded. Contacts are read in primary-key batches and routed
+with a compiled tree; the outcome is compared with the routed_template of each
+contact's latest OutboundEmail.
+"""
+
+import time
+from collections import Counter
+from typing import Iterator
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from src.itselectric.decision_tree import compile_tree
+from src.itselectric.geo import extract_state_from_address
+
+from server.models import Charger, Contact, OutboundEmail
+
+BACKTEST_BATCH_SIZE = 2000
+
+
+def _latest_routed_templates(session: Session) -> dict[str, str | None]:
+    """{contact_id: routed_template of its newest OutboundEmail}, in one scan."""
+    rows = session.execute(
+        select(OutboundEmail.contact_id, OutboundEmail.routed_template).order_by(
+            OutboundEmail.contact_id, OutboundEmail.created_at
+        )
+    )
+    return {contact_id: template for contact_id, template in rows}
+
+
+def backtest_tree(
+    session: Session,
+    tree: dict,
+    batch_size: int = BACKTEST_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Route every contact with a nearest charger and distance through tree.
+
+    Yields {"type": "progress", "done", "total"} after each batch, then one
+    {"type": "result", ...} with per-template before/after counts, the
+    before → after transitions, and how many contacts changed route or raised
+    while routing. Raises ValueError before yielding if tree fails validation.
+    """
+    route = compile_tree(tree)
+    return _backtest(session, route, batch_size)
+
+
+def _backtest(session: Session, route, batch_size: int) -> Iterator[dict]:
+    start = time.perf_counter()
+    routable = (
+        select(Contact.id, Contact.address, Contact.distance_miles, Charger.state, Charger.city)
+        .join(Charger, Contact.nearest_charger_id == Charger.id)
+        .where(Contact.distance_miles.is_not(None))
+    )
+    total = session.scalar(select(func.count()).select_from(routable.subquery()))
+    baseline = _latest_routed_templates(session)
+
+    before: Counter = Counter()
+    after: Counter = Counter()
+    transitions: Counter = Counter()
+    errors = 0
+    done = 0
+    last_id = None
+    while True:
+        page_stmt = routable.order_by(Contact.id).limit(batch_size)
+        if last_id is not None:
+            page_stmt = page_stmt.where(Contact.id > last_id)
+        page = session.execute(page_stmt).all()
+        if not page:
+            break
+        for contact_id, address, distance, charger_state, charger_city in page:
+            ctx = {
+                "driver_state": extract_state_from_address(address),
+                "charger_state": charger_state,
+                "charger_city": charger_city,
+                "distance_miles": distance,
+            }
+            try:
+                template = route(ctx)
+            except (KeyError, ValueError):
+                errors += 1
+                continue
+            previous = baseline.get(contact_id)
+            before[previous] += 1
+            after[template] += 1
+            if template != previous:
+                transitions[(previous, template)] += 1
+        done += len(page)
+        last_id = page[-1][0]
+        yield {"type": "progress", "done": done, "total": total}
+
+    names = sorted(set(before) | set(after), key=lambda n: (n is None, n or ""))
+    yield {
+        "type": "result",
+        "total": total,
+        "evaluated": done - errors,
+        "errors": errors,
+        "changed": sum(transitions.values()),
+        "templates": [
+            {
+                "template": name,
+                "before": before[name],
+                "after": after[name],
+                "delta": after[name] - before[name],
+            }
+            for name in names
+        ],
+        "transitions": [
+            {"from": old, "to": new, "count": count}
+            for (old, new), count in transitions.most_common()
+        ],
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+    }
@@ -1,15 +1,30 @@
 from contextlib import contextmanager
+from typing import Annotated, Iterator
 
+from fastapi import Depends, FastAPI, Request
 from sqlalchemy import create_engine as _create_engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
+# Pool sizing for the process-wide engine. SQLite serialises writers anyway, so
+# the pool only needs to cover concurrent readers (threadpool handlers + SSE).
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_OVERFLOW = 20
+
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_engine(url: str = "sqlite:///data/itselectric.db"):
-    return _create_engine(url, connect_args={"check_same_thread": False})
+def get_engine(
+    url: str = "sqlite:///data/itselectric.db",
+    pool_size: int = DEFAULT_POOL_SIZE,
+    max_overflow: int = DEFAULT_MAX_OVERFLOW,
+):
+    kwargs: dict = {"connect_args": {"check_same_thread": False}}
+    # In-memory SQLite uses a single-connection pool that takes no sizing args.
+    if ":memory:" not in url:
+        kwargs.update(pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+    return _create_engine(url, **kwargs)
 
 
 @contextmanager
@@ -24,3 +39,33 @@ def get_session(engine):
         raise
     finally:
         session.close()
+
+
+def get_session_factory(app: FastAPI) -> sessionmaker:
+    """
+    Return the app-wide sessionmaker bound to the single shared engine.
+
+    lifespan() normally builds both on startup; if it hasn't run (e.g. a bare
+    TestClient without a context manager) they are built lazily here instead.
+    """
+    factory = getattr(app.state, "session_factory", None)
+    if factory is None:
+        from server.main import DB_URL
+
+        engine = getattr(app.state, "engine", None) or get_engine(DB_URL)
+        app.state.engine = engine
+        factory = sessionmaker(bind=engine)
+        app.state.session_factory = factory
+    return factory
+
+
+def get_db(request: Request) -> Iterator[Session]:
+    """FastAPI dependency: one pooled session per request from the shared engine."""
+    session: Session = get_session_factory(request.app)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+DbDep = Annotated[Session, Depends(get_db)]
@@ -0,0 +1,184 @@
+"""Handlers for queued side effects (see server.job_queue).
+
+Each runs on a job worker with its own session and may run more than once,
+so each checks whether its work is already done before calling out. Gmail
+sends commit a "sending" status before calling the API; a rerun that finds
+it asks Gmail whether the message went out instead of sending it again.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+from src.itselectric.auth import get_credentials
+from src.itselectric.email_layout import render_template
+from src.itselectric.geo import extract_state_from_address
+from src.itselectric.gmail import message_was_sent, send_email
+from src.itselectric.sheets import open_sheet_index
+from src.itselectric.stages import Throttle
+
+from server.job_queue import PermanentJobError, handler
+from server.models import AppConfig, Charger, Contact, OutboundEmail, Template
+from server.pipeline_service import sync_contacts_to_hubspot
+from server.sheets_outbox import buffer_row, flush_outbox, pending_rows
+
+# Local index of row hashes already on each sheet, used to skip duplicate appends.
+SHEETS_INDEX_PATH = os.getenv("SHEETS_INDEX_PATH", "data/sheets_index.sqlite3")
+
+# A Gmail send costs 100 of the 250 quota units per second; Nominatim and
+# HubSpot are throttled in geo.py and hubspot.py. One throttle per process:
+# the quota is per Gmail user, shared by every worker.
+_GMAIL_SENDS_PER_SECOND = 2
+GMAIL_SEND_THROTTLE = Throttle(_GMAIL_SENDS_PER_SECOND)
+
+_creds = None
+_creds_lock = threading.Lock()
+
+
+def _credentials():
+    """Google credentials shared by every worker, reloaded once they stop being valid."""
+    global _creds
+    with _creds_lock:
+        if _creds is None or not _creds.valid:
+            _creds = get_credentials()
+        return _creds
+
+
+def reset_credentials() -> None:
+    """Forget the shared credentials so the next job loads them again (for tests)."""
+    global _creds
+    with _creds_lock:
+        _creds = None
+
+
+def _config(session: Session, key: str) -> str:
+    row = session.get(AppConfig, key)
+    return row.value if row and row.value else ""
+
+
+def _charger(session: Session, contact: Contact) -> Charger | None:
+    return session.get(Charger, contact.nearest_charger_id) if contact.nearest_charger_id else None
+
+
+def _render_body(session: Session, outbound: OutboundEmail, contact: Contact) -> str:
+    tmpl = session.get(Template, outbound.template_name) if outbound.template_name else None
+    if tmpl is None:
+        return outbound.body_html or ""
+    charger = _charger(session, contact)
+    driver_state = extract_state_from_address(contact.address) if contact.address else None
+    return render_template(tmpl.name, tmpl.updated_at, tmpl.body_md, {
+        "name": contact.name or "",
+        "address": contact.address or "",
+        "city": charger.city if charger else "",
+        "state": driver_state or "",
+    })
+
+
+def sheet_row(session: Session, contact: Contact, outbound: OutboundEmail) -> list[str]:
+    """The Sheets row recorded for a sent email (column order as in sheets.append_rows)."""
+    charger = _charger(session, contact)
+    return [
+        contact.received_at.strftime("%Y-%m-%d %H:%M:%S UTC") if contact.received_at else "",
+        contact.name or "",
+        contact.address or "",
+        contact.email_primary or "",
+        contact.email_form or "",
+        contact.raw_body or "",
+        f"{charger.street}, {charger.city}, {charger.state}" if charger else "",
+        str(contact.distance_miles) if contact.distance_miles else "",
+        contact.hubspot_status or "",
+        outbound.template_name or "",
+    ]
+
+
+def outbound_message_id(outbound_id: str) -> str:
+    """The Message-ID header sent with an OutboundEmail; the same on every attempt."""
+    return f"<outbound-{outbound_id}@itselectric-automation>"
+
+
+def _mark_send_failed(session: Session, payload: dict, error: str) -> None:
+    outbound = session.get(OutboundEmail, payload["outbound_id"])
+    if outbound is not None and outbound.status in ("queued", "sending"):
+        outbound.status = "failed"
+        outbound.error_message = error
+
+
+@handler("send_email", on_dead=_mark_send_failed)
+def send_outbound_email(session: Session, payload: dict) -> None:
+    """
+    Send a queued OutboundEmail. payload: {"outbound_id", "sent_by",
+    "append_to_sheet"}. The Sheets row goes to the outbox in the same commit.
+
+    "sending" is committed before the API call. If this attempt dies before
+    recording the result, the rerun finds "sending" and searches the mailbox
+    for the attempt's Message-ID: found means sent, so it is not sent again.
+    """
+    outbound = session.get(OutboundEmail, payload["outbound_id"])
+    if outbound is None:
+        raise PermanentJobError("Outbound email no longer exists")
+    if outbound.status not in ("queued", "sending"):
+        return  # already sent, or taken back out of the queue
+    contact = session.get(Contact, outbound.contact_id)
+    if contact is None or not contact.email_primary:
+        raise PermanentJobError("Contact has no email address")
+
+    message_id = outbound_message_id(outbound.id)
+    already_sent = outbound.status == "sending" and message_was_sent(_credentials(), message_id)
+    if not already_sent:
+        body = _render_body(session, outbound, contact)
+        outbound.status = "sending"
+        session.commit()
+        GMAIL_SEND_THROTTLE.wait()
+        if not send_email(
+            _credentials(),
+            contact.email_primary,
+            outbound.subject or "",
+            body,
+            message_id=message_id,
+        ):
+            raise RuntimeError("Gmail API returned failure")
+    outbound.status = "sent"
+    outbound.sent_at = datetime.now(timezone.utc)
+    outbound.sent_by = payload.get("sent_by", "manual")
+    outbound.error_message = None
+
+    spreadsheet_id = _config(session, "spreadsheet_id")
+    if payload.get("append_to_sheet") and spreadsheet_id:
+        buffer_row(
+            session,
+            spreadsheet_id,
+            "Sheet1",
+            sheet_row(session, contact, outbound),
+            dedup_key=outbound.id,
+        )
+
+
+@handler("sheets_flush")
+def flush_sheets_outbox(session: Session, payload: dict) -> None:
+    """Append every buffered Sheets row (see server.sheets_outbox). payload: {}."""
+    if pending_rows(session):
+        flush_outbox(session, _credentials(), open_sheet_index(SHEETS_INDEX_PATH))
+
+
+def _mark_hubspot_failed(session: Session, payload: dict, error: str) -> None:
+    contact = session.get(Contact, payload["contact_id"])
+    if contact is not None:
+        contact.hubspot_status = "failed"
+
+
+@handler("hubspot_upsert", on_dead=_mark_hubspot_failed)
+def upsert_hubspot_contact(session: Session, payload: dict) -> None:
+    """Upsert one contact to HubSpot. payload: {"contact_id"}."""
+    token = _config(session, "hubspot_access_token")
+    if not token:
+        raise PermanentJobError("No HubSpot access token configured")
+    contact = session.get(Contact, payload["contact_id"])
+    if contact is None:
+        raise PermanentJobError("Contact no longer exists")
+    # Unchanged since the last sync → no API call, so a rerun is cheap.
+    counts = sync_contacts_to_hubspot(session, [contact], token)
+    if counts["failed"]:
+        raise RuntimeError("HubSpot upsert failed")
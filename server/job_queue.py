@@ -0,0 +1,290 @@
+"""Durable job queue for outbound side effects (Gmail sends, HubSpot upserts, Sheets appends).
+
+Jobs are rows in the jobs table, so they survive restarts and are enqueued in
+the same transaction as the change that caused them: a request handler or the
+pipeline adds the job, commits, and returns without waiting on the external API.
+
+A JobWorkerPool claims due jobs with a conditional UPDATE and holds each for a
+visibility timeout; a job whose worker died is claimed again once its lock
+expires. Failures retry with exponential backoff until max_attempts, then the
+job is dead-lettered (status "dead") and can be retried through /api/jobs.
+Delivery is at-least-once, so every handler must be safe to run twice.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, NamedTuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from server.models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "dead")
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_VISIBILITY_TIMEOUT = 300.0  # seconds a claimed job stays invisible to other workers
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_POLL_SECONDS = 1.0
+_BACKOFF_BASE_SECONDS = 30
+_BACKOFF_MAX_SECONDS = 3600
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job is dead-lettered at once."""
+
+
+class _Handler(NamedTuple):
+    fn: Callable[[Session, dict], None]
+    on_dead: Callable[[Session, dict, str], None] | None
+
+
+_handlers: dict[str, _Handler] = {}
+
+
+def _handler_for(kind: str) -> _Handler | None:
+    import server.job_handlers  # noqa: F401 — registers the built-in handlers
+
+    return _handlers.get(kind)
+
+
+def handler(kind: str, on_dead: Callable[[Session, dict, str], None] | None = None):
+    """
+    Register fn(session, payload) as the handler for jobs of this kind.
+
+    The handler's writes are committed together with the job's success. If
+    the job is dead-lettered, on_dead(session, payload, error) runs in the
+    same commit, so the handler can record the failure on its own rows.
+    """
+
+    def register(fn: Callable[[Session, dict], None]) -> Callable[[Session, dict], None]:
+        _handlers[kind] = _Handler(fn, on_dead)
+        return fn
+
+    return register
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Delay before retrying a job that has failed `attempts` times: 30 s doubling, max 1 h."""
+    return min(_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), _BACKOFF_MAX_SECONDS)
+
+
+def enqueue(
+    session: Session,
+    kind: str,
+    payload: dict[str, Any],
+    idempotency_key: str | None = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    delay: float = 0,
+) -> Job:
+    """
+    Add a job to the session; the caller commits it with its own changes.
+
+    If a job with the same idempotency_key exists it is returned instead of
+    adding a duplicate (a dead one is queued again).
+    """
+    if idempotency_key is not None:
+        existing = session.scalar(select(Job).where(Job.idempotency_key == idempotency_key))
+        if existing is not None:
+            if existing.status == "dead":
+                _requeue(existing)
+            return existing
+    job = Job(
+        id=str(uuid.uuid4()),
+        kind=kind,
+        payload=json.dumps(payload),
+        idempotency_key=idempotency_key,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=_utcnow() + timedelta(seconds=delay),
+    )
+    session.add(job)
+    return job
+
+
+def _requeue(job: Job) -> None:
+    job.status = "queued"
+    job.attempts = 0
+    job.run_after = _utcnow()
+    job.locked_by = None
+    job.locked_until = None
+    job.finished_at = None
+
+
+def retry_job(session: Session, job: Job) -> Job:
+    """Queue a dead (or waiting) job to run now with a fresh attempt budget."""
+    if job.status not in ("dead", "queued"):
+        raise ValueError(f"Cannot retry a {job.status} job")
+    _requeue(job)
+    session.commit()
+    return job
+
+
+def _claimable(now: datetime):
+    # Due queued jobs, plus running jobs whose worker let the lock expire.
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(Job.status == "running", Job.locked_until <= now),
+    )
+
+
+def claim_next(
+    session: Session,
+    worker_id: str,
+    visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+) -> Job | None:
+    """
+    Claim the next due job for worker_id, or return None if nothing is due.
+
+    The claim is a conditional UPDATE, so two workers racing for the same row
+    cannot both win. A reclaimed job that has already used every attempt is
+    dead-lettered here instead of being returned.
+    """
+    while True:
+        now = _utcnow()
+        job_id = session.scalar(
+            select(Job.id).where(_claimable(now)).order_by(Job.run_after).limit(1)
+        )
+        if job_id is None:
+            session.commit()
+            return None
+        claimed = session.execute(
+            update(Job)
+            .where(Job.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                attempts=Job.attempts + 1,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=visibility_timeout),
+            )
+            # The commit below expires loaded Jobs anyway; skip matching them in Python.
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.commit()
+        if not claimed:
+            continue
+        job = session.get(Job, job_id)
+        if job.attempts > job.max_attempts:
+            _finish_dead(session, job, job.last_error or "Visibility timeout expired")
+            session.commit()
+            continue
+        return job
+
+
+def _finish_dead(session: Session, job: Job, error: str) -> None:
+    job.status = "dead"
+    job.last_error = error
+    job.locked_by = None
+    job.locked_until = None
+    job.finished_at = _utcnow()
+    entry = _handler_for(job.kind)
+    if entry and entry.on_dead:
+        entry.on_dead(session, json.loads(job.payload), error)
+
+
+def run_job(session: Session, job: Job) -> str:
+    """Run a claimed job's handler and record the outcome; returns the new status."""
+    job_id = job.id
+    entry = _handler_for(job.kind)
+    payload = json.loads(job.payload)
+    try:
+        if entry is None:
+            raise PermanentJobError(f"No handler for job kind {job.kind!r}")
+        entry.fn(session, payload)
+    except Exception as e:
+        # Discard the handler's partial writes; only the job's bookkeeping is kept.
+        session.rollback()
+        job = session.get(Job, job_id)
+        error = f"{type(e).__name__}: {e}"
+        if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+            _finish_dead(session, job, error)
+            logger.warning("Job %s (%s) dead-lettered: %s", job.id, job.kind, error)
+        else:
+            job.status = "queued"
+            job.last_error = error
+            job.locked_by = None
+            job.locked_until = None
+            job.run_after = _utcnow() + timedelta(seconds=backoff_seconds(job.attempts))
+        session.commit()
+        return job.status
+
+    job.status = "succeeded"
+    job.last_error = None
+    job.locked_by = None
+    job.locked_until = None
+    job.finished_at = _utcnow()
+    session.commit()
+    return job.status
+
+
+def run_pending(
+    session: Session,
+    worker_id: str = "inline",
+    visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+) -> int:
+    """Run every due job on the calling thread; returns how many ran. For scripts and tests."""
+    count = 0
+    while (job := claim_next(session, worker_id, visibility_timeout)) is not None:
+        run_job(session, job)
+        count += 1
+    return count
+
+
+class JobWorkerPool:
+    """Worker threads that poll the jobs table; each uses its own session."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        workers: int = DEFAULT_JOB_WORKERS,
+        poll_interval: float = DEFAULT_POLL_SECONDS,
+        visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._prefix = uuid.uuid4().hex[:8]
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._loop, args=(f"{self._prefix}-{i}",), daemon=True,
+                name=f"job-worker-{i}",
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop polling and wait for in-flight jobs; unfinished ones are reclaimed later."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _loop(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            ran = False
+            with self.session_factory() as session:
+                try:
+                    job = claim_next(session, worker_id, self.visibility_timeout)
+                    if job is not None:
+                        run_job(session, job)
+                        ran = True
+                except Exception:
+                    logger.exception("Job worker %s failed", worker_id)
+            if not ran:
+                self._stop.wait(self.poll_interval)
@@ -7,10 +7,30 @@ from pathlib import Path
 from fastapi import FastAPI
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.orm import sessionmaker
 
-from server.db import Base, get_engine, get_session
-from server.routers import chargers, config, contacts, export, logs, pipeline, templates
+from server.db import (
+    DEFAULT_MAX_OVERFLOW,
+    DEFAULT_POOL_SIZE,
+    Base,
+    get_engine,
+    get_session,
+)
+from server.job_queue import DEFAULT_JOB_WORKERS, DEFAULT_POLL_SECONDS, JobWorkerPool
+from server.pipeline_service import mark_interrupted_runs
+from server.routers import (
+    chargers,
+    config,
+    contacts,
+    export,
+    geocode,
+    jobs,
+    logs,
+    pipeline,
+    templates,
+)
 from server.seed import (
+    rekey_geocache,
     seed_chargers,
     seed_config,
     seed_decision_tree_from_yaml,
@@ -23,6 +43,11 @@ GEOCACHE_PATH = os.getenv("GEOCACHE_PATH", "geocache.json")
 # decision_tree.yaml is a seed-only source — the DB is the live source of truth after first run
 DECISION_TREE_PATH = os.getenv("DECISION_TREE_PATH", "decision_tree.yaml")
 CONFIG_YAML_PATH = os.getenv("CONFIG_YAML_PATH", "config.yaml")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(DEFAULT_POOL_SIZE)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(DEFAULT_MAX_OVERFLOW)))
+# Background workers for the job queue (server/job_queue.py); 0 disables them.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(DEFAULT_JOB_WORKERS)))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", str(DEFAULT_POLL_SECONDS)))
 
 
 @asynccontextmanager
@@ -31,13 +56,17 @@ async def lifespan(app: FastAPI):
 
     import server.models  # noqa: F401 — registers all models with Base.metadata
 
-    engine = get_engine(DB_URL)
+    # One engine (and connection pool) for the whole process; routers get
+    # sessions from it via server.db.get_db.
+    engine = get_engine(DB_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
     Base.metadata.create_all(engine)
     app.state.engine = engine
+    app.state.session_factory = sessionmaker(bind=engine)
 
     with get_session(engine) as session:
         seed_chargers(session)
         seed_geocache(session, GEOCACHE_PATH)
+        rekey_geocache(session)
         if Path(DECISION_TREE_PATH).exists():
             seed_templates_from_yaml(session, DECISION_TREE_PATH)
             seed_decision_tree_from_yaml(session, DECISION_TREE_PATH)
@@ -46,9 +75,24 @@ async def lifespan(app: FastAPI):
             with open(CONFIG_YAML_PATH) as f:
                 config_data = yaml.safe_load(f) or {}
         seed_config(session, config_data)
+        mark_interrupted_runs(session)
+
+    # Jobs left running by a previous process are reclaimed once their lock expires.
+    job_pool = JobWorkerPool(
+        app.state.session_factory, workers=JOB_WORKERS, poll_interval=JOB_POLL_SECONDS
+    )
+    job_pool.start()
 
     yield
 
+    from src.itselectric.http_client import close_client
+
+    job_pool.stop()
+    close_client()
+    engine.dispose()
+    app.state.engine = None
+    app.state.session_factory = None
+
 
 app = FastAPI(title="It's Electric Automation", lifespan=lifespan)
 
@@ -59,6 +103,8 @@ app.include_router(chargers.router, prefix="/api/chargers", tags=["chargers"])
 app.include_router(config.router, prefix="/api", tags=["config"])
 app.include_router(export.router, prefix="/api", tags=["export"])
 app.include_router(logs.router, prefix="/api", tags=["logs"])
+app.include_router(geocode.router, prefix="/api", tags=["geocode"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 if os.path.exists("web/dist"):
     app.mount("/assets", StaticFiles(directory="web/dist/assets"), name="assets")
@@ -89,6 +89,87 @@ class GeoCache(Base):
     lon: Mapped[float] = mapped_column(Float)
 
 
+class GeocodeFailure(Base):
+    """Negative geocache: an address the geocoder could not resolve."""
+
+    __tablename__ = "geocode_failures"
+
+    address: Mapped[str] = mapped_column(String, primary_key=True)  # canonical key
+    reason: Mapped[str] = mapped_column(String)
+    attempts: Mapped[int] = mapped_column(Integer, default=1)
+    first_failed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+    last_failed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+
+
+class HubSpotSync(Base):
+    """Last payload sent to HubSpot per email, so unchanged contacts are not re-sent."""
+
+    __tablename__ = "hubspot_sync"
+
+    email: Mapped[str] = mapped_column(String, primary_key=True)  # lowercased
+    hubspot_id: Mapped[str] = mapped_column(String)
+    payload_hash: Mapped[str] = mapped_column(String)
+    synced_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+
+
+class Job(Base):
+    """A queued outbound side effect (Gmail send, HubSpot upsert, Sheets append)."""
+
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    kind: Mapped[str] = mapped_column(String, index=True)
+    payload: Mapped[str] = mapped_column(Text, default="{}")  # JSON
+    # Enqueueing the same key again returns the existing job instead of a duplicate.
+    idempotency_key: Mapped[str | None] = mapped_column(String, unique=True, nullable=True)
+    status: Mapped[str] = mapped_column(String, default="queued")  # queued|running|succeeded|dead
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=6)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+    locked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    locked_by: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class SheetsOutboxRow(Base):
+    """A row waiting for the next batched append to Google Sheets."""
+
+    __tablename__ = "sheets_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    spreadsheet_id: Mapped[str] = mapped_column(String)
+    sheet: Mapped[str] = mapped_column(String)
+    row: Mapped[str] = mapped_column(Text)  # JSON list, in sheets.COLUMNS order
+    # Hashed into the row's dedup hash, e.g. the OutboundEmail id the row records.
+    dedup_key: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+
+
+class PipelineRun(Base):
+    """One pipeline run; `cursor` counts messages committed so far, for resuming."""
+
+    __tablename__ = "pipeline_runs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    label: Mapped[str] = mapped_column(String)
+    source: Mapped[str] = mapped_column(String, default="gmail")  # gmail | fixture
+    # running | completed | failed | interrupted | resumed
+    status: Mapped[str] = mapped_column(String, default="running")
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_now)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    message_ids: Mapped[str] = mapped_column(Text, default="[]")  # JSON list, processing order
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    cursor: Mapped[int] = mapped_column(Integer, default=0)
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    history_id: Mapped[str | None] = mapped_column(String, nullable=True)  # Gmail checkpoint
+    resumed_from: Mapped[str | None] = mapped_column(String, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
 class AppConfig(Base):
     __tablename__ = "app_config"
 
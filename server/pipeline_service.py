@@ -1,19 +1,52 @@
-"""Pipeline orchestration: fetch → parse → geocode → route → write DB."""
+"""Pipeline orchestration: fetch → parse → CRM → geocode → route → write DB → queue sends."""
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Callable
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Callable, NamedTuple
 
+from geopy.exc import GeopyError  # type: ignore
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from src.itselectric.auth import get_credentials
-from src.itselectric.decision_tree import evaluate as evaluate_tree
+from src.itselectric.decision_tree import compile_tree
 from src.itselectric.extract import extract_parsed
-from src.itselectric.geo import extract_state_from_address, find_nearest_charger, geocode_address
-from src.itselectric.gmail import body_to_plain, fetch_messages, get_body_from_payload, send_email
-from src.itselectric.hubspot import upsert_contact as hs_upsert
-
-from server.models import AppConfig, Charger, Contact, GeoCache, OutboundEmail, Template
+from src.itselectric.geo import (
+    DEFAULT_NEGATIVE_TTL_SECONDS,
+    GEOCODE_NOT_FOUND,
+    GEOCODE_SERVICE_ERROR,
+    ChargerIndex,
+    canonicalize_address,
+    extract_state_from_address,
+    find_nearest_charger,
+    geocode_address,
+    negative_ttl_for,
+)
+from src.itselectric.gmail import (
+    body_to_plain,
+    fetch_messages,
+    get_body_from_payload,
+    get_messages,
+    sync_messages,
+)
+from src.itselectric.hubspot import ContactBatcher, contact_payload_hash, upsert_contacts
+from src.itselectric.stages import Stage, run_stages
+
+from server.models import (
+    AppConfig,
+    Charger,
+    Contact,
+    GeoCache,
+    GeocodeFailure,
+    HubSpotSync,
+    Job,
+    OutboundEmail,
+    PipelineRun,
+    Template,
+)
 
 
 def _chargers_from_db(session: Session) -> list[dict]:
@@ -31,17 +64,32 @@ def _chargers_from_db(session: Session) -> list[dict]:
     ]
 
 
-def _geocode_with_db_cache(address: str, session: Session) -> tuple[float, float] | None:
-    entry = session.query(GeoCache).filter_by(address=address).first()
-    if entry:
-        return entry.lat, entry.lon
-    coords = geocode_address(address)
-    if coords:
-        existing = session.query(GeoCache).filter_by(address=address).first()
-        if not existing:
-            session.add(GeoCache(address=address, lat=coords[0], lon=coords[1]))
-            session.flush()
-    return coords
+def _ttl_from_hours(raw: str | None) -> timedelta:
+    default_hours = DEFAULT_NEGATIVE_TTL_SECONDS / 3600
+    try:
+        hours = float(raw) if raw else default_hours
+    except ValueError:
+        hours = default_hours
+    return timedelta(hours=max(hours, 0))
+
+
+def negative_ttl(session: Session) -> timedelta:
+    """Negative geocache TTL from AppConfig geocode_negative_ttl_hours (default 7 days)."""
+    return _ttl_from_hours(_get_config(session, "geocode_negative_ttl_hours"))
+
+
+class _KnownFailure(NamedTuple):
+    reason: str
+    last_failed_at: datetime
+
+
+def failure_expires_at(failure: GeocodeFailure | _KnownFailure, ttl: timedelta) -> datetime:
+    """When a remembered failure stops suppressing geocoder calls."""
+    last = failure.last_failed_at
+    if last.tzinfo is None:  # SQLite drops tzinfo on round-trip
+        last = last.replace(tzinfo=timezone.utc)
+    seconds = negative_ttl_for(failure.reason, ttl.total_seconds())
+    return last + timedelta(seconds=seconds)
 
 
 def _get_config(session: Session, key: str, default: str = "") -> str:
@@ -49,6 +97,534 @@ def _get_config(session: Session, key: str, default: str = "") -> str:
     return row.value if row else default
 
 
+class RunContext:
+    """
+    Everything run_pipeline looks up per message, loaded once per run.
+
+    Config, chargers, templates, the geocache, negative-cache entries, HubSpot
+    sync state and known message IDs are read in a handful of queries up front, so the
+    per-message cost is the INSERTs alone. Values are plain Python data, not
+    ORM objects, so they stay valid across commits.
+    """
+
+    def __init__(self, session: Session, decision_tree: dict | None = None):
+        self.config = {r.key: r.value for r in session.query(AppConfig).all()}
+        self.chargers = ChargerIndex(_chargers_from_db(session))
+        self.templates = {
+            t.name: (t.subject, t.body_md, t.updated_at) for t in session.query(Template).all()
+        }
+        self.geocache = {g.address: (g.lat, g.lon) for g in session.query(GeoCache).all()}
+        self.failures = {
+            f.address: _KnownFailure(f.reason, f.last_failed_at)
+            for f in session.query(GeocodeFailure).all()
+        }
+        self.known_ids: set[str] = set()
+        self.hubspot_sync = {
+            h.email: (h.hubspot_id, h.payload_hash) for h in session.query(HubSpotSync).all()
+        }
+        self.negative_ttl = _ttl_from_hours(self.config.get("geocode_negative_ttl_hours"))
+        # Compiled once per run; a tree that fails validation routes nothing.
+        self.route = None
+        self.route_error: str | None = None
+        if decision_tree:
+            try:
+                self.route = compile_tree(decision_tree)
+            except ValueError as e:
+                self.route_error = str(e)
+
+    def get_config(self, key: str, default: str = "") -> str:
+        return self.config.get(key, default)
+
+
+def _record_geocode_failure(session: Session, key: str, reason: str) -> None:
+    failure = session.get(GeocodeFailure, key)
+    if failure:
+        failure.reason = reason
+        failure.attempts += 1
+        failure.last_failed_at = datetime.now(timezone.utc)
+    else:
+        session.add(GeocodeFailure(address=key, reason=reason))
+    session.flush()
+
+
+def _geocode_miss(
+    address: str,
+    failure: GeocodeFailure | _KnownFailure | None,
+    ttl: timedelta,
+    retry_failed: bool,
+    log: Callable[[str], None] | None,
+) -> tuple[tuple[float, float] | None, str | None]:
+    """
+    Network step for an address GeoCache missed: (coords, failure reason).
+
+    (None, None) means the negative cache suppressed the call. Touches no
+    session, so pipeline stage workers can run it.
+    """
+    if failure and not retry_failed:
+        if failure_expires_at(failure, ttl) > datetime.now(timezone.utc):
+            if log:
+                log(f"  Geocode skipped: {failure.reason} (negative cache)")
+            return None, None
+    try:
+        coords = geocode_address(address, raise_errors=True)
+    except GeopyError as e:
+        if log:
+            log(f"  Geocoder error: {e}")
+        return None, GEOCODE_SERVICE_ERROR
+    return (coords, None) if coords else (None, GEOCODE_NOT_FOUND)
+
+
+def _store_geocode(
+    session: Session,
+    key: str,
+    coords: tuple[float, float] | None,
+    reason: str | None,
+    had_failure: bool,
+    run: RunContext | None = None,
+) -> None:
+    """Record a _geocode_miss outcome in GeoCache / GeocodeFailure (and the run maps)."""
+    if reason:
+        _record_geocode_failure(session, key, reason)
+        if run is not None:
+            run.failures[key] = _KnownFailure(reason, datetime.now(timezone.utc))
+        return
+    if had_failure:
+        session.query(GeocodeFailure).filter_by(address=key).delete()
+    if not session.get(GeoCache, key):
+        session.add(GeoCache(address=key, lat=coords[0], lon=coords[1]))
+    session.flush()
+    if run is not None:
+        run.geocache[key] = coords
+        run.failures.pop(key, None)
+
+
+def geocode_with_db_cache(
+    address: str,
+    session: Session,
+    log: Callable[[str], None] | None = None,
+    retry_failed: bool = False,
+    run: RunContext | None = None,
+) -> tuple[float, float] | None:
+    """
+    Geocode address through the GeoCache / GeocodeFailure tables.
+
+    Hits come from GeoCache. Addresses that failed recently (see negative_ttl)
+    return None without calling the geocoder unless retry_failed is set, e.g.
+    when a user has just corrected the address by hand. New failures are
+    recorded with a reason code; a later success clears them.
+
+    With a RunContext, cache and negative-cache lookups come from its
+    preloaded maps (kept up to date here) instead of the database.
+    """
+    key = canonicalize_address(address)
+    if not key:
+        return None
+    failure: GeocodeFailure | _KnownFailure | None
+    if run is not None:
+        coords = run.geocache.get(key)
+        failure = run.failures.get(key)
+    else:
+        entry = session.query(GeoCache).filter_by(address=key).first()
+        coords = (entry.lat, entry.lon) if entry else None
+        failure = session.get(GeocodeFailure, key)
+    if coords:
+        return coords
+
+    ttl = timedelta(0)
+    if failure and not retry_failed:
+        ttl = run.negative_ttl if run is not None else negative_ttl(session)
+    coords, reason = _geocode_miss(address, failure, ttl, retry_failed, log)
+    if coords or reason:
+        _store_geocode(session, key, coords, reason, failure is not None, run)
+    return coords
+
+
+_GeocodePending = tuple[str, tuple[float, float] | None, str | None]
+
+
+def _locate(
+    address: str,
+    run: RunContext,
+    log: Callable[[str], None] | None = None,
+) -> tuple[tuple[float, float] | None, _GeocodePending | None]:
+    """
+    Session-free half of locate_address, safe on a stage worker thread.
+
+    Returns (coords, pending); pending is the (key, coords, reason) outcome of
+    a geocoder call for _store_geocode to record, or None if nothing new was
+    learned.
+    """
+    key = canonicalize_address(address)
+    coords = run.geocache.get(key)
+    if coords:
+        return coords, None
+    if not key:
+        return None, None
+    coords, reason = _geocode_miss(
+        address, run.failures.get(key), run.negative_ttl, False, log
+    )
+    if coords or reason:
+        return coords, (key, coords, reason)
+    return None, None
+
+
+def locate_address(
+    address: str,
+    session: Session,
+    run: RunContext,
+    log: Callable[[str], None] | None = None,
+) -> tuple[float, float] | None:
+    """
+    Geocode via GeoCache, then Nominatim, recording the outcome in the session.
+    """
+    coords, pending = _locate(address, run, log)
+    if pending:
+        key = pending[0]
+        _store_geocode(session, *pending, had_failure=key in run.failures, run=run)
+    return coords
+
+
+# Stays under SQLite's bound-parameter limit on older builds (999).
+_ID_QUERY_CHUNK = 900
+
+
+def _record_hubspot_sync(
+    session: Session,
+    known: dict[str, tuple[str, str]],
+    email: str,
+    hubspot_id: str,
+    payload_hash: str,
+) -> None:
+    """Insert or update the HubSpotSync row; known maps email → (id, hash) already stored."""
+    key = email.lower()
+    if key in known:
+        session.execute(
+            update(HubSpotSync)
+            .where(HubSpotSync.email == key)
+            .values(
+                hubspot_id=hubspot_id,
+                payload_hash=payload_hash,
+                synced_at=datetime.now(timezone.utc),
+            )
+        )
+    else:
+        session.add(HubSpotSync(email=key, hubspot_id=hubspot_id, payload_hash=payload_hash))
+    known[key] = (hubspot_id, payload_hash)
+
+
+def sync_contacts_to_hubspot(
+    session: Session,
+    contacts: list[Contact],
+    access_token: str,
+    force: bool = False,
+) -> dict[str, int]:
+    """
+    Upsert contacts whose HubSpot properties changed since their last sync.
+
+    Unchanged contacts (same contact_payload_hash as the HubSpotSync row)
+    cost no API call unless force is set. Sets each contact's
+    hubspot_status; returns {"sent", "unchanged", "failed"} counts.
+    """
+    emails = sorted({c.email_primary.lower() for c in contacts if c.email_primary})
+    known: dict[str, tuple[str, str]] = {}
+    for start in range(0, len(emails), _ID_QUERY_CHUNK):
+        rows = session.query(HubSpotSync).filter(
+            HubSpotSync.email.in_(emails[start : start + _ID_QUERY_CHUNK])
+        )
+        known.update({h.email: (h.hubspot_id, h.payload_hash) for h in rows})
+    counts = {"sent": 0, "unchanged": 0, "failed": 0}
+    pending: list[tuple[Contact, tuple[str, str, str], str]] = []
+    for contact in contacts:
+        if not contact.email_primary:
+            continue
+        fields = (contact.name or "", contact.email_primary, contact.address or "")
+        payload_hash = contact_payload_hash(*fields)
+        synced = known.get(contact.email_primary.lower())
+        if synced and synced[1] == payload_hash and not force:
+            contact.hubspot_status = "synced"
+            counts["unchanged"] += 1
+        else:
+            pending.append((contact, fields, payload_hash))
+
+    ids = upsert_contacts(access_token, [fields for _, fields, _ in pending]) if pending else {}
+    for contact, fields, payload_hash in pending:
+        hubspot_id = ids.get(fields[1])
+        contact.hubspot_status = "synced" if hubspot_id else "failed"
+        counts["sent" if hubspot_id else "failed"] += 1
+        if hubspot_id:
+            _record_hubspot_sync(session, known, fields[1], hubspot_id, payload_hash)
+    session.flush()
+    return counts
+
+
+def known_contact_ids(session: Session, message_ids: list[str]) -> set[str]:
+    """Which of message_ids already have a Contact row (primary-key lookups, chunked)."""
+    known: set[str] = set()
+    for start in range(0, len(message_ids), _ID_QUERY_CHUNK):
+        chunk = message_ids[start : start + _ID_QUERY_CHUNK]
+        known.update(session.scalars(select(Contact.id).where(Contact.id.in_(chunk))))
+    return known
+
+
+# AppConfig key holding {label: last Gmail historyId} for incremental sync.
+_GMAIL_HISTORY_KEY = "__gmail_history_ids__"
+
+
+def _gmail_checkpoints(run: RunContext) -> dict[str, str]:
+    try:
+        return json.loads(run.get_config(_GMAIL_HISTORY_KEY, "{}"))
+    except ValueError:
+        return {}
+
+
+def _save_gmail_checkpoint(
+    session: Session, run: RunContext, label: str, history_id: str
+) -> None:
+    value = json.dumps({**_gmail_checkpoints(run), label: history_id})
+    row = session.get(AppConfig, _GMAIL_HISTORY_KEY)
+    if row:
+        row.value = value
+    else:
+        session.add(AppConfig(key=_GMAIL_HISTORY_KEY, value=value))
+    run.config[_GMAIL_HISTORY_KEY] = value
+
+
+class _SafeDict(dict):
+    def __missing__(self, key: str) -> str:
+        return f'{{{key}}}'
+
+
+# Stage worker defaults, overridable per install via AppConfig pipeline_<stage>_workers.
+# Parse and route are CPU-only and stay single-threaded.
+_STAGE_WORKERS = {"geocode": 2}
+
+# Nothing blocks on an upsert's result until the end of the run, so the
+# pipeline's batcher can wait this long for a batch to fill.
+_HUBSPOT_MAX_WAIT = 30.0
+
+
+def _workers_from_config(config: dict[str, str], stage: str) -> int:
+    default = _STAGE_WORKERS[stage]
+    try:
+        return max(1, int(config.get(f"pipeline_{stage}_workers", str(default))))
+    except ValueError:
+        return default
+
+
+# Each stage takes and returns a job dict: {"msg", "id", "skip", "logs", ...}.
+# Stages add their results under new keys and never touch the session; log
+# lines are collected in job["logs"] and replayed in message order on commit.
+
+
+def _parse_job(job: dict) -> dict:
+    if job["skip"]:
+        return job
+    msg = job["msg"]
+    mime_type, body_text = get_body_from_payload(msg.get("payload", {}))
+    job["plain"] = body_to_plain(mime_type, body_text) if body_text else ""
+
+    received_str = msg.get("internalDate")
+    job["received_at"] = None
+    if received_str:
+        try:
+            job["received_at"] = datetime.fromtimestamp(int(received_str) / 1000, tz=timezone.utc)
+        except (ValueError, TypeError):
+            pass
+
+    parsed = job["parsed"] = extract_parsed(job["plain"])
+    if parsed:
+        job["logs"].append(f"  Processing: {parsed['name']} / {parsed['address']}")
+    return job
+
+
+def _crm_job(run: RunContext, batcher: ContactBatcher | None, job: dict) -> dict:
+    parsed = job.get("parsed")
+    if not parsed:
+        return job
+    if batcher and parsed["email_1"]:
+        payload_hash = contact_payload_hash(parsed["name"], parsed["email_1"], parsed["address"])
+        synced = run.hubspot_sync.get(parsed["email_1"].lower())
+        if synced and synced[1] == payload_hash:
+            job["hubspot_status"] = "synced"
+            job["logs"].append(f"  HubSpot: unchanged ({synced[0]})")
+            return job
+        job["hubspot_hash"] = payload_hash
+        # Queued, not sent: the batcher groups upserts and the result is
+        # recorded after the contact is committed (see _record_hubspot_results).
+        job["hubspot"] = batcher.submit(parsed["name"], parsed["email_1"], parsed["address"])
+        job["logs"].append("  HubSpot: queued for batch upsert")
+    elif not batcher:
+        job["logs"].append("  HubSpot: skipped (no token configured)")
+    return job
+
+
+def _geocode_job(run: RunContext, job: dict) -> dict:
+    parsed = job.get("parsed")
+    if not parsed:
+        return job
+    log = job["logs"].append
+    coords, job["geocode_pending"] = _locate(parsed["address"], run, log=log)
+    if not coords:
+        log(f"  Could not geocode: {parsed['address']!r}")
+        return job
+    result = find_nearest_charger(*coords, run.chargers)
+    if result:
+        job["nearest"] = result
+        job["driver_state"] = extract_state_from_address(parsed["address"])
+        log(f"  Nearest charger: {result[0]['name']} ({result[1]} mi)")
+    else:
+        log("  No charger found.")
+    return job
+
+
+def _route_job(run: RunContext, job: dict) -> dict:
+    if not ((run.route or run.route_error) and job.get("nearest")):
+        return job
+    parsed = job["parsed"]
+    charger, distance = job["nearest"]
+    ctx = {
+        "driver_state": job["driver_state"],
+        "charger_state": charger["state"],
+        "charger_city": charger["city"],
+        "distance_miles": distance,
+    }
+    if run.route_error:
+        job["logs"].append(f"  Decision tree error: {run.route_error}")
+        return job
+    try:
+        template_name = run.route(ctx)
+    except (KeyError, ValueError) as e:
+        job["logs"].append(f"  Decision tree error: {e}")
+        return job
+
+    if template_name:
+        subject, body, _ = run.templates.get(template_name, ("", "", None))
+        variables = {
+            "name": parsed["name"],
+            "address": parsed["address"],
+            "city": charger["city"] or "",
+            "state": job["driver_state"] or "",
+        }
+        body = body.format_map(_SafeDict(variables))
+        job["outbound"] = {
+            "template_name": template_name,
+            "subject": subject,
+            "body_html": body,
+            "status": "pending",
+        }
+        job["logs"].append(f"  → Queued email: {template_name}")
+    return job
+
+
+def _record_hubspot_results(
+    session: Session,
+    run: RunContext,
+    waiting: list[dict],
+    log: Callable[[str], None],
+    block: bool = False,
+) -> None:
+    """
+    Record the upserts in waiting (jobs already added to the session) whose
+    HubSpot ID has arrived, or all of them with block, and drop them from the list.
+    """
+    still_waiting = []
+    for job in waiting:
+        future = job["hubspot"]
+        if not (block or future.done()):
+            still_waiting.append(job)
+            continue
+        hs_id = future.result()
+        email = job["parsed"]["email_1"]
+        contact = session.get(Contact, job["id"])
+        if contact is not None:
+            contact.hubspot_status = "synced" if hs_id else "failed"
+        if hs_id:
+            _record_hubspot_sync(session, run.hubspot_sync, email, hs_id, job["hubspot_hash"])
+        log(f"HubSpot {email}: {'synced (' + hs_id + ')' if hs_id else 'failed'}")
+    waiting[:] = still_waiting
+
+
+def _commit_job(
+    session: Session,
+    run: RunContext,
+    job: dict,
+    log: Callable[[str], None],
+    auto_send: bool = False,
+) -> None:
+    """
+    Replay a finished job's log and add its rows to the session (calling
+    thread only). With auto_send, the routed email is queued for a job worker
+    to send, in the same commit as the contact.
+    """
+    for line in job["logs"]:
+        log(line)
+    pending = job.get("geocode_pending")
+    if pending:
+        key = pending[0]
+        _store_geocode(session, *pending, had_failure=key in run.failures, run=run)
+
+    parsed = job["parsed"]
+    contact = Contact(
+        id=job["id"],
+        received_at=job["received_at"],
+        raw_body=job["plain"],
+        parse_status="parsed" if parsed else "unparsed",
+    )
+    if parsed:
+        contact.name = parsed["name"]
+        contact.address = parsed["address"]
+        contact.email_primary = parsed["email_1"]
+        contact.email_form = parsed["email_2"]
+        if job.get("hubspot_status"):
+            contact.hubspot_status = job["hubspot_status"]
+    if job.get("nearest"):
+        charger, distance = job["nearest"]
+        contact.nearest_charger_id = charger["db_id"]
+        contact.distance_miles = distance
+    # No per-message flush: the unit of work batches these INSERTs at commit.
+    session.add(contact)
+    outbound = job.get("outbound")
+    if outbound:
+        queue_send = auto_send and bool(contact.email_primary)
+        outbound_id = str(uuid.uuid4())
+        session.add(OutboundEmail(
+            id=outbound_id,
+            contact_id=job["id"],
+            routed_template=outbound["template_name"],
+            **{**outbound, "status": "queued" if queue_send else outbound["status"]},
+        ))
+        if queue_send:
+            from server.job_queue import enqueue
+
+            # The outbound row is new, so no idempotency key (and no lookup) is needed.
+            enqueue(session, "send_email", {"outbound_id": outbound_id, "sent_by": "auto"})
+            log(f"  → Queued auto-send to {contact.email_primary}")
+
+
+def mark_interrupted_runs(session: Session) -> int:
+    """On startup: runs still marked running died with the previous process."""
+    count = (
+        session.query(PipelineRun)
+        .filter_by(status="running")
+        .update({"status": "interrupted", "finished_at": datetime.now(timezone.utc)})
+    )
+    session.commit()
+    return count
+
+
+def _resumable_run(session: Session, label: str) -> PipelineRun | None:
+    """The label's latest Gmail run, if it stopped before finishing its messages."""
+    latest = (
+        session.query(PipelineRun)
+        .filter_by(label=label, source="gmail")
+        .order_by(PipelineRun.started_at.desc())
+        .first()
+    )
+    if latest and latest.status in ("failed", "interrupted") and latest.cursor < latest.total:
+        return latest
+    return None
+
+
 def run_pipeline(
     session: Session,
     decision_tree: dict | None = None,
@@ -57,159 +633,253 @@ def run_pipeline(
     max_messages: int | None = None,
     log: Callable[[str], None] = print,
     fixture_messages: list[dict] | None = None,
+    run_id: str | None = None,
 ) -> list[str]:
     """
     Run the full pipeline. Returns list of contact IDs processed.
     If fixture_messages is provided, uses those instead of fetching from Gmail.
+
+    Progress is committed every pipeline_commit_batch messages (AppConfig,
+    default 20) and tracked in a PipelineRun row. If the label's previous
+    Gmail run failed or was interrupted, this run resumes after its last
+    committed message instead of listing Gmail again.
+
+    Messages flow through parse → CRM → geocode → route stages that overlap
+    across messages (worker counts: pipeline_<stage>_workers); every database
+    write happens on the calling thread, in message order. HubSpot upserts are
+    grouped into batch requests by a ContactBatcher. With auto_send, routed
+    emails are committed as send_email jobs (server/job_queue.py) and sent by
+    the job workers, so the run never waits on Gmail sends.
     """
+    run = RunContext(session, decision_tree)
     if label is None:
-        label = _get_config(session, "label", "INBOX")
+        label = run.get_config("label", "INBOX")
     if max_messages is None:
-        max_messages = int(_get_config(session, "max_messages", "100"))
+        max_messages = int(run.get_config("max_messages", "100"))
+    batch_size = max(1, int(run.get_config("pipeline_commit_batch", "20")))
 
-    chargers = _chargers_from_db(session)
     creds = get_credentials()
-    hs_token = _get_config(session, "hubspot_access_token")
+    hs_token = run.get_config("hubspot_access_token")
+
+    def known_ids(message_ids: list[str]) -> set[str]:
+        run.known_ids |= known_contact_ids(session, message_ids)
+        return run.known_ids
 
+    new_history_id = None
+    resumed = _resumable_run(session, label) if fixture_messages is None else None
     if fixture_messages is not None:
         messages = fixture_messages
+    elif resumed is not None:
+        remaining = json.loads(resumed.message_ids)[resumed.cursor :]
+        log(
+            f"Resuming run {resumed.id} after message {resumed.cursor} of {resumed.total} "
+            f"({len(remaining)} left)..."
+        )
+        messages = get_messages(creds, remaining, known_ids=known_ids)
+        new_history_id = resumed.history_id
+        resumed.status = "resumed"
+    elif run.get_config("gmail_sync_mode", "incremental") == "incremental":
+        history_id = _gmail_checkpoints(run).get(label)
+        log(f"Syncing emails from Gmail (checkpoint {history_id or 'none'})...")
+        messages, new_history_id = sync_messages(
+            creds, label, max_messages, history_id, known_ids=known_ids
+        )
+        log(f"Fetched {len(messages)} new message(s).")
     else:
         log("Fetching emails from Gmail...")
-        messages = fetch_messages(creds, label, max_messages)
-        log(f"Fetched {len(messages)} message(s).")
-
-    processed: list[str] = []
+        messages = fetch_messages(creds, label, max_messages, known_ids=known_ids)
+        log(f"Fetched {len(messages)} new message(s).")
 
     for msg in messages:
-        msg_id = msg.get("id", "")
-        if not msg_id:
+        if not msg.get("id"):
             log("Skipping message with no id")
-            continue
-
-        if session.query(Contact).filter_by(id=msg_id).first():
-            log(f"Skipping already-processed message {msg_id}")
-            continue
-
-        mime_type, body_text = get_body_from_payload(msg.get("payload", {}))
-        plain = body_to_plain(mime_type, body_text) if body_text else ""
-
-        received_str = msg.get("internalDate")
-        received_at = None
-        if received_str:
-            try:
-                received_at = datetime.fromtimestamp(int(received_str) / 1000, tz=timezone.utc)
-            except (ValueError, TypeError):
-                pass
-
-        parsed = extract_parsed(plain)
+    messages = [m for m in messages if m.get("id")]
+    # Gmail results are already filtered; this catches fixture runs and repeats.
+    known_ids([m["id"] for m in messages])
+
+    record = PipelineRun(
+        id=run_id or str(uuid.uuid4()),
+        label=label,
+        source="fixture" if fixture_messages is not None else "gmail",
+        message_ids=json.dumps([m["id"] for m in messages]),
+        total=len(messages),
+        history_id=new_history_id,
+        resumed_from=resumed.id if resumed else None,
+    )
+    session.add(record)
+    session.commit()
 
-        contact = Contact(
-            id=msg_id,
-            received_at=received_at,
-            raw_body=plain,
-            parse_status="parsed" if parsed else "unparsed",
-        )
+    jobs = []
+    for msg in messages:
+        jobs.append({"msg": msg, "id": msg["id"], "skip": msg["id"] in run.known_ids, "logs": []})
+        run.known_ids.add(msg["id"])
+
+    batcher = ContactBatcher(hs_token, max_wait=_HUBSPOT_MAX_WAIT) if hs_token else None
+    hubspot_waiting: list[dict] = []
+    stages = [
+        Stage("parse", _parse_job),
+        Stage("crm", partial(_crm_job, run, batcher)),
+        Stage(
+            "geocode",
+            partial(_geocode_job, run),
+            workers=_workers_from_config(run.config, "geocode"),
+        ),
+        Stage("route", partial(_route_job, run)),
+    ]
 
-        nearest_charger_row = None
-        dist_float = None
-        driver_state = None
-        charger_city = None
-
-        if parsed:
-            contact.name = parsed["name"]
-            contact.address = parsed["address"]
-            contact.email_primary = parsed["email_1"]
-            contact.email_form = parsed["email_2"]
-
-            log(f"  Processing: {parsed['name']} / {parsed['address']}")
-
-            if hs_token and contact.email_primary:
-                hs_id = hs_upsert(
-                    hs_token, parsed["name"], contact.email_primary, parsed["address"]
-                )
-                contact.hubspot_status = "synced" if hs_id else "failed"
-                log(f"  HubSpot: {'synced (' + hs_id + ')' if hs_id else 'failed'}")
-            elif not hs_token:
-                log("  HubSpot: skipped (no token configured)")
-
-            coords = _geocode_with_db_cache(parsed["address"], session)
-            if coords:
-                lat, lon = coords
-                result = find_nearest_charger(lat, lon, chargers)
-                if result:
-                    nearest_charger_dict, dist_float = result
-                    nearest_charger_row = session.query(Charger).filter_by(
-                        id=nearest_charger_dict["db_id"]
-                    ).first()
-                    contact.nearest_charger_id = (
-                        nearest_charger_row.id if nearest_charger_row else None
-                    )
-                    contact.distance_miles = dist_float
-                    driver_state = extract_state_from_address(parsed["address"])
-                    charger_city = nearest_charger_dict["city"]
-                    log(f"  Nearest charger: {nearest_charger_dict['name']} ({dist_float} mi)")
+    processed: list[str] = []
+    try:
+        results = run_stages(jobs, stages)
+        try:
+            # Stages overlap across messages; results arrive here in message
+            # order, so the cursor always marks a committed prefix.
+            for position, (job, error) in enumerate(results, start=1):
+                if error is not None:
+                    raise error
+                if job["skip"]:
+                    log(f"Skipping already-processed message {job['id']}")
                 else:
-                    log("  No charger found.")
-            else:
-                log(f"  Could not geocode: {parsed['address']!r}")
-
-        session.add(contact)
-        session.flush()
-
-        if parsed and decision_tree and nearest_charger_row and dist_float is not None:
-            ctx = {
-                "driver_state": driver_state,
-                "charger_state": nearest_charger_row.state,
-                "charger_city": charger_city,
-                "distance_miles": dist_float,
-            }
-            try:
-                template_name = evaluate_tree(decision_tree, ctx)
-            except (KeyError, ValueError) as e:
-                log(f"  Decision tree error: {e}")
-                template_name = None
-
-            if template_name:
-                tmpl = session.query(Template).filter_by(name=template_name).first()
-                subject = tmpl.subject if tmpl else ""
-                body = tmpl.body_md if tmpl else ""
-
-                class _SafeDict(dict):
-                    def __missing__(self, key: str) -> str:
-                        return f'{{{key}}}'
-
-                body = body.format_map(_SafeDict(
-                    name=parsed["name"],
-                    address=parsed["address"],
-                    city=charger_city or "",
-                    state=driver_state or "",
-                ))
-                from src.itselectric.email_layout import render_email
-                outbound = OutboundEmail(
-                    contact_id=msg_id,
-                    template_name=template_name,
-                    routed_template=template_name,
-                    subject=subject,
-                    body_html=body,
-                    status="pending",
-                )
-                session.add(outbound)
-                log(f"  → Queued email: {template_name}")
-
-                if auto_send and contact.email_primary:
-                    try:
-                        ok = send_email(creds, contact.email_primary, subject, render_email(body))
-                        outbound.status = "sent" if ok else "failed"
-                        outbound.sent_at = datetime.now(timezone.utc)
-                        outbound.sent_by = "auto"
-                        log(f"  → Auto-sent to {contact.email_primary}: {'ok' if ok else 'failed'}")
-                    except Exception as exc:
-                        outbound.status = "failed"
-                        outbound.error_message = str(exc)
-                        log(f"  → Auto-send failed: {exc}")
-
-        processed.append(msg_id)
-
+                    _commit_job(session, run, job, log, auto_send)
+                    processed.append(job["id"])
+                    if job.get("hubspot") is not None:
+                        hubspot_waiting.append(job)
+                # Commit in chunks so the Inbox fills in as the run goes and a
+                # crash loses at most one chunk of work.
+                if position % batch_size == 0 and position < len(messages):
+                    _record_hubspot_results(session, run, hubspot_waiting, log)
+                    record.cursor = position
+                    record.processed = len(processed)
+                    session.commit()
+                    log(f"Committed {position}/{len(messages)} message(s).")
+        finally:
+            results.close()
+            if batcher:
+                batcher.close()
+    except Exception as e:
+        session.rollback()
+        record.status = "failed"
+        record.error = str(e)
+        record.finished_at = datetime.now(timezone.utc)
+        session.commit()
+        log(f"Run failed after {record.cursor} committed message(s): {e}")
+        raise
+
+    # The batcher is closed, so every upsert has its result by now.
+    _record_hubspot_results(session, run, hubspot_waiting, log, block=True)
+    record.cursor = len(messages)
+    record.processed = len(processed)
+    record.status = "completed"
+    record.finished_at = datetime.now(timezone.utc)
+    # Advance the Gmail checkpoint in the same commit as the last contacts it covers.
+    if new_history_id:
+        _save_gmail_checkpoint(session, run, label, new_history_id)
     session.commit()
     log(f"Done. Processed {len(processed)} new message(s).")
     return processed
+
+
+def run_send_batch(session: Session, batch_id: str | None = None) -> dict:
+    """
+    Queue a send_email job for every pending OutboundEmail and return the
+    batch's progress (send_batch_progress) plus how many were skipped for
+    having no address.
+
+    Jobs are keyed by outbound id like a manual send, so an email is queued
+    once however often send-batch is started, and the job workers send it
+    with the same retries, dead-lettering and Sheets row. The jobs carry the
+    batch_id in their payload, which is how progress is read back.
+    """
+    from server.job_queue import enqueue
+
+    batch_id = batch_id or str(uuid.uuid4())
+    rows = (
+        session.query(OutboundEmail, Contact)
+        .join(Contact, OutboundEmail.contact_id == Contact.id)
+        .filter(OutboundEmail.status == "pending")
+        .order_by(OutboundEmail.created_at)
+        .all()
+    )
+    skipped = 0
+    for outbound, contact in rows:
+        if not contact.email_primary:
+            skipped += 1
+            continue
+        outbound.status = "queued"
+        enqueue(
+            session,
+            "send_email",
+            {
+                "outbound_id": outbound.id,
+                "sent_by": "manual",
+                "append_to_sheet": True,
+                "batch_id": batch_id,
+            },
+            idempotency_key=f"send_email:{outbound.id}",
+        )
+    session.commit()
+    progress = send_batch_progress(session, batch_id) or _empty_batch(batch_id)
+    return {**progress, "skipped": skipped}
+
+
+def _empty_batch(batch_id: str) -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "batch_id": batch_id,
+        "status": "completed",
+        "total": 0,
+        "done": 0,
+        "sent": 0,
+        "failed": 0,
+        "results": [],
+        "started_at": now,
+        "finished_at": now,
+    }
+
+
+def _iso(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:  # SQLite returns naive UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def send_batch_progress(session: Session, batch_id: str) -> dict | None:
+    """
+    Progress of a send-batch, read from its send_email jobs and their
+    OutboundEmails; None if no job belongs to batch_id. A job is done once it
+    succeeded or was dead-lettered; sent and failed are outbound statuses.
+    """
+    jobs = session.scalars(
+        select(Job)
+        .where(Job.kind == "send_email", func.json_extract(Job.payload, "$.batch_id") == batch_id)
+        .order_by(Job.created_at)
+    ).all()
+    if not jobs:
+        return None
+    outbound_ids = [json.loads(j.payload)["outbound_id"] for j in jobs]
+    outbounds = {
+        o.id: o for o in session.query(OutboundEmail).filter(OutboundEmail.id.in_(outbound_ids))
+    }
+    results = []
+    for job, outbound_id in zip(jobs, outbound_ids):
+        outbound = outbounds.get(outbound_id)
+        results.append({
+            "contact_id": outbound.contact_id if outbound else None,
+            "outbound_id": outbound_id,
+            "status": outbound.status if outbound else "deleted",
+            "error": job.last_error if job.status == "dead" else None,
+        })
+    done = sum(j.status in ("succeeded", "dead") for j in jobs)
+    finished = [j.finished_at for j in jobs if j.finished_at]
+    return {
+        "batch_id": batch_id,
+        "status": "completed" if done == len(jobs) else "running",
+        "total": len(jobs),
+        "done": done,
+        "sent": sum(r["status"] == "sent" for r in results),
+        "failed": sum(r["status"] == "failed" for r in results),
+        "results": results,
+        "started_at": _iso(min(j.created_at for j in jobs)),
+        "finished_at": _iso(max(finished)) if done == len(jobs) and finished else None,
+    }
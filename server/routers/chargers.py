@@ -1,32 +1,15 @@
 """Charger locations CRUD API."""
 
-from typing import Annotated
-
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, sessionmaker
 
+from server.db import DbDep
 from server.models import Charger
 from server.schemas import ChargerOut
 
 router = APIRouter()
 
 
-def get_db():
-    from server.db import get_engine
-    from server.main import DB_URL
-
-    engine = get_engine(DB_URL)
-    s = sessionmaker(bind=engine)()
-    try:
-        yield s
-    finally:
-        s.close()
-
-
-DbDep = Annotated[Session, Depends(get_db)]
-
-
 class ChargerIn(BaseModel):
     street: str
     city: str
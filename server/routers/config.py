@@ -1,11 +1,12 @@
 """Configuration and decision tree API endpoints."""
 
 import json
-from typing import Annotated, Any
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, sessionmaker
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
+from server.db import DbDep, get_session_factory
 from server.models import AppConfig
 
 router = APIRouter()
@@ -22,24 +23,15 @@ _ALLOWED_CONFIG_KEYS = {
     "hubspot_access_token",
     "google_doc_id",
     "auto_send",
+    "geocode_negative_ttl_hours",
+    "gmail_sync_mode",
+    "pipeline_commit_batch",
+    "pipeline_geocode_workers",
+    "sheets_flush_rows",
+    "sheets_flush_seconds",
 }
 
 
-def get_db():
-    from server.db import get_engine
-    from server.main import DB_URL
-
-    engine = get_engine(DB_URL)
-    s = sessionmaker(bind=engine)()
-    try:
-        yield s
-    finally:
-        s.close()
-
-
-DbDep = Annotated[Session, Depends(get_db)]
-
-
 @router.get("/config")
 def get_config(db: DbDep):
     rows = db.query(AppConfig).filter(AppConfig.key.in_(_ALLOWED_CONFIG_KEYS)).all()
@@ -84,18 +76,22 @@ def put_decision_tree(body: dict[str, Any], db: DbDep):
 @router.post("/decision-tree/test")
 def test_decision_tree(db: DbDep):
     """Dry-run current decision tree against fixture emails."""
-    from src.itselectric.decision_tree import evaluate
+    from src.itselectric.decision_tree import compile_tree
     from src.itselectric.extract import extract_parsed
     from src.itselectric.fixture import load_fixture_messages
-    from src.itselectric.geo import extract_state_from_address, find_nearest_charger
+    from src.itselectric.geo import extract_state_from_address, nearest_chargers_batch
     from src.itselectric.gmail import body_to_plain, get_body_from_payload
 
-    from server.models import Charger, GeoCache
+    from server.models import Charger
+    from server.pipeline_service import geocode_with_db_cache
 
     row = db.query(AppConfig).filter_by(key=_DECISION_TREE_KEY).first()
     if not row:
         raise HTTPException(status_code=400, detail="No decision tree saved")
-    tree = json.loads(row.value)
+    try:
+        route = compile_tree(json.loads(row.value))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid decision tree: {e}") from None
 
     chargers = [
         {
@@ -113,7 +109,9 @@ def test_decision_tree(db: DbDep):
     except FileNotFoundError:
         return {"results": [], "error": "fixture directory not found"}
 
-    results = []
+    # Pass 1: parse + geocode. Geocoded rows are routed together in pass 2.
+    results: list[dict] = []
+    geocoded: list[tuple[dict, dict, tuple[float, float]]] = []
     for msg in messages:
         mime, body = get_body_from_payload(msg.get("payload", {}))
         plain = body_to_plain(mime, body) if body else ""
@@ -122,43 +120,78 @@ def test_decision_tree(db: DbDep):
             results.append({"id": msg.get("id", ""), "parsed": False, "template": None})
             continue
 
-        cache = db.query(GeoCache).filter_by(address=parsed["address"]).first()
-        if cache:
-            coords: tuple[float, float] | None = (cache.lat, cache.lon)
-        else:
-            from src.itselectric.geo import geocode_address
-
-            coords = geocode_address(parsed["address"])
-
+        coords = geocode_with_db_cache(parsed["address"], db)
         if not coords:
             results.append({"id": msg.get("id", ""), "parsed": True, "template": "geocode_failed"})
             continue
-
-        result = find_nearest_charger(coords[0], coords[1], chargers)
-        if not result:
+        if not chargers:
             results.append({"id": msg.get("id", ""), "parsed": True, "template": "no_charger"})
             continue
 
-        charger, dist = result
-        ctx = {
-            "driver_state": extract_state_from_address(parsed["address"]),
-            "charger_state": charger["state"],
-            "charger_city": charger["city"],
-            "distance_miles": dist,
+        entry = {
+            "id": msg.get("id", ""),
+            "name": parsed["name"],
+            "address": parsed["address"],
+            "parsed": True,
+            "template": None,
         }
-        try:
-            template = evaluate(tree, ctx)
-        except (KeyError, ValueError) as e:
-            template = f"error:{e}"
-
-        results.append(
-            {
-                "id": msg.get("id", ""),
-                "name": parsed["name"],
-                "address": parsed["address"],
-                "parsed": True,
-                "template": template,
-            }
+        results.append(entry)
+        geocoded.append((entry, parsed, coords))
+
+    # Pass 2: nearest charger for every geocoded row in one vectorised call.
+    if geocoded:
+        indices, distances = nearest_chargers_batch(
+            [c[0] for _, _, c in geocoded], [c[1] for _, _, c in geocoded], chargers, exact=True
         )
+        for (entry, parsed, _), i, dist in zip(geocoded, indices, distances):
+            charger = chargers[i]
+            ctx = {
+                "driver_state": extract_state_from_address(parsed["address"]),
+                "charger_state": charger["state"],
+                "charger_city": charger["city"],
+                "distance_miles": float(dist),
+            }
+            try:
+                entry["template"] = route(ctx)
+            except (KeyError, ValueError) as e:
+                entry["template"] = f"error:{e}"
 
+    db.commit()  # keep newly learned geocache + negative-cache entries
     return {"results": results}
+
+
+@router.post("/decision-tree/backtest")
+def backtest_decision_tree(request: Request, db: DbDep, body: dict[str, Any] | None = None):
+    """
+    Route every stored contact through a candidate tree (the request body, or
+    the saved tree if empty) and compare with what each was last routed to.
+    Streams SSE: progress events per batch, then the result, then [done].
+    """
+    from src.itselectric.decision_tree import compile_tree
+
+    from server.backtest_service import backtest_tree
+
+    tree = body
+    if not tree:
+        row = db.query(AppConfig).filter_by(key=_DECISION_TREE_KEY).first()
+        if not row:
+            raise HTTPException(status_code=400, detail="No decision tree saved")
+        tree = json.loads(row.value)
+    try:
+        compile_tree(tree)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid decision tree: {e}") from None
+
+    # The request-scoped session closes before the body finishes streaming.
+    session_factory = get_session_factory(request.app)
+
+    def _events():
+        session = session_factory()
+        try:
+            for event in backtest_tree(session, tree):
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            session.close()
+        yield "data: [done]\n\n"
+
+    return StreamingResponse(_events(), media_type="text/event-stream")
@@ -1,33 +1,14 @@
 """Contacts / inbox API endpoints."""
 
-from datetime import datetime, timezone
-from typing import Annotated
-
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, sessionmaker
 
+from server.db import DbDep
 from server.models import AppConfig, Charger, Contact, GeoCache, OutboundEmail, Template
 from server.schemas import ContactOut, OutboundEmailOut
 
 router = APIRouter()
 
-
-def get_db():
-    from server.db import get_engine
-    from server.main import DB_URL
-
-    engine = get_engine(DB_URL)
-    s = sessionmaker(bind=engine)()
-    try:
-        yield s
-    finally:
-        s.close()
-
-
-DbDep = Annotated[Session, Depends(get_db)]
-
-
 @router.get("", response_model=list[ContactOut])
 def list_contacts(
     db: DbDep,
@@ -70,7 +51,7 @@ def list_contacts(
 
 @router.get("/{contact_id}")
 def get_contact(contact_id: str, db: DbDep):
-    from src.itselectric.email_layout import render_email
+    from src.itselectric.email_layout import render_email, render_template
 
     contact = db.query(Contact).filter_by(id=contact_id).first()
     if not contact:
@@ -102,8 +83,10 @@ def get_contact(contact_id: str, db: DbDep):
         tmpl = (
             db.query(Template).filter_by(name=e.template_name).first() if e.template_name else None
         )
-        body_md = (tmpl.body_md if tmpl else None) or e.body_html or ""
-        out.body_html = render_email(body_md.format_map(_vars))
+        if tmpl and tmpl.body_md:
+            out.body_html = render_template(tmpl.name, tmpl.updated_at, tmpl.body_md, _vars)
+        else:
+            out.body_html = render_email((e.body_html or "").format_map(_vars))
         rendered.append(out)
 
     return {
@@ -139,8 +122,13 @@ def send_contact_email(
     db: DbDep,
     template_override: str | None = Query(default=None),
 ):
-    from src.itselectric.auth import get_credentials
-    from src.itselectric.gmail import send_email
+    """
+    Queue the contact's pending email for sending and return at once.
+
+    A job worker renders and sends it, then appends the Sheets row; progress
+    is visible on the OutboundEmail status and at /api/jobs/{job_id}.
+    """
+    from server.job_queue import enqueue
 
     outbound = db.query(OutboundEmail).filter_by(contact_id=contact_id, status="pending").first()
     if not outbound:
@@ -150,140 +138,98 @@ def send_contact_email(
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    from src.itselectric.email_layout import render_email
-
-    class _SafeDict(dict):
-        def __missing__(self, key: str) -> str:
-            return f'{{{key}}}'
-
-    def _substitute(md: str) -> str:
-        driver_state = None
-        if contact.address:
-            from src.itselectric.geo import extract_state_from_address
-            driver_state = extract_state_from_address(contact.address)
-        charger_city = None
-        if contact.nearest_charger_id:
-            from server.models import Charger
-            ch = db.query(Charger).filter_by(id=contact.nearest_charger_id).first()
-            charger_city = ch.city if ch else None
-        return md.format_map(_SafeDict(
-            name=contact.name or "",
-            address=contact.address or "",
-            city=charger_city or "",
-            state=driver_state or "",
-        ))
-
-    subject = outbound.subject or ""
-
     if template_override:
         tmpl = db.query(Template).filter_by(name=template_override).first()
         if tmpl:
             outbound.template_name = template_override
-            subject = tmpl.subject
-            body = render_email(_substitute(tmpl.body_md))
-        else:
-            body = outbound.body_html or ""
-    elif outbound.template_name:
-        tmpl = db.query(Template).filter_by(name=outbound.template_name).first()
-        body = render_email(_substitute(tmpl.body_md)) if tmpl else (outbound.body_html or "")
-    else:
-        body = outbound.body_html or ""
-
-    try:
-        creds = get_credentials()
-        ok = send_email(creds, contact.email_primary, subject, body)
-    except Exception as e:
-        outbound.status = "failed"
-        outbound.error_message = str(e)
-        db.commit()
-        raise HTTPException(status_code=500, detail=str(e))
-
-    if ok:
-        outbound.status = "sent"
-        outbound.sent_at = datetime.now(timezone.utc)
-        outbound.sent_by = "manual"
-    else:
-        outbound.status = "failed"
-        outbound.error_message = "Gmail API returned failure"
+            outbound.subject = tmpl.subject
+
+    outbound.status = "queued"
+    job = enqueue(
+        db,
+        "send_email",
+        {"outbound_id": outbound.id, "sent_by": "manual", "append_to_sheet": True},
+        idempotency_key=f"send_email:{outbound.id}",
+    )
     db.commit()
-
-    # Background: append to Sheets (non-fatal)
-    spread_row = db.query(AppConfig).filter_by(key="spreadsheet_id").first()
-    if spread_row and spread_row.value:
-        charger = (
-            db.query(Charger).filter_by(id=contact.nearest_charger_id).first()
-            if contact.nearest_charger_id
-            else None
-        )
-        row = (
-            contact.received_at.strftime("%Y-%m-%d %H:%M:%S UTC") if contact.received_at else "",
-            contact.name or "",
-            contact.address or "",
-            contact.email_primary or "",
-            contact.email_form or "",
-            contact.raw_body or "",
-            f"{charger.street}, {charger.city}, {charger.state}" if charger else "",
-            str(contact.distance_miles) if contact.distance_miles else "",
-            contact.hubspot_status or "",
-            outbound.template_name or "",
-        )
-        try:
-            from src.itselectric.sheets import append_rows
-
-            append_rows(creds, spread_row.value, "Sheet1", [row], 5000)
-        except Exception:
-            pass
-
-    return {"ok": ok, "status": outbound.status}
+    return {"ok": True, "status": outbound.status, "job_id": job.id}
 
 
 @router.post("/send-batch")
 def send_batch(db: DbDep):
-    from src.itselectric.auth import get_credentials
-    from src.itselectric.gmail import send_email
-
-    pendings = db.query(OutboundEmail).filter_by(status="pending").all()
-    results = []
-    for outbound in pendings:
-        contact = db.query(Contact).filter_by(id=outbound.contact_id).first()
-        if not contact or not contact.email_primary:
-            continue
-        try:
-            creds = get_credentials()
-            from src.itselectric.email_layout import render_email as _render
-            from src.itselectric.geo import extract_state_from_address
+    """
+    Queue every pending email as a send_email job and return the batch's
+    progress at once; poll GET /send-batch/{batch_id}. Emails already queued
+    are not queued again, so starting a second batch cannot double-send.
+    """
+    from server.pipeline_service import run_send_batch
+
+    return run_send_batch(db)
+
+
+@router.get("/send-batch/{batch_id}")
+def send_batch_status(batch_id: str, db: DbDep):
+    from server.pipeline_service import send_batch_progress
+
+    progress = send_batch_progress(db, batch_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Send-batch not found")
+    return progress
+
+
+@router.post("/reroute")
+def reroute_contacts(db: DbDep):
+    """Recompute nearest charger + distance for every geocoded contact in one batch."""
+    from src.itselectric.geo import canonicalize_address, nearest_chargers_batch
+
+    charger_rows = db.query(Charger).all()
+    if not charger_rows:
+        return {"updated": 0, "unchanged": 0, "not_geocoded": 0}
+    coords_by_address = {g.address: (g.lat, g.lon) for g in db.query(GeoCache).all()}
+
+    contacts = db.query(Contact).filter(Contact.address.isnot(None)).all()
+    keys = {c.id: canonicalize_address(c.address) for c in contacts}
+    located = [c for c in contacts if keys[c.id] in coords_by_address]
+    if not located:
+        return {"updated": 0, "unchanged": 0, "not_geocoded": len(contacts)}
+
+    indices, distances = nearest_chargers_batch(
+        [coords_by_address[keys[c.id]][0] for c in located],
+        [coords_by_address[keys[c.id]][1] for c in located],
+        [{"lat": r.lat, "lon": r.lon} for r in charger_rows],
+        exact=True,
+    )
+    updated = 0
+    for contact, i, dist in zip(located, indices, distances):
+        charger_id, dist_float = charger_rows[i].id, float(dist)
+        if contact.nearest_charger_id != charger_id or contact.distance_miles != dist_float:
+            contact.nearest_charger_id = charger_id
+            contact.distance_miles = dist_float
+            updated += 1
+    db.commit()
+    return {
+        "updated": updated,
+        "unchanged": len(located) - updated,
+        "not_geocoded": len(contacts) - len(located),
+    }
 
-            class _SD(dict):
-                def __missing__(self, key: str) -> str:
-                    return f'{{{key}}}'
 
-            charger_city = None
-            if contact.nearest_charger_id:
-                ch = db.query(Charger).filter_by(id=contact.nearest_charger_id).first()
-                charger_city = ch.city if ch else None
-            _vars = _SD(
-                name=contact.name or "",
-                address=contact.address or "",
-                city=charger_city or "",
-                state=extract_state_from_address(contact.address or "") or "",
-            )
+@router.post("/hubspot-sync")
+def hubspot_sync(db: DbDep, force: bool = Query(default=False)):
+    """Push parsed contacts to HubSpot; unchanged ones are skipped unless force=true."""
+    from server.pipeline_service import sync_contacts_to_hubspot
 
-            tmpl_body = outbound.body_html or ""
-            if outbound.template_name:
-                tmpl_obj = db.query(Template).filter_by(name=outbound.template_name).first()
-                if tmpl_obj:
-                    tmpl_body = _render(tmpl_obj.body_md.format_map(_vars))
-            ok = send_email(
-                creds, contact.email_primary, outbound.subject or "", tmpl_body
-            )
-            outbound.status = "sent" if ok else "failed"
-        except Exception as e:
-            outbound.status = "failed"
-            outbound.error_message = str(e)
-        results.append({"contact_id": outbound.contact_id, "status": outbound.status})
+    token_row = db.query(AppConfig).filter_by(key="hubspot_access_token").first()
+    if not token_row or not token_row.value:
+        raise HTTPException(status_code=400, detail="hubspot_access_token is not configured")
+    contacts = (
+        db.query(Contact)
+        .filter(Contact.parse_status == "parsed", Contact.email_primary.isnot(None))
+        .all()
+    )
+    counts = sync_contacts_to_hubspot(db, contacts, token_row.value, force=force)
     db.commit()
-    sent_count = sum(1 for r in results if r["status"] == "sent")
-    return {"sent": sent_count, "results": results}
+    return counts
 
 
 class ContactFixIn(BaseModel):
@@ -305,11 +251,9 @@ def fix_contact(contact_id: str, body: ContactFixIn, db: DbDep):
     contact.parse_status = "parsed"
 
     # Geocode and find nearest charger
-    from src.itselectric.geo import (
-        extract_state_from_address,
-        find_nearest_charger,
-        geocode_address,
-    )
+    from src.itselectric.geo import extract_state_from_address, find_nearest_charger
+
+    from server.pipeline_service import geocode_with_db_cache
 
     chargers_rows = db.query(Charger).all()
     chargers = [
@@ -318,14 +262,8 @@ def fix_contact(contact_id: str, body: ContactFixIn, db: DbDep):
         for c in chargers_rows
     ]
 
-    cached = db.query(GeoCache).filter_by(address=body.address).first()
-    if cached:
-        coords = (cached.lat, cached.lon)
-    else:
-        coords = geocode_address(body.address)
-        if coords:
-            db.add(GeoCache(address=body.address, lat=coords[0], lon=coords[1]))
-            db.flush()
+    # The address was just corrected by hand, so bypass the negative cache.
+    coords = geocode_with_db_cache(body.address, db, retry_failed=True)
     nearest_charger_row = None
     dist_float = None
     charger_city = None
@@ -347,7 +285,7 @@ def fix_contact(contact_id: str, body: ContactFixIn, db: DbDep):
     decision_tree = json.loads(_tree_row.value) if _tree_row else None
 
     if decision_tree and nearest_charger_row and dist_float is not None:
-        from src.itselectric.decision_tree import evaluate as evaluate_tree
+        from src.itselectric.decision_tree import compile_tree
 
         ctx = {
             "driver_state": driver_state,
@@ -356,7 +294,7 @@ def fix_contact(contact_id: str, body: ContactFixIn, db: DbDep):
             "distance_miles": dist_float,
         }
         try:
-            template_name = evaluate_tree(decision_tree, ctx)
+            template_name = compile_tree(decision_tree)(ctx)
         except (KeyError, ValueError):
             template_name = None
 
@@ -394,6 +332,23 @@ def fix_contact(contact_id: str, body: ContactFixIn, db: DbDep):
                     status="pending",
                 ))
 
+    token_row = db.query(AppConfig).filter_by(key="hubspot_access_token").first()
+    if token_row and token_row.value and contact.email_primary:
+        from src.itselectric.hubspot import contact_payload_hash
+
+        from server.job_queue import enqueue
+
+        # Keyed by content, so saving the same fix twice queues one upsert.
+        payload_hash = contact_payload_hash(
+            contact.name or "", contact.email_primary, contact.address or ""
+        )
+        enqueue(
+            db,
+            "hubspot_upsert",
+            {"contact_id": contact.id},
+            idempotency_key=f"hubspot_upsert:{contact.id}:{payload_hash}",
+        )
+
     db.commit()
     out = ContactOut.model_validate(contact)
     latest = (
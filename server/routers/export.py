@@ -3,12 +3,12 @@
 import csv
 import io
 import uuid
-from typing import Annotated, Any
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, sessionmaker
 
+from server.db import DbDep
 from server.models import Charger, Contact, GeoCache, OutboundEmail, Template
 
 router = APIRouter()
@@ -16,20 +16,6 @@ router = APIRouter()
 _pending_imports: dict[str, dict] = {}
 
 
-def get_db():
-    from server.db import get_engine
-    from server.main import DB_URL
-
-    s = sessionmaker(bind=get_engine(DB_URL))()
-    try:
-        yield s
-    finally:
-        s.close()
-
-
-DbDep = Annotated[Session, Depends(get_db)]
-
-
 @router.get("/export/snapshot")
 def export_snapshot(db: DbDep):
     def _contact(c: Contact):
@@ -204,9 +190,13 @@ def import_snapshot_confirm(import_id: str, db: DbDep):
                 )
             )
 
+    from src.itselectric.geo import canonicalize_address
+
     for g in body.get("geocache", []):
-        if not db.query(GeoCache).filter_by(address=g["address"]).first():
-            db.add(GeoCache(address=g["address"], lat=g["lat"], lon=g["lon"]))
+        key = canonicalize_address(g["address"])
+        if key and not db.query(GeoCache).filter_by(address=key).first():
+            db.add(GeoCache(address=key, lat=g["lat"], lon=g["lon"]))
+            db.flush()
 
     db.commit()
     return {"ok": True}
@@ -0,0 +1,62 @@
+"""Negative geocache inspection + purge API."""
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter
+from src.itselectric.geo import canonicalize_address
+
+from server.db import DbDep
+from server.models import GeocodeFailure
+from server.pipeline_service import failure_expires_at, negative_ttl
+from server.schemas import GeocodeFailureOut
+
+router = APIRouter()
+
+
+@router.get("/geocode-failures", response_model=list[GeocodeFailureOut])
+def list_geocode_failures(db: DbDep, reason: str | None = None):
+    """Addresses the geocoder could not resolve, newest first, with their expiry."""
+    query = db.query(GeocodeFailure)
+    if reason:
+        query = query.filter_by(reason=reason)
+    ttl = negative_ttl(db)
+    now = datetime.now(timezone.utc)
+    out = []
+    for f in query.order_by(GeocodeFailure.last_failed_at.desc()).all():
+        expires_at = failure_expires_at(f, ttl)
+        out.append(
+            GeocodeFailureOut(
+                address=f.address,
+                reason=f.reason,
+                attempts=f.attempts,
+                first_failed_at=f.first_failed_at,
+                last_failed_at=f.last_failed_at,
+                expires_at=expires_at,
+                expired=expires_at <= now,
+            )
+        )
+    return out
+
+
+@router.delete("/geocode-failures")
+def purge_geocode_failures(
+    db: DbDep, address: str | None = None, expired_only: bool = False
+):
+    """
+    Forget failed lookups so the next run asks the geocoder again.
+
+    With address, only that entry (matched by canonical key) is removed; with
+    expired_only, only entries past their TTL; otherwise everything.
+    """
+    query = db.query(GeocodeFailure)
+    if address is not None:
+        query = query.filter_by(address=canonicalize_address(address))
+    rows = query.all()
+    if expired_only:
+        ttl = negative_ttl(db)
+        now = datetime.now(timezone.utc)
+        rows = [f for f in rows if failure_expires_at(f, ttl) <= now]
+    for f in rows:
+        db.delete(f)
+    db.commit()
+    return {"deleted": len(rows)}
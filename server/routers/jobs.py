@@ -0,0 +1,58 @@
+"""Job queue API: inspect queued side effects and retry dead-lettered ones."""
+
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import func, select
+
+from server.db import DbDep
+from server.models import Job
+from server.schemas import JobOut
+
+router = APIRouter()
+
+
+@router.get("", response_model=list[JobOut])
+def list_jobs(
+    db: DbDep,
+    status: str | None = Query(default=None),
+    kind: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """Newest jobs first, optionally filtered by status and kind."""
+    stmt = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    if status:
+        stmt = stmt.where(Job.status == status)
+    if kind:
+        stmt = stmt.where(Job.kind == kind)
+    return db.scalars(stmt).all()
+
+
+@router.get("/stats")
+def job_stats(db: DbDep):
+    """Job counts by kind and status: {kind: {status: count}}."""
+    rows = db.execute(select(Job.kind, Job.status, func.count()).group_by(Job.kind, Job.status))
+    stats: dict[str, dict[str, int]] = {}
+    for kind, status, count in rows:
+        stats.setdefault(kind, {})[status] = count
+    return stats
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(job_id: str, db: DbDep):
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/{job_id}/retry", response_model=JobOut)
+def retry(job_id: str, db: DbDep):
+    """Run a dead or backing-off job again now, with a fresh attempt budget."""
+    from server.job_queue import retry_job
+
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        return retry_job(db, job)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -5,15 +5,15 @@ import json
 import uuid
 from datetime import datetime, timezone
 from threading import Thread
-from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, sessionmaker
 
 from server import log_store
-from server.models import AppConfig
+from server.db import DbDep, get_session_factory
+from server.models import AppConfig, PipelineRun
 from server.pipeline_service import run_pipeline
+from server.schemas import PipelineRunOut
 from server.sse import create_run, event_stream, remove_run
 
 router = APIRouter()
@@ -24,28 +24,13 @@ _DECISION_TREE_KEY = "__decision_tree_json__"
 FIXTURE_DIR = "tests/fixtures/emails"
 
 
-def get_db():
-    from server.db import get_engine
-    from server.main import DB_URL
-
-    engine = get_engine(DB_URL)
-    s = sessionmaker(bind=engine)()
-    try:
-        yield s
-    finally:
-        s.close()
-
-
-DbDep = Annotated[Session, Depends(get_db)]
-
-
 @router.get("/status")
 def pipeline_status():
     return _status
 
 
 @router.post("/run")
-async def pipeline_run(db: DbDep, fixture: bool = Query(default=False)):
+async def pipeline_run(request: Request, db: DbDep, fixture: bool = Query(default=False)):
     run_id = str(uuid.uuid4())
     _status["status"] = "running"
     _status["run_id"] = run_id
@@ -71,6 +56,9 @@ async def pipeline_run(db: DbDep, fixture: bool = Query(default=False)):
             fixture_messages = []
 
     loop = asyncio.get_running_loop()
+    # The request-scoped session is closed once the response is sent, so the
+    # background run takes its own session from the shared pool.
+    session_factory = get_session_factory(request.app)
 
     def _log(msg: str) -> None:
         from server import log_store
@@ -78,15 +66,18 @@ async def pipeline_run(db: DbDep, fixture: bool = Query(default=False)):
         loop.call_soon_threadsafe(queue.put_nowait, msg)
 
     def _run() -> None:
+        session = session_factory()
         try:
             run_pipeline(
-                db,
+                session,
                 decision_tree=decision_tree,
                 auto_send=auto_send,
                 log=_log,
                 fixture_messages=fixture_messages,
+                run_id=run_id,
             )
         finally:
+            session.close()
             loop.call_soon_threadsafe(queue.put_nowait, None)
             _status["status"] = "idle"
             _status["last_run_at"] = datetime.now(timezone.utc).isoformat()
@@ -97,6 +88,29 @@ async def pipeline_run(db: DbDep, fixture: bool = Query(default=False)):
     return {"run_id": run_id}
 
 
+@router.get("/runs", response_model=list[PipelineRunOut])
+def list_pipeline_runs(db: DbDep, limit: int = Query(default=20, ge=1, le=200)):
+    """Recent runs, newest first, with their commit cursor."""
+    return db.query(PipelineRun).order_by(PipelineRun.started_at.desc()).limit(limit).all()
+
+
+@router.get("/http-metrics")
+def pipeline_http_metrics():
+    """Per-host request counts and latency of the shared outbound HTTP client."""
+    from src.itselectric.http_client import get_client
+
+    client = get_client()
+    return {"http2": client.http2, "hosts": client.metrics()}
+
+
+@router.get("/sheets-metrics")
+def pipeline_sheets_metrics(db: DbDep):
+    """Buffered Sheets appends: rows waiting, age of the oldest, and flush counters."""
+    from server.sheets_outbox import outbox_metrics
+
+    return outbox_metrics(db)
+
+
 @router.get("/stream/{run_id}")
 async def pipeline_stream(run_id: str):
     return StreamingResponse(event_stream(run_id), media_type="text/event-stream")
@@ -1,34 +1,18 @@
 """Email templates CRUD API."""
 
 from datetime import datetime, timezone
-from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, sessionmaker
 
+from server.db import DbDep
 from server.models import Template
 from server.schemas import TemplateIn, TemplateOut
 
 router = APIRouter()
 
 
-def get_db():
-    from server.db import get_engine
-    from server.main import DB_URL
-
-    engine = get_engine(DB_URL)
-    s = sessionmaker(bind=engine)()
-    try:
-        yield s
-    finally:
-        s.close()
-
-
-DbDep = Annotated[Session, Depends(get_db)]
-
-
 class PreviewIn(BaseModel):
     body_md: str
 
@@ -68,7 +68,51 @@ class ConfigOut(BaseModel):
     data: dict[str, Any]
 
 
+class PipelineRunOut(BaseModel):
+    id: str
+    label: str
+    source: str
+    status: str
+    started_at: datetime
+    finished_at: datetime | None
+    total: int
+    cursor: int
+    processed: int
+    resumed_from: str | None
+    error: str | None
+
+    model_config = {"from_attributes": True}
+
+
 class PipelineStatusOut(BaseModel):
     status: str
     last_run_at: datetime | None
     run_id: str | None
+
+
+class GeocodeFailureOut(BaseModel):
+    address: str
+    reason: str
+    attempts: int
+    first_failed_at: datetime
+    last_failed_at: datetime
+    expires_at: datetime
+    expired: bool
+
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    payload: str
+    idempotency_key: str | None
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    locked_until: datetime | None
+    locked_by: str | None
+    last_error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
@@ -5,7 +5,10 @@ import json
 from pathlib import Path
 
 import yaml  # type: ignore
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
+from src.itselectric.decision_tree import child_nodes
+from src.itselectric.geo import canonicalize_address
 
 from server.models import AppConfig, Charger, GeoCache, Template
 
@@ -57,17 +60,43 @@ def seed_geocache(session: Session, json_path: str) -> int:
             cache = json.load(f)
     except FileNotFoundError:
         return 0
+    # Runs on every startup, so check existing keys in one query, not one per address.
+    existing = {a for (a,) in session.query(GeoCache.address)}
     count = 0
     for address, coords in cache.items():
-        if session.query(GeoCache).filter_by(address=address).first():
+        key = canonicalize_address(address)
+        if not key or key in existing:
             continue
         lat, lon = coords[0], coords[1]
-        session.add(GeoCache(address=address, lat=lat, lon=lon))
+        session.add(GeoCache(address=key, lat=lat, lon=lon))
+        existing.add(key)
         count += 1
     session.flush()
     return count
 
 
+def rekey_geocache(session: Session) -> int:
+    """Re-key geocache rows to canonicalize_address() form, merging duplicates.
+    The first row seen for a key wins. Idempotent; returns rows re-keyed or removed."""
+    rows = session.query(GeoCache.address).all()
+    taken = {a for (a,) in rows if canonicalize_address(a) == a}
+    changed = 0
+    for (address,) in rows:
+        key = canonicalize_address(address)
+        if key == address:
+            continue
+        if key in taken or not key:
+            session.execute(delete(GeoCache).where(GeoCache.address == address))
+        else:
+            session.execute(
+                update(GeoCache).where(GeoCache.address == address).values(address=key)
+            )
+            taken.add(key)
+        changed += 1
+    session.flush()
+    return changed
+
+
 def seed_config(session: Session, config: dict) -> None:
     """Write config key-value pairs into app_config. Does not overwrite existing keys."""
     for key, value in config.items():
@@ -83,9 +112,8 @@ def _collect_template_names(node: dict) -> set[str]:
         name = node["template"]
         return {name} if name else set()
     names: set[str] = set()
-    for branch in ("then", "else"):
-        if branch in node:
-            names |= _collect_template_names(node[branch])
+    for child in child_nodes(node):
+        names |= _collect_template_names(child)
     return names
 
 
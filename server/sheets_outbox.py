@@ -0,0 +1,220 @@
+"""Buffered Google Sheets appends.
+
+Sent emails add their row to the sheets_outbox table instead of calling the
+Sheets API. A sheets_flush job (see server.job_queue) then appends everything
+pending in one values.append per sheet: it is queued with a delay of
+sheets_flush_seconds whenever a row arrives and no flush is queued, and at
+once whenever sheets_flush_rows rows are waiting. Whether each sheet has its header row is
+remembered after the first flush, so later flushes skip the header GET.
+Given a SheetHashIndex, a flush first syncs it (reading only rows appended
+since the last sync) and drops rows already on the sheet, so a retried flush
+does not add a duplicate row. Rows buffered with a dedup_key (sent emails use
+their OutboundEmail id) are matched by row and key, so a second email to the
+same contact still gets its own row.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Sequence
+from datetime import datetime, timezone
+
+from google.oauth2.credentials import Credentials
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from src.itselectric.sheets import SheetHashIndex, append_rows, row_hash, sync_sheet_index
+
+from server.job_queue import enqueue
+from server.models import AppConfig, Job, SheetsOutboxRow
+
+DEFAULT_FLUSH_ROWS = 50
+DEFAULT_FLUSH_SECONDS = 60
+DEFAULT_CONTENT_LIMIT = 5000
+
+# AppConfig key holding ["<spreadsheet_id>/<sheet>", ...] known to have a header row.
+_SHEETS_HEADERS_KEY = "__sheets_headers__"
+
+# One flush at a time, so two workers never append the same pending rows.
+_flush_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics: dict = {
+    "flushes": 0,
+    "rows_flushed": 0,
+    "rows_deduplicated": 0,
+    "errors": 0,
+    "last_flush_at": None,
+    "last_flush_rows": 0,
+    "last_flush_ms": None,
+    "last_error": None,
+}
+
+
+def _int_config(session: Session, key: str, default: int) -> int:
+    row = session.get(AppConfig, key)
+    try:
+        return max(1, int(row.value)) if row and row.value else default
+    except ValueError:
+        return default
+
+
+def pending_rows(session: Session) -> int:
+    return session.scalar(select(func.count()).select_from(SheetsOutboxRow)) or 0
+
+
+def buffer_row(
+    session: Session,
+    spreadsheet_id: str,
+    sheet: str,
+    row: Sequence,
+    dedup_key: str | None = None,
+) -> None:
+    """
+    Add a row to the outbox and make sure a flush will pick it up: a delayed
+    one unless a flush is already queued (one running now may have read the
+    outbox before this row), and one at once if this row fills a batch.
+    """
+    session.add(SheetsOutboxRow(
+        spreadsheet_id=spreadsheet_id, sheet=sheet, row=json.dumps(row), dedup_key=dedup_key,
+    ))
+    session.flush()
+    pending = pending_rows(session)
+    if not _flush_queued(session):
+        delay = _int_config(session, "sheets_flush_seconds", DEFAULT_FLUSH_SECONDS)
+        enqueue(session, "sheets_flush", {}, delay=delay)
+    if pending % _int_config(session, "sheets_flush_rows", DEFAULT_FLUSH_ROWS) == 0:
+        enqueue(session, "sheets_flush", {})
+
+
+def _flush_queued(session: Session) -> bool:
+    return session.scalar(
+        select(Job.id).where(Job.kind == "sheets_flush", Job.status == "queued").limit(1)
+    ) is not None
+
+
+def _known_headers(session: Session) -> set[str]:
+    row = session.get(AppConfig, _SHEETS_HEADERS_KEY)
+    try:
+        return set(json.loads(row.value)) if row else set()
+    except ValueError:
+        return set()
+
+
+def _save_headers(session: Session, headers: set[str]) -> None:
+    value = json.dumps(sorted(headers))
+    row = session.get(AppConfig, _SHEETS_HEADERS_KEY)
+    if row:
+        row.value = value
+    else:
+        session.add(AppConfig(key=_SHEETS_HEADERS_KEY, value=value))
+
+
+def _new_rows(
+    creds: Credentials,
+    spreadsheet_id: str,
+    sheet: str,
+    items: list[SheetsOutboxRow],
+    content_limit: int,
+    index: SheetHashIndex,
+) -> tuple[list[tuple], list[str]]:
+    """
+    The rows of items not already on the sheet or repeated earlier in items,
+    plus the keyed hashes among them, to record in the index once appended.
+    """
+    sync_sheet_index(creds, spreadsheet_id, sheet, content_limit, index)
+    rows = [tuple(json.loads(item.row)) for item in items]
+    hashes = [row_hash(list(r), content_limit, item.dedup_key) for r, item in zip(rows, items)]
+    missing = index.missing(spreadsheet_id, sheet, hashes)
+    new, keyed = [], []
+    for r, h, item in zip(rows, hashes, items):
+        if h in missing:
+            missing.discard(h)
+            new.append(r)
+            if item.dedup_key:
+                keyed.append(h)
+    return new, keyed
+
+
+def flush_outbox(
+    session: Session,
+    creds: Credentials,
+    index: SheetHashIndex | None = None,
+) -> int:
+    """
+    Append every pending row, one values.append per sheet, and return how many
+    were taken off the outbox. Each sheet's rows are deleted in the commit
+    after its append, so a failure on one sheet leaves the rest pending for
+    the retried job. With an index, rows already on the sheet are skipped.
+    """
+    content_limit = _int_config(session, "content_limit", DEFAULT_CONTENT_LIMIT)
+    with _flush_lock:
+        start = time.perf_counter()
+        pending = session.scalars(select(SheetsOutboxRow).order_by(SheetsOutboxRow.id)).all()
+        groups: dict[tuple[str, str], list[SheetsOutboxRow]] = {}
+        for item in pending:
+            groups.setdefault((item.spreadsheet_id, item.sheet), []).append(item)
+
+        headers = _known_headers(session)
+        flushed = duplicates = 0
+        try:
+            for (spreadsheet_id, sheet), items in groups.items():
+                key = f"{spreadsheet_id}/{sheet}"
+                keyed: list[str] = []
+                if index is not None:
+                    rows, keyed = _new_rows(
+                        creds, spreadsheet_id, sheet, items, content_limit, index
+                    )
+                else:
+                    rows = [tuple(json.loads(item.row)) for item in items]
+                if rows:
+                    append_rows(
+                        creds,
+                        spreadsheet_id,
+                        sheet,
+                        rows,
+                        content_limit,
+                        has_header=True if key in headers else None,
+                    )
+                if keyed:
+                    index.add(spreadsheet_id, sheet, keyed)
+                for item in items:
+                    session.delete(item)
+                if rows and key not in headers:
+                    headers.add(key)
+                    _save_headers(session, headers)
+                session.commit()
+                flushed += len(items)
+                duplicates += len(items) - len(rows)
+        except Exception as e:
+            with _metrics_lock:
+                _metrics["errors"] += 1
+                _metrics["last_error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if flushed:
+                with _metrics_lock:
+                    _metrics["flushes"] += 1
+                    _metrics["rows_flushed"] += flushed - duplicates
+                    _metrics["rows_deduplicated"] += duplicates
+                    _metrics["last_flush_at"] = datetime.now(timezone.utc).isoformat()
+                    _metrics["last_flush_rows"] = flushed
+                    _metrics["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return flushed
+
+
+def outbox_metrics(session: Session) -> dict:
+    """
+    Flush counters for this process plus the outbox backlog: pending_rows and
+    lag_seconds, the age of the oldest row still waiting.
+    """
+    count, oldest = session.execute(
+        select(func.count(), func.min(SheetsOutboxRow.created_at))
+    ).one()
+    lag = None
+    if oldest is not None:
+        if oldest.tzinfo is None:  # SQLite returns naive UTC
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        lag = round((datetime.now(timezone.utc) - oldest).total_seconds(), 1)
+    with _metrics_lock:
+        return {**_metrics, "pending_rows": count, "lag_seconds": lag}
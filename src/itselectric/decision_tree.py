@@ -1,14 +1,31 @@
 """Decision tree evaluator for email routing.
 
-A tree is a nested dict loaded from YAML. Each node is either:
-  - A leaf:   {"template": <str | None>}
-  - A branch: {"condition": {"field": str, "op": str, "value": any},
-               "then": <node>, "else": <node>}
+A tree is a nested dict loaded from YAML. Each node is one of:
+  - A leaf:     {"template": <str | None>}
+  - A branch:   {"condition": {"field": str, "op": str, "value": any},
+                 "then": <node>, "else": <node>}
+  - A dispatch: {"dispatch": {"field": str, "cases": {<value>: <node>, ...},
+                              "default": <node>}}
+    Picks the case whose key equals the field value (case-insensitive),
+    else default. One hash lookup however many states or cities are listed.
+  - A range:    {"range": {"field": str, "thresholds": [t0, t1, ...],
+                           "branches": [<node>, ...]}}
+    thresholds ascend strictly and there is one more branch than threshold:
+    branches[i] is taken for the first ti the value is <= to (the last
+    branch above every threshold), found by bisection.
 
 evaluate() walks the tree and returns the template name at the matching leaf,
-or None if the leaf has a null template.
+or None if the leaf has a null template. compile_tree() validates a tree once
+and returns an equivalent callable for routing many contexts against it.
 """
 
+import json
+from bisect import bisect_left
+from collections.abc import Callable
+from functools import lru_cache
+
+Evaluator = Callable[[dict], str | None]
+
 
 def _normalize(v):
     """Lowercase strings for case-insensitive comparison; pass numbers through."""
@@ -26,12 +43,32 @@ _OPS = {
 }
 
 
+def child_nodes(node: dict) -> list[dict]:
+    """The direct subtrees of any node type (empty for a leaf)."""
+    if "template" in node:
+        return []
+    if "dispatch" in node:
+        spec = node["dispatch"]
+        return [*spec.get("cases", {}).values(), *([spec["default"]] if "default" in spec else [])]
+    if "range" in node:
+        return list(node["range"].get("branches", []))
+    return [node[branch] for branch in ("then", "else") if branch in node]
+
+
+def _dispatch_case(spec: dict, actual) -> dict:
+    key = _normalize(actual)
+    for case, subtree in spec["cases"].items():
+        if _normalize(case) == key:
+            return subtree
+    return spec["default"]
+
+
 def evaluate(node: dict, context: dict) -> str | None:
     """
     Walk the decision tree, evaluating conditions against context.
 
     Args:
-        node: A branch or leaf dict (see module docstring for schema).
+        node: Any node dict (see module docstring for schema).
         context: A flat dict with keys like distance_miles, driver_state,
                  charger_state, charger_city.
 
@@ -44,6 +81,13 @@ def evaluate(node: dict, context: dict) -> str | None:
     """
     if "template" in node:
         return node["template"]
+    if "dispatch" in node:
+        spec = node["dispatch"]
+        return evaluate(_dispatch_case(spec, context[spec["field"]]), context)
+    if "range" in node:
+        spec = node["range"]
+        index = bisect_left(spec["thresholds"], context[spec["field"]])
+        return evaluate(spec["branches"][index], context)
 
     cond = node["condition"]
     field = cond["field"]
@@ -56,3 +100,142 @@ def evaluate(node: dict, context: dict) -> str | None:
     actual = context[field]  # raises KeyError if field is absent
     branch = "then" if _OPS[op](actual, value) else "else"
     return evaluate(node[branch], context)
+
+
+def _compile_test(op: str, value) -> Callable:
+    """Predicate on the context value for one condition, operands pre-normalised."""
+    if op in ("lt", "lte", "gt", "gte"):
+        compare = {
+            "lt": lambda a: a < value,
+            "lte": lambda a: a <= value,
+            "gt": lambda a: a > value,
+            "gte": lambda a: a >= value,
+        }
+        return compare[op]
+    if op == "in":
+        try:
+            members = [_normalize(x) for x in value]
+        except TypeError:
+            raise ValueError(f"The 'in' operator needs a list of values, got {value!r}") from None
+    else:
+        members = [_normalize(value)]
+    try:
+        members = frozenset(members)
+    except TypeError:  # unhashable operand (e.g. a nested list): fall back to a scan
+        pass
+    if op == "ne":
+        return lambda a: _normalize(a) not in members
+    return lambda a: _normalize(a) in members
+
+
+def _compile_dispatch(spec: dict) -> Evaluator:
+    try:
+        field, cases, default = spec["field"], spec["cases"], spec["default"]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed dispatch node, missing {e}: {spec!r}") from None
+    if not isinstance(cases, dict):
+        raise ValueError(f"Dispatch cases must be a mapping: {cases!r}")
+    table: dict = {}
+    for case, subtree in cases.items():
+        key = _normalize(case)
+        if key in table:
+            raise ValueError(f"Duplicate dispatch case {case!r} for field {field!r}")
+        table[key] = _compile(subtree)
+    otherwise = _compile(default)
+
+    def dispatch(context: dict) -> str | None:
+        try:
+            branch = table.get(_normalize(context[field]), otherwise)
+        except TypeError:  # unhashable value can't match a case
+            branch = otherwise
+        return branch(context)
+
+    return dispatch
+
+
+def _compile_range(spec: dict) -> Evaluator:
+    try:
+        field, thresholds, branches = spec["field"], spec["thresholds"], spec["branches"]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed range node, missing {e}: {spec!r}") from None
+    if not thresholds or any(type(t) not in (int, float) for t in thresholds):
+        raise ValueError(f"Range thresholds must be a non-empty list of numbers: {thresholds!r}")
+    if any(a >= b for a, b in zip(thresholds, thresholds[1:])):
+        raise ValueError(f"Range thresholds must ascend strictly: {thresholds!r}")
+    if len(branches) != len(thresholds) + 1:
+        raise ValueError(
+            f"Range on {field!r} needs {len(thresholds) + 1} branches, got {len(branches)}"
+        )
+    bounds = list(thresholds)
+    compiled = [_compile(b) for b in branches]
+
+    def in_range(context: dict) -> str | None:
+        actual = context[field]
+        try:
+            index = bisect_left(bounds, actual)
+        except TypeError:  # e.g. a range over a string field
+            raise ValueError(f"Range on {field!r} needs a number, got {actual!r}") from None
+        return compiled[index](context)
+
+    return in_range
+
+
+def _compile(node: dict) -> Evaluator:
+    if not isinstance(node, dict):
+        raise ValueError(f"Tree node must be a mapping: {node!r}")
+    if "template" in node:
+        template = node["template"]
+        return lambda context: template
+    if "dispatch" in node:
+        return _compile_dispatch(node["dispatch"])
+    if "range" in node:
+        return _compile_range(node["range"])
+
+    try:
+        cond = node["condition"]
+        field, op, value = cond["field"], cond["op"], cond["value"]
+        then_node, else_node = node["then"], node["else"]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed branch node, missing {e}: {node!r}") from None
+    if op not in _OPS:
+        raise ValueError(f"Unknown operator: {op!r}. Valid ops: {sorted(_OPS)}")
+
+    test = _compile_test(op, value)
+    then_, else_ = _compile(then_node), _compile(else_node)
+
+    def branch(context: dict) -> str | None:
+        actual = context[field]  # raises KeyError if field is absent, as evaluate() does
+        try:
+            passed = test(actual)
+        except TypeError:  # e.g. lt against a string field
+            raise ValueError(f"Cannot apply {op!r} {value!r} to {field!r} = {actual!r}") from None
+        return then_(context) if passed else else_(context)
+
+    return branch
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(tree_json: str) -> Evaluator:
+    return _compile(json.loads(tree_json))
+
+
+def compile_tree(node: dict) -> Evaluator:
+    """
+    Validate a decision tree once and return a callable equivalent to
+    evaluate(node, context).
+
+    Every branch is checked up front, not just the ones a given context
+    reaches. Operands for eq/ne/in are normalised into frozensets at compile
+    time, dispatch cases become a dict and range thresholds a sorted list, and
+    each node becomes a closure, so routing a context costs one hash lookup,
+    comparison or bisection per level. Compiled trees are cached by their
+    canonical JSON, so recompiling an unchanged tree is a cache hit.
+
+    Raises:
+        ValueError: If an operator is unrecognised or a node is malformed
+            (including unsorted range thresholds or duplicate dispatch cases).
+        The returned callable raises KeyError if a context field is missing,
+        and ValueError if a field's value cannot be compared with its
+        operand (e.g. a range over driver_state).
+    """
+    return _compile_cached(json.dumps(node, sort_keys=True))
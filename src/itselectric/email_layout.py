@@ -1,4 +1,18 @@
-"""Branded email wrapper: converts Markdown body to full HTML email."""
+"""Branded email wrapper: converts Markdown body to full HTML email.
+
+Templates are compiled once per (name, updated_at): the Markdown is converted
+and wrapped in the layout a single time, leaving {name}-style placeholders as
+slots. Rendering a personalised email is then string joins, with every
+substituted value HTML-escaped, instead of a full Markdown pass per contact.
+"""
+
+import html
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime
 
 import markdown as _md
 
@@ -26,10 +40,7 @@ _PROSE_CSS = """
 """
 
 
-def render_email(body_md: str) -> str:
-    """Convert a Markdown email body to a complete branded HTML email."""
-    body_html = _md.markdown(body_md or "", extensions=["extra"])
-    return f"""\
+_LAYOUT_HEAD = f"""\
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -46,7 +57,9 @@ def render_email(body_md: str) -> str:
                     box-shadow:0 1px 4px rgba(0,0,0,0.08);">
         <tr>
           <td style="{_BODY_STYLES}">
-            <div class="prose">{body_html}</div>
+            <div class="prose">"""
+
+_LAYOUT_TAIL = """</div>
           </td>
         </tr>
       </table>
@@ -54,3 +67,98 @@ def render_email(body_md: str) -> str:
   </table>
 </body>
 </html>"""
+
+# One Markdown instance per thread: building one loads every "extra" extension,
+# and an instance is not safe to share between threads.
+_local = threading.local()
+
+
+def _markdown_to_html(body_md: str) -> str:
+    md = getattr(_local, "md", None)
+    if md is None:
+        md = _local.md = _md.Markdown(extensions=["extra"])
+    return md.reset().convert(body_md or "")
+
+
+def render_email(body_md: str) -> str:
+    """Convert a Markdown email body to a complete branded HTML email."""
+    return _LAYOUT_HEAD + _markdown_to_html(body_md) + _LAYOUT_TAIL
+
+
+# {field} placeholders, plus str.format-style {{ and }} escapes for literal braces.
+_PLACEHOLDER_RE = re.compile(r"\{\{|\}\}|\{(\w+)\}")
+
+
+class CompiledEmail:
+    """A template rendered to a full HTML email once, with placeholders as slots."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, body_md: str):
+        # Swap placeholders for opaque tokens so Markdown leaves them alone
+        # (attr_list would otherwise read "# Hi {name}" as an attribute).
+        prefix = f"tmplslot{uuid.uuid4().hex}n"
+        slots: list[tuple[str, str | None]] = []  # (literal text, field)
+
+        def _token(m: re.Match) -> str:
+            field = m.group(1)
+            slots.append(("", field) if field else (m.group(0)[0], None))
+            return f"{prefix}{len(slots) - 1}e"
+
+        tokenised = _PLACEHOLDER_RE.sub(_token, body_md or "")
+        pieces = re.split(f"{prefix}(\\d+)e", render_email(tokenised))
+        parts: list[tuple[str, str | None]] = []
+        for i in range(0, len(pieces), 2):
+            literal, field = pieces[i], None
+            if i + 1 < len(pieces):
+                slot_literal, field = slots[int(pieces[i + 1])]
+                literal += slot_literal
+            parts.append((literal, field))
+        self._parts = tuple(parts)
+
+    def render(self, variables: Mapping[str, object]) -> str:
+        """Fill placeholders with HTML-escaped values; unknown ones are left as {field}."""
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field is not None:
+                if field in variables:
+                    out.append(html.escape(str(variables[field])))
+                else:
+                    out.append(f"{{{field}}}")
+        return "".join(out)
+
+
+_CACHE_SIZE = 256
+_cache: OrderedDict[tuple[str, datetime | None], CompiledEmail] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compiled_template(name: str, updated_at: datetime | None, body_md: str) -> CompiledEmail:
+    """
+    The CompiledEmail for a template, compiled on first use and cached by
+    (name, updated_at). Saving a template bumps updated_at, so edits get a
+    fresh entry and the stale one ages out of the LRU.
+    """
+    key = (name, updated_at)
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+    compiled = CompiledEmail(body_md)
+    with _cache_lock:
+        _cache[key] = compiled
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compiled
+
+
+def render_template(
+    name: str,
+    updated_at: datetime | None,
+    body_md: str,
+    variables: Mapping[str, object],
+) -> str:
+    """Personalised branded HTML for a stored template (see compiled_template)."""
+    return compiled_template(name, updated_at, body_md).render(variables)
@@ -2,16 +2,53 @@
 
 import csv
 import json
+import math
 import re
+import sqlite3
+import threading
+import time
 from functools import cache
 from pathlib import Path
 
+import httpx
+import numpy as np
+from geopy.adapters import AdapterHTTPError, BaseSyncAdapter  # type: ignore
 from geopy.distance import geodesic  # type: ignore
-from geopy.extra.rate_limiter import RateLimiter  # type: ignore
+from geopy.exc import (  # type: ignore
+    GeocoderParseError,
+    GeocoderTimedOut,
+    GeocoderUnavailable,
+    GeopyError,
+)
 from geopy.geocoders import Nominatim  # type: ignore
 
+from .http_client import get_client
+from .stages import Throttle
+
 DEFAULT_CHARGERS_CSV = Path(__file__).parent / "data" / "chargers.csv"
 
+# Mean Earth radius (IUGG) used for great-circle approximations.
+EARTH_RADIUS_MILES = 3958.7613
+
+# Upper bound on the relative difference between WGS-84 geodesic distance and
+# great-circle distance on the mean-radius sphere (true worst case is ~0.56%).
+# Used to decide which index candidates might still be the geodesic nearest.
+_GREAT_CIRCLE_REL_ERROR = 0.01
+
+# Reason codes for remembered (negative-cached) geocode failures.
+GEOCODE_NOT_FOUND = "not_found"  # geocoder answered, but has no match
+GEOCODE_SERVICE_ERROR = "service_error"  # timeout / HTTP error after retries
+
+# How long a not_found address is remembered before the geocoder is asked again.
+DEFAULT_NEGATIVE_TTL_SECONDS = 7 * 24 * 3600
+# Service errors are usually transient, so they are only remembered briefly.
+SERVICE_ERROR_TTL_SECONDS = 3600
+
+
+def negative_ttl_for(reason: str, ttl: float) -> float:
+    """Effective negative-cache TTL in seconds for a failure reason."""
+    return ttl if reason == GEOCODE_NOT_FOUND else min(ttl, SERVICE_ERROR_TTL_SECONDS)
+
 # Matches apartment/unit designators that confuse geocoders.
 # Consumes everything after the keyword up to the next comma, so multi-word
 # values like "APT #Stage 11", "APT#Unit 430", "APT # UNIT 6005" are fully stripped.
@@ -104,8 +141,51 @@ def parse_address_components(address: str) -> dict[str, str]:
     return {"street": address, "city": "", "state": "", "zip": ""}
 
 
-_nominatim = Nominatim(user_agent="itselectric-automation/1.0")
-_geocode_fn = RateLimiter(_nominatim.geocode, min_delay_seconds=1)
+# Nominatim's usage policy allows at most 1 request/s. The shared client waits
+# on this before every attempt, so its retries are spaced out as well.
+_NOMINATIM_THROTTLE = Throttle(1.0)
+
+
+class _SharedClientAdapter(BaseSyncAdapter):
+    """geopy adapter sending requests through the shared pooled client (http_client.py)."""
+
+    def get_text(self, url, *, timeout, headers):
+        return self._request(url, timeout=timeout, headers=headers).text
+
+    def get_json(self, url, *, timeout, headers):
+        resp = self._request(url, timeout=timeout, headers=headers)
+        try:
+            return resp.json()
+        except ValueError:
+            raise GeocoderParseError(f"Could not decode JSON:\n{resp.text[:200]}")
+
+    def _request(self, url, *, timeout, headers) -> httpx.Response:
+        try:
+            resp = get_client().get(
+                url, timeout=timeout, headers=headers, throttle=_NOMINATIM_THROTTLE
+            )
+        except httpx.TimeoutException:
+            raise GeocoderTimedOut("Service timed out")
+        except httpx.HTTPError as e:
+            raise GeocoderUnavailable(str(e))
+        if resp.status_code >= 400:
+            # geopy maps the status to GeocoderRateLimited, GeocoderServiceError, ...
+            raise AdapterHTTPError(
+                f"Non-successful status code {resp.status_code}",
+                status_code=resp.status_code,
+                headers=dict(resp.headers),
+                text=resp.text,
+            )
+        return resp
+
+
+_nominatim = Nominatim(
+    user_agent="itselectric-automation/1.0", adapter_factory=_SharedClientAdapter
+)
+# Exceptions propagate so geocode_address can tell a service error apart from
+# "no such address" and only negative-cache the latter. Rate limiting and
+# retries both happen in the adapter's calls to the shared client.
+_geocode_fn = _nominatim.geocode
 
 
 @cache
@@ -156,25 +236,252 @@ def load_chargers(csv_path=DEFAULT_CHARGERS_CSV) -> list[dict]:
     return chargers
 
 
-def find_nearest_charger(lat: float, lon: float, chargers: list[dict]) -> tuple[dict, float] | None:
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in miles on the mean-radius sphere (within ~0.6% of geodesic)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    h = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(h)))
+
+
+def _unit_vector(lat: float, lon: float) -> tuple[float, float, float]:
+    phi, lmb = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lmb), math.cos(phi) * math.sin(lmb), math.sin(phi))
+
+
+def _sq_dist(a: tuple[float, float, float], b: tuple[float, float, float]) -> float:
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+class ChargerIndex:
+    """
+    KD-tree over charger locations as 3-D unit-sphere vectors.
+
+    Straight-line (chord) distance between unit vectors is monotonic in
+    great-circle distance, so the tree finds the great-circle nearest charger
+    in O(log N). Every charger that could still be the *geodesic* nearest —
+    those within the sphere/ellipsoid error bound of the great-circle best —
+    is then re-checked with geopy's exact geodesic, so results match a full
+    linear geodesic scan exactly.
+
+    Build once per charger set and reuse it for every lookup.
+    """
+
+    def __init__(self, chargers: list[dict]):
+        self.chargers = list(chargers)
+        points = [(_unit_vector(c["lat"], c["lon"]), i) for i, c in enumerate(self.chargers)]
+        self._root = self._build(points, 0)
+
+    def __len__(self) -> int:
+        return len(self.chargers)
+
+    @classmethod
+    def _build(cls, points: list, axis: int):
+        # Node layout: (point, index, axis, left, right)
+        if not points:
+            return None
+        points.sort(key=lambda p: p[0][axis])
+        mid = len(points) // 2
+        nxt = (axis + 1) % 3
+        return (
+            points[mid][0],
+            points[mid][1],
+            axis,
+            cls._build(points[:mid], nxt),
+            cls._build(points[mid + 1 :], nxt),
+        )
+
+    def _nearest_sq(self, q: tuple[float, float, float]) -> float:
+        best = math.inf
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            point, _, axis, left, right = node
+            d = _sq_dist(q, point)
+            if d < best:
+                best = d
+            diff = q[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            if diff * diff < best:
+                stack.append(far)
+            stack.append(near)
+        return best
+
+    def _within_sq(self, q: tuple[float, float, float], radius_sq: float) -> list[int]:
+        found: list[int] = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            point, index, axis, left, right = node
+            if _sq_dist(q, point) <= radius_sq:
+                found.append(index)
+            diff = q[axis] - point[axis]
+            if diff <= 0 or diff * diff <= radius_sq:
+                stack.append(left)
+            if diff >= 0 or diff * diff <= radius_sq:
+                stack.append(right)
+        return found
+
+    def candidates(self, lat: float, lon: float) -> list[int]:
+        """
+        Indices of every charger that may be the geodesic nearest to (lat, lon).
+
+        A charger at great-circle angle t can only beat the great-circle best t0
+        on the ellipsoid if t <= t0 * (1 + e) / (1 - e), e = _GREAT_CIRCLE_REL_ERROR.
+        """
+        if self._root is None:
+            return []
+        q = _unit_vector(lat, lon)
+        chord = math.sqrt(self._nearest_sq(q))
+        theta = 2 * math.asin(min(1.0, chord / 2))
+        e = _GREAT_CIRCLE_REL_ERROR
+        theta_max = min(math.pi, theta * (1 + e) / (1 - e) + 1e-12)
+        radius = 2 * math.sin(theta_max / 2)
+        return sorted(self._within_sq(q, radius * radius))
+
+    def nearest(self, lat: float, lon: float) -> tuple[dict, float] | None:
+        """Same contract as find_nearest_charger(); None if the index is empty."""
+        best_index = None
+        best_miles = math.inf
+        point = (lat, lon)
+        # candidates() is index-ordered and ties keep the first, like min() over the list.
+        for i in self.candidates(lat, lon):
+            c = self.chargers[i]
+            miles = geodesic(point, (c["lat"], c["lon"])).miles
+            if miles < best_miles:
+                best_index, best_miles = i, miles
+        if best_index is None:
+            return None
+        return self.chargers[best_index], round(best_miles, 2)
+
+
+@cache
+def load_charger_index(csv_path=DEFAULT_CHARGERS_CSV) -> ChargerIndex:
+    """Build (once per process) a ChargerIndex over load_chargers(csv_path)."""
+    return ChargerIndex(load_chargers(csv_path))
+
+
+# Caps the (contacts x chargers) similarity matrix held in memory at once (~32 MB).
+_BATCH_MATRIX_ELEMENTS = 4_000_000
+
+
+def _unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    phi, lmb = np.radians(lats), np.radians(lons)
+    cos_phi = np.cos(phi)
+    return np.stack([cos_phi * np.cos(lmb), cos_phi * np.sin(lmb), np.sin(phi)], axis=1)
+
+
+def haversine_miles_array(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Vectorised haversine_miles(); arguments broadcast like NumPy arrays."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.subtract(lon2, lon1))
+    h = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+
+
+def nearest_chargers_batch(
+    lats,
+    lons,
+    chargers: "list[dict] | ChargerIndex",
+    exact: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
     """
-    Find the closest charger to (lat, lon).
+    Find the nearest charger for many points in one vectorised pass.
+
+    Distances are great-circle (haversine) on the mean-radius sphere, which is
+    within 0.6% of the WGS-84 geodesic distance geopy reports (the worst case,
+    ~0.56%, is for short north-south legs near the equator). With exact=True
+    every charger inside that error bound of the great-circle best is re-checked
+    with geodesic, so indices and distances match find_nearest_charger().
+
+    Args:
+        lats: Sequence or array of query latitudes.
+        lons: Sequence or array of query longitudes, same length as lats.
+        chargers: A ChargerIndex or a list of charger dicts with lat/lon keys.
+        exact: Refine with geodesic to reproduce find_nearest_charger() exactly.
+
+    Returns:
+        (indices, distances_miles): int64 indices into the charger list and
+        float64 distances rounded to 2 decimal places, one per query point.
+
+    Raises:
+        ValueError: If there are no chargers or lats/lons differ in length.
+    """
+    charger_list = chargers.chargers if isinstance(chargers, ChargerIndex) else chargers
+    if not charger_list:
+        raise ValueError("No chargers to search")
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    if lats.shape != lons.shape:
+        raise ValueError("lats and lons must have the same length")
+
+    c_lats = np.array([c["lat"] for c in charger_list], dtype=float)
+    c_lons = np.array([c["lon"] for c in charger_list], dtype=float)
+    c_vecs = _unit_vectors(c_lats, c_lons)
+    q_vecs = _unit_vectors(lats, lons)
+
+    indices = np.empty(len(lats), dtype=np.int64)
+    refine: list[tuple[int, np.ndarray]] = []
+    e = _GREAT_CIRCLE_REL_ERROR
+    chunk = max(1, _BATCH_MATRIX_ELEMENTS // len(charger_list))
+    for start in range(0, len(lats), chunk):
+        # Max dot product of unit vectors == min great-circle angle.
+        dots = q_vecs[start : start + chunk] @ c_vecs.T
+        best = np.argmax(dots, axis=1)
+        indices[start : start + chunk] = best
+        if exact:
+            theta = np.arccos(np.clip(dots[np.arange(len(best)), best], -1.0, 1.0))
+            min_cos = np.cos(np.minimum(np.pi, theta * (1 + e) / (1 - e) + 1e-12))
+            rows, cols = np.nonzero(dots >= min_cos[:, None])
+            for row in np.flatnonzero(np.bincount(rows, minlength=len(best)) > 1):
+                refine.append((start + row, np.sort(cols[rows == row])))
+
+    if not exact:
+        distances = haversine_miles_array(lats, lons, c_lats[indices], c_lons[indices])
+        return indices, np.round(distances, 2)
+
+    for row, cols in refine:
+        point = (lats[row], lons[row])
+        miles = [geodesic(point, (c_lats[c], c_lons[c])).miles for c in cols]
+        indices[row] = cols[int(np.argmin(miles))]
+    # Python round() rather than np.round so 2-dp values match find_nearest_charger().
+    distances = np.array(
+        [
+            round(geodesic((lat, lon), (c_lats[i], c_lons[i])).miles, 2)
+            for lat, lon, i in zip(lats, lons, indices)
+        ]
+    )
+    return indices, distances
+
+
+def find_nearest_charger(
+    lat: float, lon: float, chargers: "list[dict] | ChargerIndex"
+) -> tuple[dict, float] | None:
+    """
+    Find the closest charger to (lat, lon) by geodesic distance.
 
     Args:
         lat: Latitude of the query point.
         lon: Longitude of the query point.
-        chargers: List of charger dicts, each with keys lat, lon, name, city, state.
+        chargers: A prebuilt ChargerIndex, or a list of charger dicts (each with
+            keys lat, lon, name, city, state). Passing a list builds a throwaway
+            index; callers doing many lookups should build a ChargerIndex once.
 
     Returns:
         A (charger_dict, distance_miles) tuple with distance rounded to 2 decimal
-        places, or None if the chargers list is empty.
+        places, or None if there are no chargers.
     """
-    if not chargers:
-        return None
-    point = (lat, lon)
-    nearest = min(chargers, key=lambda c: geodesic(point, (c["lat"], c["lon"])).miles)
-    distance = round(geodesic(point, (nearest["lat"], nearest["lon"])).miles, 2)
-    return nearest, distance
+    if not isinstance(chargers, ChargerIndex):
+        if not chargers:
+            return None
+        chargers = ChargerIndex(chargers)
+    return chargers.nearest(lat, lon)
 
 
 def _strip_unit(address: str) -> str:
@@ -182,22 +489,282 @@ def _strip_unit(address: str) -> str:
     return _UNIT_RE.sub("", address).strip().strip(",").strip()
 
 
+# USPS Publication 28 street suffix abbreviations (common spellings → standard).
+_USPS_SUFFIXES: dict[str, str] = {
+    "ALLEY": "ALY", "ALLY": "ALY", "AVENUE": "AVE", "AV": "AVE", "AVEN": "AVE", "AVN": "AVE",
+    "BOULEVARD": "BLVD", "BOUL": "BLVD", "BOULV": "BLVD", "CIRCLE": "CIR", "CIRC": "CIR",
+    "COURT": "CT", "CRESCENT": "CRES", "DRIVE": "DR", "DRV": "DR", "EXPRESSWAY": "EXPY",
+    "EXPRESS": "EXPY", "FREEWAY": "FWY", "HIGHWAY": "HWY", "HIWAY": "HWY", "LANE": "LN",
+    "PARKWAY": "PKWY", "PARKWY": "PKWY", "PKY": "PKWY", "PLACE": "PL", "PLAZA": "PLZ",
+    "ROAD": "RD", "ROUTE": "RTE", "SQUARE": "SQ", "SQR": "SQ", "STREET": "ST", "STR": "ST",
+    "STRT": "ST", "TERRACE": "TER", "TERR": "TER", "TRAIL": "TRL", "TURNPIKE": "TPKE",
+    "TURNPK": "TPKE",
+}
+
+_DIRECTIONALS: dict[str, str] = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+}
+
+_CANONICAL_TOKENS = {**_USPS_SUFFIXES, **_DIRECTIONALS}
+
+# A whole comma-separated segment that is a unit ("APT #Stage 11"), or a unit
+# designator plus its one-token value inside a segment ("... St Apt 5 Brooklyn").
+_UNIT_SEGMENT_RE = re.compile(r"^\s*(?:apt|apartment|suite|ste|unit|unt)\b", re.IGNORECASE)
+_UNIT_INLINE_RE = re.compile(
+    r"\s*\b(?:apt|apartment|suite|ste|unit|unt)\.?\s*#?\s*[^\s,]+", re.IGNORECASE
+)
+_ZIP4_RE = re.compile(r"\b(\d{5})-\d{4}\b")
+_TRAILING_ZIP_RE = re.compile(r"\s*\d{5}\s*$")
+_DROP_CHARS_RE = re.compile(r"[.'’]")
+_SEPARATOR_CHARS_RE = re.compile(r"[,#;:()]")
+
+
+def canonicalize_address(address: str | None) -> str:
+    """
+    Reduce an address to a canonical cache key.
+
+    Variants of the same address — "15 Washington St., Brooklyn, NY 11205-1234"
+    and "15 washington street brooklyn ny 11205" — map to one key
+    ("15 WASHINGTON ST BROOKLYN NY 11205"). Handles case, punctuation,
+    whitespace, unit designators, ZIP+4, a trailing full state name, and USPS
+    street suffix / directional abbreviations.
+
+    The key is only for cache lookups; geocoders still get the
+    human-readable _strip_unit() form.
+    """
+    if not address:
+        return ""
+
+    segments = [seg for seg in address.split(",") if not _UNIT_SEGMENT_RE.match(seg)]
+    segments = [_UNIT_INLINE_RE.sub("", seg) for seg in segments]
+    segments = [seg.strip() for seg in segments if seg.strip()]
+    if not segments:
+        return ""
+
+    # "…, Massachusetts 02108" → "…, MA 02108"
+    last = segments[-1]
+    zip_match = _TRAILING_ZIP_RE.search(last)
+    state_part = last[: zip_match.start()] if zip_match else last
+    abbrev = _STATE_NAME_TO_ABBREV.get(state_part.strip().lower())
+    if abbrev:
+        segments[-1] = abbrev + (last[zip_match.start() :] if zip_match else "")
+
+    text = _ZIP4_RE.sub(r"\1", ", ".join(segments)).upper()
+    text = _SEPARATOR_CHARS_RE.sub(" ", _DROP_CHARS_RE.sub("", text))
+    return " ".join(_CANONICAL_TOKENS.get(tok, tok) for tok in text.split())
+
+
+class GeocodeCache:
+    """
+    SQLite-backed address → (lat, lon) cache.
+
+    A lookup is a single primary-key read and a write is a single-row
+    transaction, so cost no longer grows with the size of the cache. The WAL
+    journal plus a busy timeout lets several processes share one file safely.
+
+    Addresses are stored and looked up by canonicalize_address(), so spelling
+    variants of one address share an entry.
+
+    Failed lookups are kept in a separate table with a reason code and are
+    treated as known failures for negative_ttl_for(reason, negative_ttl)
+    seconds; a successful put() clears them.
+    """
+
+    def __init__(self, path: str | Path, negative_ttl: float = DEFAULT_NEGATIVE_TTL_SECONDS):
+        self.path = Path(path)
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocache ("
+            "address TEXT PRIMARY KEY, lat REAL NOT NULL, lon REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_failures ("
+            "address TEXT PRIMARY KEY, reason TEXT NOT NULL, failed_at REAL NOT NULL)"
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM geocache").fetchone()[0]
+
+    def get(self, address: str) -> tuple[float, float] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon FROM geocache WHERE address = ?",
+                (canonicalize_address(address),),
+            ).fetchone()
+        return (float(row[0]), float(row[1])) if row else None
+
+    def put(self, address: str, lat: float, lon: float) -> None:
+        key = canonicalize_address(address)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocache (address, lat, lon) VALUES (?, ?, ?)",
+                (key, lat, lon),
+            )
+            self._conn.execute("DELETE FROM geocode_failures WHERE address = ?", (key,))
+            self._conn.execute("COMMIT")
+
+    def get_failure(self, address: str) -> str | None:
+        """Reason code of an unexpired failed lookup for address, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reason, failed_at FROM geocode_failures WHERE address = ?",
+                (canonicalize_address(address),),
+            ).fetchone()
+        if not row:
+            return None
+        reason, failed_at = row
+        expired = time.time() - failed_at >= negative_ttl_for(reason, self.negative_ttl)
+        return None if expired else reason
+
+    def put_failure(self, address: str, reason: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode_failures (address, reason, failed_at) "
+                "VALUES (?, ?, ?)",
+                (canonicalize_address(address), reason, time.time()),
+            )
+
+    def purge_failures(self, expired_only: bool = False) -> int:
+        """Delete remembered failures (all, or only expired ones). Returns rows deleted."""
+        with self._lock:
+            if not expired_only:
+                return self._conn.execute("DELETE FROM geocode_failures").rowcount
+            now = time.time()
+            rows = self._conn.execute("SELECT address, reason, failed_at FROM geocode_failures")
+            expired = [
+                (a,)
+                for a, reason, failed_at in rows.fetchall()
+                if now - failed_at >= negative_ttl_for(reason, self.negative_ttl)
+            ]
+            self._conn.executemany("DELETE FROM geocode_failures WHERE address = ?", expired)
+            return len(expired)
+
+    def put_many(self, entries: dict[str, tuple[float, float]]) -> int:
+        """Insert entries in one transaction, keeping existing rows. Returns rows added."""
+        with self._lock:
+            before = self._conn.total_changes
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO geocache (address, lat, lon) VALUES (?, ?, ?)",
+                    (
+                        (canonicalize_address(a), float(c[0]), float(c[1]))
+                        for a, c in entries.items()
+                    ),
+                )
+            return self._conn.total_changes - before
+
+    def rekey(self) -> int:
+        """
+        Re-key rows written before canonical keys (or after a normalizer change).
+
+        When several rows collapse to one key, the first (by rowid) is kept.
+        Returns the number of rows re-keyed or merged away.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT address, lat, lon FROM geocache ORDER BY rowid"
+            ).fetchall()
+            merged: dict[str, tuple[float, float]] = {}
+            for address, lat, lon in rows:
+                merged.setdefault(canonicalize_address(address), (lat, lon))
+            changed = sum(1 for (a, _, _) in rows if canonicalize_address(a) != a)
+            if not changed:
+                return 0
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute("DELETE FROM geocache")
+                self._conn.executemany(
+                    "INSERT INTO geocache (address, lat, lon) VALUES (?, ?, ?)",
+                    ((a, c[0], c[1]) for a, c in merged.items()),
+                )
+            return changed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_json_geocache(json_path: str | Path, cache: GeocodeCache) -> int:
+    """
+    Copy a legacy geocache.json ({address: [lat, lon]}) into a GeocodeCache.
+
+    Existing cache rows win. Safe to run more than once.
+
+    Returns:
+        Number of addresses added; 0 if the JSON file is missing or unreadable.
+    """
+    try:
+        entries = json.loads(Path(json_path).read_text())
+    except (OSError, json.JSONDecodeError):
+        return 0
+    return cache.put_many({a: (c[0], c[1]) for a, c in entries.items()})
+
+
+_open_caches: dict[Path, GeocodeCache] = {}
+_open_caches_lock = threading.Lock()
+
+
+def open_geocode_cache(path: str | Path) -> GeocodeCache:
+    """
+    Return the process-wide GeocodeCache for path, opening it on first use.
+
+    A legacy ``.json`` path is mapped to a sibling ``.sqlite3`` store, and the
+    JSON contents are migrated into it the first time that store is created.
+    """
+    path = Path(path)
+    with _open_caches_lock:
+        if path in _open_caches:
+            return _open_caches[path]
+        db_path = path.with_suffix(".sqlite3") if path.suffix == ".json" else path
+        is_new = not db_path.exists()
+        cache = GeocodeCache(db_path)
+        if path.suffix == ".json" and is_new:
+            migrate_json_geocache(path, cache)
+        _open_caches[path] = cache
+        return cache
+
+
+def _remember_failure(geocache: GeocodeCache | None, address: str, reason: str) -> None:
+    if geocache is None:
+        return
+    try:
+        geocache.put_failure(address, reason)
+    except sqlite3.Error:
+        pass  # non-fatal: caching is best-effort
+
+
 def geocode_address(
     address: str | None,
     cache_path: str | Path | None = None,
+    raise_errors: bool = False,
 ) -> tuple[float, float] | None:
     """
     Geocode a plain-text address string to (latitude, longitude).
 
-    Results are cached to a JSON file at cache_path (if provided) to avoid
+    Results are cached in a GeocodeCache at cache_path (if provided) to avoid
     redundant API calls, as recommended by the Nominatim usage policy.
     Rate-limited to 1 req/sec per Nominatim ToS.
 
     Args:
         address: Human-readable address string to geocode.
-        cache_path: Optional path to a JSON cache file. Cache is read before
-            making an API call; new results are written back after a successful
-            geocode. Caching is best-effort — OSError on write is silently ignored.
+        cache_path: Optional path to the SQLite cache file. A legacy
+            geocache.json path is accepted and migrated once into a sibling
+            .sqlite3 store (see open_geocode_cache). Failed lookups are
+            remembered there too, with a reason code, and not retried until
+            negative_ttl_for(reason, ...) has passed. Caching is best-effort —
+            database errors are silently ignored.
+        raise_errors: If True, geocoder service errors (timeouts, HTTP errors)
+            raise geopy.exc.GeopyError instead of returning None, so callers
+            can tell "service unavailable" apart from "no such address".
 
     Returns:
         (latitude, longitude) float tuple, or None if address is empty/blank or
@@ -207,38 +774,45 @@ def geocode_address(
         return None
 
     # Strip apt/unit numbers — they confuse geocoders and are not needed for
-    # locating the building. The normalized form is used as the cache key so
-    # different unit numbers at the same address share one cache entry.
+    # locating the building. GeocodeCache keys on canonicalize_address(), so
+    # unit numbers and spelling variants of one address share a cache entry.
     address = _strip_unit(address)
     if not address:
         return None
 
     # ── Read cache ────────────────────────────────────────────────────────────
-    cache: dict = {}
+    geocache: GeocodeCache | None = None
     if cache_path is not None:
-        cache_path = Path(cache_path)
-        if cache_path.exists():
-            try:
-                cache = json.loads(cache_path.read_text())
-            except (json.JSONDecodeError, OSError):
-                cache = {}
-        if address in cache:
-            lat, lon = cache[address]
-            return float(lat), float(lon)
+        try:
+            geocache = open_geocode_cache(cache_path)
+            cached = geocache.get(address)
+            known_failure = geocache.get_failure(address) if not cached else None
+        except (sqlite3.Error, OSError):
+            geocache, cached, known_failure = None, None, None
+        if cached:
+            return cached
+        if known_failure:
+            return None
 
     # ── Geocode via Nominatim ─────────────────────────────────────────────────
-    location = _geocode_fn(address)
+    try:
+        location = _geocode_fn(address)
+    except GeopyError:
+        _remember_failure(geocache, address, GEOCODE_SERVICE_ERROR)
+        if raise_errors:
+            raise
+        return None
     if location is None:
+        _remember_failure(geocache, address, GEOCODE_NOT_FOUND)
         return None
 
     lat, lon = location.latitude, location.longitude
 
     # ── Write cache ───────────────────────────────────────────────────────────
-    if cache_path is not None:
-        cache[address] = [lat, lon]
+    if geocache is not None:
         try:
-            cache_path.write_text(json.dumps(cache, indent=2))
-        except OSError:
+            geocache.put(address, lat, lon)
+        except sqlite3.Error:
             pass  # non-fatal: caching is best-effort
 
     return lat, lon
@@ -3,17 +3,21 @@
 import base64
 import os
 import re
+import threading
+import time
 from datetime import datetime, timezone
 from email.message import Message
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from typing import Callable
 
 from bs4 import BeautifulSoup
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build  # type: ignore
 from googleapiclient.errors import HttpError  # type: ignore
 
+from .google_api import get_service
+
 
 def decode_base64(data: str) -> str:
     return base64.urlsafe_b64decode(data).decode("utf-8")
@@ -84,33 +88,260 @@ def format_sent_date(msg: dict) -> str:
     return date_header or ""
 
 
-def fetch_messages(creds: Credentials, label: str, max_messages: int) -> list[dict]:
+def _label_id(service, label: str) -> str | None:
+    labels = service.users().labels().list(userId="me").execute().get("labels", [])
+    return next((lb["id"] for lb in labels if lb["name"] == label), None)
+
+
+# Gmail allows 250 quota units per user per second; list and get cost 5 each.
+GMAIL_QUOTA_UNITS_PER_SECOND = 250
+_LIST_UNITS = 5
+_GET_UNITS = 5
+
+# A batch may hold up to 100 calls, but Gmail rate-limits batches above ~50.
+GMAIL_BATCH_SIZE = 50
+# messages.list returns at most 500 IDs per page.
+_LIST_PAGE_SIZE = 500
+
+_MAX_RETRIES = 5
+_RETRY_STATUSES = {403, 429, 500, 502, 503, 504}
+
+
+class _QuotaThrottle:
+    """Token bucket over Gmail quota units (one second of burst)."""
+
+    def __init__(self, units_per_second: float):
+        self.rate = units_per_second
+        self._tokens = units_per_second
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= units
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+def _is_retryable(error: HttpError) -> bool:
+    # 403 is only retryable for rate-limit reasons, not for permission errors.
+    if error.resp.status == 403:
+        content = error.content or b""
+        return b"rateLimitExceeded" in content or b"userRateLimitExceeded" in content
+    return error.resp.status in _RETRY_STATUSES
+
+
+def _get_messages(
+    service, message_ids: list[str], throttle: _QuotaThrottle | None = None
+) -> list[dict]:
+    """
+    Download full messages in HTTP batches of GMAIL_BATCH_SIZE.
+
+    Calls that fail with a rate-limit or server error are retried with
+    exponential backoff; messages deleted since they were listed (404) are
+    skipped. Results keep the order of message_ids.
+    """
+    throttle = throttle or _QuotaThrottle(GMAIL_QUOTA_UNITS_PER_SECOND)
+    results: dict[str, dict] = {}
+    pending = list(dict.fromkeys(message_ids))
+    for attempt in range(_MAX_RETRIES + 1):
+        retry: list[str] = []
+        last_error: HttpError | None = None
+
+        def _on_response(request_id, response, exception):
+            nonlocal last_error
+            if exception is None:
+                results[request_id] = response
+            elif isinstance(exception, HttpError) and exception.resp.status == 404:
+                pass
+            elif isinstance(exception, HttpError) and _is_retryable(exception):
+                retry.append(request_id)
+                last_error = exception
+            else:
+                raise exception
+
+        for start in range(0, len(pending), GMAIL_BATCH_SIZE):
+            chunk = pending[start : start + GMAIL_BATCH_SIZE]
+            throttle.acquire(len(chunk) * _GET_UNITS)
+            batch = service.new_batch_http_request(callback=_on_response)
+            for msg_id in chunk:
+                batch.add(service.users().messages().get(userId="me", id=msg_id), request_id=msg_id)
+            batch.execute()
+
+        if not retry:
+            break
+        if attempt == _MAX_RETRIES:
+            assert last_error is not None
+            raise last_error
+        time.sleep(min(2**attempt, 32))
+        pending = retry
+    return [results[msg_id] for msg_id in message_ids if msg_id in results]
+
+
+# Given listed message IDs, returns those the caller already has; their bodies
+# are then not downloaded.
+KnownIds = Callable[[list[str]], set[str]]
+
+
+def _drop_known(message_ids: list[str], known_ids: KnownIds | None) -> list[str]:
+    if known_ids is None or not message_ids:
+        return message_ids
+    known = known_ids(message_ids)
+    if known:
+        print(f"Skipping {len(known)} already-processed message(s) before download.")
+    return [m for m in message_ids if m not in known]
+
+
+def fetch_messages(
+    creds: Credentials,
+    label: str,
+    max_messages: int,
+    service=None,
+    known_ids: KnownIds | None = None,
+) -> list[dict]:
     """
     Fetch up to max_messages Gmail messages from the given label.
     Returns a list of full message dicts (with payload).
+
+    If known_ids is given, listed IDs it reports as known are dropped before
+    any message body is downloaded.
     """
-    service = build("gmail", "v1", credentials=creds)
+    service = service or get_service("gmail", "v1", creds)
 
-    labels = service.users().labels().list(userId="me").execute().get("labels", [])
-    label_id = next((lb["id"] for lb in labels if lb["name"] == label), None)
+    label_id = _label_id(service, label)
     if not label_id:
         print(f"Label '{label}' not found.")
         return []
     print(f"Label '{label}' ID: {label_id}")
 
-    result = (
-        service.users()
-        .messages()
-        .list(userId="me", labelIds=[label_id], maxResults=max_messages)
-        .execute()
-    )
-    message_ids = [m["id"] for m in result.get("messages", [])]
-    print("Message IDs:", message_ids)
+    throttle = _QuotaThrottle(GMAIL_QUOTA_UNITS_PER_SECOND)
+    message_ids: list[str] = []
+    page_token = None
+    while len(message_ids) < max_messages:
+        throttle.acquire(_LIST_UNITS)
+        result = (
+            service.users()
+            .messages()
+            .list(
+                userId="me",
+                labelIds=[label_id],
+                maxResults=min(_LIST_PAGE_SIZE, max_messages - len(message_ids)),
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        message_ids.extend(m["id"] for m in result.get("messages", []))
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            break
+    print(f"Listed {len(message_ids)} message ID(s).")
+
+    return _get_messages(service, _drop_known(message_ids, known_ids), throttle)
+
+
+def get_messages(
+    creds: Credentials,
+    message_ids: list[str],
+    service=None,
+    known_ids: KnownIds | None = None,
+) -> list[dict]:
+    """Download specific messages by ID (batched, throttled, retried), in order."""
+    service = service or get_service("gmail", "v1", creds)
+    return _get_messages(service, _drop_known(message_ids, known_ids))
+
+
+def sync_messages(
+    creds: Credentials,
+    label: str,
+    max_messages: int,
+    history_id: str | None = None,
+    service=None,
+    known_ids: KnownIds | None = None,
+) -> tuple[list[dict], str | None]:
+    """
+    Incremental fetch: only messages added to label since history_id.
+
+    Uses users.history.list from the stored checkpoint. With no checkpoint,
+    or one Gmail has expired (HTTP 404, roughly a week old), falls back to a
+    full fetch_messages() scan.
 
-    return [
-        service.users().messages().get(userId="me", id=msg_id).execute() for msg_id in message_ids
-    ]
+    At most max_messages are returned. When the delta is larger, the returned
+    checkpoint stops at the last history record fully returned, so the rest
+    arrives on the next run instead of being skipped.
 
+    known_ids filters listed IDs before download, as in fetch_messages().
+
+    Returns (messages, new_history_id). Persist new_history_id only after the
+    messages have been processed; None means the label was not found.
+    """
+    service = service or get_service("gmail", "v1", creds)
+
+    label_id = _label_id(service, label)
+    if not label_id:
+        print(f"Label '{label}' not found.")
+        return [], None
+
+    if history_id:
+        try:
+            message_ids, new_history_id = _history_delta(
+                service, label_id, history_id, max_messages
+            )
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            print(f"History checkpoint {history_id} expired; running a full scan.")
+        else:
+            print(f"Incremental sync: {len(message_ids)} new message(s) since {history_id}")
+            return _get_messages(service, _drop_known(message_ids, known_ids)), new_history_id
+
+    # Read the checkpoint before listing so nothing that arrives mid-scan is missed.
+    new_history_id = service.users().getProfile(userId="me").execute()["historyId"]
+    messages = fetch_messages(creds, label, max_messages, service=service, known_ids=known_ids)
+    return messages, new_history_id
+
+
+def _history_delta(
+    service, label_id: str, history_id: str, max_messages: int
+) -> tuple[list[str], str]:
+    """(new message IDs in label, checkpoint to resume from) since history_id."""
+    message_ids: list[str] = []
+    seen: set[str] = set()
+    checkpoint = history_id
+    page_token = None
+    while True:
+        response = (
+            service.users()
+            .history()
+            .list(
+                userId="me",
+                startHistoryId=history_id,
+                labelId=label_id,
+                historyTypes=["messageAdded"],
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        for record in response.get("history", []):
+            added = list(
+                dict.fromkeys(
+                    m["message"]["id"]
+                    for m in record.get("messagesAdded", [])
+                    if label_id in m["message"].get("labelIds", [label_id])
+                    and m["message"]["id"] not in seen
+                )
+            )
+            if len(message_ids) + len(added) > max_messages and message_ids:
+                return message_ids, checkpoint
+            message_ids.extend(added)
+            seen.update(added)
+            checkpoint = record["id"]
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return message_ids, response.get("historyId", checkpoint)
 
 
 def load_template(template_name: str, template_dir: str) -> tuple[str, str]:
@@ -144,12 +375,15 @@ def send_email(
     subject: str,
     body: str,
     images: dict[str, str] | None = None,
+    message_id: str | None = None,
 ) -> bool:
     """
     Send an HTML email via the authenticated Gmail account.
 
     If images is provided, sends multipart/related with inline images embedded by CID.
     Reference images in HTML with <img src="cid:KEY"> where KEY matches images dict keys.
+    message_id ("<unique@domain>") sets the Message-ID header, so a later
+    message_was_sent() can tell whether this send went out.
 
     Returns True on success, False on error.
     """
@@ -169,13 +403,28 @@ def send_email(
         message = MIMEText(body, "html")
         message["to"] = to_email
         message["subject"] = subject
+    if message_id:
+        message["Message-ID"] = message_id
 
     raw = base64.urlsafe_b64encode(message.as_bytes()).decode()
 
-    service = build("gmail", "v1", credentials=creds)
+    service = get_service("gmail", "v1", creds)
     try:
         service.users().messages().send(userId="me", body={"raw": raw}).execute()
         return True
     except HttpError as e:
         print(f"Gmail send error: {e}")
         return False
+
+
+def message_was_sent(creds: Credentials, message_id: str) -> bool:
+    """
+    Whether the mailbox already holds a message with this Message-ID header.
+
+    Lets a retried send check whether an earlier attempt went out before
+    sending again. Raises HttpError if Gmail cannot be asked.
+    """
+    service = get_service("gmail", "v1", creds)
+    query = f"rfc822msgid:{message_id.strip('<>')}"
+    resp = service.users().messages().list(userId="me", q=query, maxResults=1).execute()
+    return bool(resp.get("messages"))
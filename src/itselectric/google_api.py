@@ -0,0 +1,62 @@
+"""Cached Google API clients (Gmail, Sheets) built from bundled discovery documents.
+
+googleapiclient.discovery.build() parses the API's discovery document and
+creates a new httplib2.Http on every call, so calling it per send paid for the
+parse, the resource tree and a fresh TLS connection each time. get_service()
+builds each client once and reuses it, keeping its connection alive.
+
+The discovery documents are the static copies that ship with
+google-api-python-client, read once per process; nothing is fetched from
+Google's discovery service. httplib2.Http is not thread-safe, so clients are
+cached per thread: each worker thread builds its own once per
+(api, version, credentials).
+"""
+
+import threading
+from functools import lru_cache
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build, build_from_document  # type: ignore
+from googleapiclient.discovery_cache import get_static_doc  # type: ignore
+
+# Clients kept per thread; more than this means credentials keep changing.
+_MAX_SERVICES_PER_THREAD = 8
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def discovery_document(api: str, version: str) -> str | None:
+    """The bundled discovery document for api/version, or None if none ships."""
+    return get_static_doc(api, version)
+
+
+def get_service(api: str, version: str, creds: Credentials):
+    """
+    The calling thread's client for api/version with these credentials,
+    built on first use. New credentials (e.g. after re-authentication) get a
+    new client; refreshing a token in place keeps the existing one.
+    """
+    services: dict | None = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+    key = (api, version, id(creds))
+    cached = services.get(key)
+    # The entry holds creds, so its id cannot be reused while it is cached.
+    if cached is not None and cached[0] is creds:
+        return cached[1]
+
+    document = discovery_document(api, version)
+    if document is not None:
+        service = build_from_document(document, credentials=creds)
+    else:
+        service = build(api, version, credentials=creds, cache_discovery=False)
+    if len(services) >= _MAX_SERVICES_PER_THREAD:
+        services.clear()
+    services[key] = (creds, service)
+    return service
+
+
+def clear_service_cache() -> None:
+    """Drop the calling thread's cached clients (for tests and benchmarks)."""
+    _local.services = {}
@@ -0,0 +1,203 @@
+"""Shared pooled HTTP client for outbound REST calls (HubSpot, Nominatim).
+
+One httpx.Client per process keeps connections alive between calls, so a small
+CRM or geocoder request pays for its TCP and TLS handshake once per host
+instead of every time. HTTP/2 is negotiated when the optional h2 package is
+installed. Every request gets timeouts and retry/backoff on transport errors,
+429 and 5xx, and its latency is recorded per host (see metrics()).
+
+Google APIs are not routed here: googleapiclient brings its own transport.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Protocol
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # type: ignore  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT_SECONDS = 30.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_RETRIES = 3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_BACKOFF_SECONDS = 16.0
+# Latency samples kept per host for percentiles.
+_LATENCY_WINDOW = 512
+
+
+class _Throttle(Protocol):
+    def wait(self) -> None: ...
+
+
+class HostMetrics:
+    """Request counts and latency for one host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._recent: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def record(self, seconds: float, error: bool) -> None:
+        self.requests += 1
+        self.errors += error
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self._recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self._recent)
+
+        def pct(p: float) -> float:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 1)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "mean_ms": round(self.total_seconds / self.requests * 1000, 1) if self.requests else 0,
+            "p50_ms": pct(0.50) if recent else 0,
+            "p95_ms": pct(0.95) if recent else 0,
+            "max_ms": round(self.max_seconds * 1000, 1),
+        }
+
+
+def _retry_delay(resp: httpx.Response | None, attempt: int) -> float:
+    if resp is not None:
+        try:
+            return min(float(resp.headers.get("Retry-After", "")), _MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+    return min(0.5 * 2**attempt, _MAX_BACKOFF_SECONDS)
+
+
+class HttpClient:
+    """Pooled keep-alive client with retries and per-host latency metrics. Thread-safe."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        http2: bool | None = None,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        self.max_retries = max_retries
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2 and HTTP2_AVAILABLE
+        self._client = httpx.Client(
+            http2=self.http2,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+            transport=transport,
+        )
+        self._metrics: dict[str, HostMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> HostMetrics:
+        with self._lock:
+            return self._metrics.setdefault(host, HostMetrics())
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        throttle: _Throttle | None = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request, retrying transport errors and RETRY_STATUSES with backoff.
+
+        Returns the last response, which may still be an error status; raises
+        httpx.TransportError if the final attempt could not connect. throttle
+        (anything with wait()) is waited on before every attempt, retries included.
+        """
+        metrics = self._host(urlsplit(url).netloc)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._lock:
+                    metrics.retries += 1
+            if throttle is not None:
+                throttle.wait()
+            start = time.perf_counter()
+            try:
+                resp = self._client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                with self._lock:
+                    metrics.record(time.perf_counter() - start, error=True)
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(_retry_delay(None, attempt))
+                continue
+            with self._lock:
+                metrics.record(time.perf_counter() - start, error=resp.status_code >= 400)
+            if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return resp
+            time.sleep(_retry_delay(resp, attempt))
+        raise AssertionError("unreachable")
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self) -> dict[str, dict]:
+        """{host: {requests, errors, retries, mean_ms, p50_ms, p95_ms, max_ms}}."""
+        with self._lock:
+            return {host: m.snapshot() for host, m in sorted(self._metrics.items())}
+
+    def close(self) -> None:
+        self._client.close()
+
+
+_shared: HttpClient | None = None
+_shared_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """
+    The process-wide client, built on first use.
+
+    Sized from the environment: HTTP_TIMEOUT_SECONDS, HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_RETRIES, and HTTP2 (set to 0 to force HTTP/1.1).
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HttpClient(
+                timeout=float(os.getenv("HTTP_TIMEOUT_SECONDS", str(DEFAULT_TIMEOUT_SECONDS))),
+                max_connections=int(
+                    os.getenv("HTTP_MAX_CONNECTIONS", str(DEFAULT_MAX_CONNECTIONS))
+                ),
+                max_retries=int(os.getenv("HTTP_MAX_RETRIES", str(DEFAULT_MAX_RETRIES))),
+                http2=os.getenv("HTTP2", "1") not in ("0", "false", "no"),
+            )
+        return _shared
+
+
+def set_client(client: HttpClient | None) -> HttpClient | None:
+    """Replace the shared client (None: rebuild on next use). Returns the old one."""
+    global _shared
+    with _shared_lock:
+        old, _shared = _shared, client
+    return old
+
+
+def close_client() -> None:
+    old = set_client(None)
+    if old is not None:
+        old.close()
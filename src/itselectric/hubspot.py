@@ -1,8 +1,24 @@
-"""HubSpot CRM helpers: upsert contacts."""
+"""HubSpot CRM helpers: upsert contacts, one at a time or in batches."""
 
-import requests  # type: ignore
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import httpx
+
+from .http_client import RETRY_STATUSES, get_client
 
 _BASE = "https://api.hubapi.com"
+_UPSERT_PATH = "/crm/v3/objects/contacts/batch/upsert"
+
+# batch/upsert accepts at most 100 inputs per request.
+HUBSPOT_BATCH_SIZE = 100
+# Private apps get 100 requests per rolling 10-second window.
+HUBSPOT_RATE_LIMIT_CALLS = 100
+HUBSPOT_RATE_LIMIT_WINDOW = 10.0
 
 
 def _headers(access_token: str) -> dict:
@@ -18,6 +34,58 @@ def _split_name(name: str) -> tuple[str, str]:
     return parts[0], parts[1] if len(parts) > 1 else ""
 
 
+def _contact_input(name: str, email: str, address: str) -> dict:
+    """One batch/upsert input keyed by email."""
+    from .geo import parse_address_components
+    firstname, lastname = _split_name(name)
+    parts = parse_address_components(address)
+    return {
+        "id": email,
+        "idProperty": "email",
+        "properties": {
+            "email": email,
+            "firstname": firstname,
+            "lastname": lastname,
+            "address": parts["street"],
+            "city": parts["city"],
+            "state": parts["state"],
+            "zip": parts["zip"],
+            "form_selection": "EV Driver",
+        },
+    }
+
+
+def contact_payload_hash(name: str, email: str, address: str) -> str:
+    """Hash of the properties upsert_contact(s) would send; equal hash → no-op upsert."""
+    properties = _contact_input(name, email, address)["properties"]
+    return hashlib.sha256(json.dumps(properties, sort_keys=True).encode()).hexdigest()
+
+
+class _RollingLimiter:
+    """Blocks until a call fits in the rolling window (max_calls per window seconds)."""
+
+    def __init__(self, max_calls: int, window: float):
+        self.max_calls = max_calls
+        self.window = window
+        self._calls: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.window:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                time.sleep(self.window - (now - self._calls[0]))
+
+
+# One limiter per process: the HubSpot limit is per account, not per caller.
+_limiter = _RollingLimiter(HUBSPOT_RATE_LIMIT_CALLS, HUBSPOT_RATE_LIMIT_WINDOW)
+
+
 def upsert_contact(
     access_token: str,
     name: str,
@@ -27,38 +95,181 @@ def upsert_contact(
     """
     Create or update a HubSpot contact using the batch upsert endpoint.
     Uses email as the dedup key (idProperty). All properties are always sent
-    since partial upserts are not supported with email as idProperty.
+    since partial upserts are not supported with email as idProperty; callers
+    avoid no-op upserts by comparing contact_payload_hash with the last sync.
     Returns the contact ID, or None on error.
     """
-    from src.itselectric.geo import parse_address_components
-    firstname, lastname = _split_name(name)
-    parts = parse_address_components(address)
     try:
-        resp = requests.post(
-            f"{_BASE}/crm/v3/objects/contacts/batch/upsert",
+        resp = get_client().post(
+            f"{_BASE}{_UPSERT_PATH}",
             headers=_headers(access_token),
-            json={
-                "inputs": [
-                    {
-                        "id": email,
-                        "idProperty": "email",
-                        "properties": {
-                            "email": email,
-                            "firstname": firstname,
-                            "lastname": lastname,
-                            "address": parts["street"],
-                            "city": parts["city"],
-                            "state": parts["state"],
-                            "zip": parts["zip"],
-                            "form_selection": "EV Driver",
-                        },
-                    }
-                ]
-            },
+            json={"inputs": [_contact_input(name, email, address)]},
+            throttle=_limiter,
         )
         resp.raise_for_status()
         results = resp.json().get("results", [])
         return results[0]["id"] if results else None
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"HubSpot API error: {e}")
         return None
+
+
+def _post_batch(access_token: str, inputs: list[dict], base_url: str) -> httpx.Response | None:
+    """POST one batch/upsert; the shared client retries 429/5xx/network errors. None on failure."""
+    try:
+        resp = get_client().post(
+            f"{base_url}{_UPSERT_PATH}",
+            headers=_headers(access_token),
+            json={"inputs": inputs},
+            throttle=_limiter,
+        )
+    except httpx.HTTPError as e:
+        print(f"HubSpot API error: {e}")
+        return None
+    if resp.status_code in RETRY_STATUSES:
+        print(f"HubSpot API error: HTTP {resp.status_code}")
+        return None
+    return resp
+
+
+def upsert_contacts(
+    access_token: str,
+    contacts: list[tuple[str, str, str]],
+    base_url: str = _BASE,
+) -> dict[str, str | None]:
+    """
+    Upsert (name, email, address) contacts in batches of HUBSPOT_BATCH_SIZE.
+
+    Returns {email: contact ID or None}. Results are matched back by email,
+    not position. Inputs missing from a partial (207) response are retried
+    once on their own; a batch rejected outright (4xx) is split in half until
+    the offending inputs are isolated, so one bad address cannot fail the
+    other 99.
+    """
+    inputs: dict[str, dict] = {}
+    for name, email, address in contacts:
+        inputs[email.lower()] = _contact_input(name, email, address)
+    items = list(inputs.values())
+    # Work list of (inputs, retries left for items missing from the response).
+    work = [
+        (items[i : i + HUBSPOT_BATCH_SIZE], 1) for i in range(0, len(items), HUBSPOT_BATCH_SIZE)
+    ]
+    ids: dict[str, str | None] = {}
+    while work:
+        chunk, retries = work.pop()
+        resp = _post_batch(access_token, chunk, base_url)
+        if resp is None:
+            continue
+        if resp.status_code >= 400:
+            if len(chunk) > 1:
+                half = len(chunk) // 2
+                work += [(chunk[:half], retries), (chunk[half:], retries)]
+            else:
+                rejected = chunk[0]["id"]
+                print(f"HubSpot rejected {rejected}: HTTP {resp.status_code} {resp.text[:200]}")
+            continue
+        results = resp.json().get("results", [])
+        for result in results:
+            email = (result.get("properties") or {}).get("email")
+            if email:
+                ids[email.lower()] = result["id"]
+        if len(chunk) == 1 and len(results) == 1 and chunk[0]["id"].lower() not in ids:
+            ids[chunk[0]["id"].lower()] = results[0]["id"]
+        missing = [i for i in chunk if i["id"].lower() not in ids]
+        if missing and retries:
+            work.append((missing, retries - 1))
+    return {email: ids.get(email.lower()) for _, email, _ in contacts}
+
+
+class ContactBatcher:
+    """
+    Collects upserts from any thread and sends them as batch requests.
+
+    submit() returns a Future for the contact ID (None on failure). A batch
+    goes out when HUBSPOT_BATCH_SIZE contacts are waiting, when the oldest has
+    waited max_wait seconds, or when flush() is called — e.g. by a consumer
+    that needs a result now. close() sends whatever is left.
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        batch_size: int = HUBSPOT_BATCH_SIZE,
+        max_wait: float = 1.0,
+        base_url: str = _BASE,
+    ):
+        self.access_token = access_token
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.base_url = base_url
+        self.batches_sent = 0
+        self._pending: list[tuple[tuple[str, str, str], Future, float]] = []
+        self._flush_now = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="hubspot-batcher")
+        self._thread.start()
+
+    def submit(self, name: str, email: str, address: str) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ContactBatcher is closed")
+            self._pending.append(((name, email, address), future, time.monotonic()))
+            # First item starts the max_wait clock; a full batch goes now.
+            if len(self._pending) in (1, self.batch_size):
+                self._cond.notify()
+        return future
+
+    def flush(self) -> None:
+        """Send everything pending without waiting for a full batch."""
+        with self._cond:
+            self._flush_now = True
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __enter__(self) -> "ContactBatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _next_batch(self) -> list | None:
+        """Wait until a batch is due; None once closed and drained."""
+        with self._cond:
+            while True:
+                if self._pending and (
+                    self._closed
+                    or self._flush_now
+                    or len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._pending[0][2] >= self.max_wait
+                ):
+                    batch = self._pending[: self.batch_size]
+                    del self._pending[: self.batch_size]
+                    if not self._pending:
+                        self._flush_now = False
+                    return batch
+                if self._closed:
+                    return None
+                self._flush_now = False
+                if self._pending:
+                    self._cond.wait(self.max_wait - (time.monotonic() - self._pending[0][2]))
+                else:
+                    self._cond.wait()
+
+    def _run(self) -> None:
+        while (batch := self._next_batch()) is not None:
+            self.batches_sent += 1
+            try:
+                ids = upsert_contacts(self.access_token, [c for c, _, _ in batch], self.base_url)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for contact, future, _ in batch:
+                future.set_result(ids.get(contact[1]))
@@ -1,11 +1,18 @@
 """Google Sheets helpers: read existing rows and append new ones with deduplication."""
 
 import hashlib
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
 
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build  # type: ignore
 from googleapiclient.errors import HttpError  # type: ignore
 
+from .google_api import get_service
+
 COLUMNS = [
     "Sent Date",
     "Name",
@@ -36,12 +43,17 @@ def _unparsed_hash(sent_date: str, content: str, content_limit: int) -> str:
     return hashlib.sha256(key.encode()).hexdigest()
 
 
-def row_hash(row: list, content_limit: int) -> str:
+def row_hash(row: list, content_limit: int, key: str | None = None) -> str:
     """
     Compute a stable dedup hash for a sheet row.
     Parsed rows (with name/address/emails) hash by those fields.
     Unparsed rows hash by (sent_date, truncated content).
+    A key (e.g. an OutboundEmail id) is hashed in too, so two rows that differ
+    only by what they record are both kept.
     """
+    if key:
+        base = row_hash(row, content_limit)
+        return hashlib.sha256(f"{base}\n{key}".encode()).hexdigest()
     date = row[0] if len(row) > 0 else ""
     name = row[1] if len(row) > 1 else ""
     address = row[2] if len(row) > 2 else ""
@@ -53,6 +65,221 @@ def row_hash(row: list, content_limit: int) -> str:
     return _unparsed_hash(date, content, content_limit)
 
 
+DEFAULT_RECONCILE_SECONDS = 24 * 3600
+
+
+class SheetWatermark(NamedTuple):
+    row_count: int  # sheet rows hashed so far, header included
+    last_hash: str | None  # row_hash of row row_count, to spot edits above it
+    content_limit: int
+    reconciled_at: float  # time.time() of the last full read
+
+
+class SheetHashIndex:
+    """
+    SQLite-backed set of the row hashes already on each sheet.
+
+    A watermark per sheet records how many rows have been hashed, so a sync
+    reads only the rows appended since (see sync_sheet_index). Edits above
+    the watermark are caught by re-reading its last row, and a full read every
+    reconcile_seconds catches anything else.
+
+    Keyed hashes (row_hash with a key) cannot be recomputed from the sheet, so
+    add() records them after an append, in a table full reads do not clear.
+    """
+
+    def __init__(self, path: str | Path, reconcile_seconds: float = DEFAULT_RECONCILE_SECONDS):
+        self.path = Path(path)
+        self.reconcile_seconds = reconcile_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_hashes ("
+            "sheet TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (sheet, hash))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_watermarks ("
+            "sheet TEXT PRIMARY KEY, row_count INTEGER NOT NULL, last_hash TEXT, "
+            "content_limit INTEGER NOT NULL, reconciled_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS appended_hashes ("
+            "sheet TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (sheet, hash))"
+        )
+
+    @staticmethod
+    def _key(spreadsheet_id: str, sheet_name: str) -> str:
+        return f"{spreadsheet_id}/{sheet_name}"
+
+    def watermark(self, spreadsheet_id: str, sheet_name: str) -> SheetWatermark | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT row_count, last_hash, content_limit, reconciled_at "
+                "FROM sheet_watermarks WHERE sheet = ?",
+                (self._key(spreadsheet_id, sheet_name),),
+            ).fetchone()
+        return SheetWatermark(*row) if row else None
+
+    def replace(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        hashes: Iterable[str],
+        mark: SheetWatermark,
+    ) -> None:
+        """Swap in the hashes from a full read of the sheet."""
+        key = self._key(spreadsheet_id, sheet_name)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM sheet_hashes WHERE sheet = ?", (key,))
+            self._insert(key, hashes, mark)
+
+    def extend(
+        self,
+        spreadsheet_id: str,
+        sheet_name: str,
+        hashes: Iterable[str],
+        mark: SheetWatermark,
+    ) -> None:
+        """Add the hashes of newly read rows and move the watermark past them."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._insert(self._key(spreadsheet_id, sheet_name), hashes, mark)
+
+    def add(self, spreadsheet_id: str, sheet_name: str, hashes: Iterable[str]) -> None:
+        """Record keyed hashes of rows just appended to the sheet."""
+        key = self._key(spreadsheet_id, sheet_name)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO appended_hashes (sheet, hash) VALUES (?, ?)",
+                ((key, h) for h in hashes),
+            )
+
+    def _insert(self, key: str, hashes: Iterable[str], mark: SheetWatermark) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO sheet_hashes (sheet, hash) VALUES (?, ?)",
+            ((key, h) for h in hashes),
+        )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sheet_watermarks "
+            "(sheet, row_count, last_hash, content_limit, reconciled_at) VALUES (?, ?, ?, ?, ?)",
+            (key, *mark),
+        )
+
+    def hashes(self, spreadsheet_id: str, sheet_name: str) -> set[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT hash FROM sheet_hashes WHERE sheet = ?",
+                (self._key(spreadsheet_id, sheet_name),),
+            )
+            return {h for (h,) in rows}
+
+    def missing(self, spreadsheet_id: str, sheet_name: str, hashes: Iterable[str]) -> set[str]:
+        """The given hashes that are not on the sheet: primary-key lookups only."""
+        key = self._key(spreadsheet_id, sheet_name)
+        with self._lock:
+            return {
+                h
+                for h in set(hashes)
+                if not self._conn.execute(
+                    "SELECT 1 FROM sheet_hashes WHERE sheet = ? AND hash = ? "
+                    "UNION ALL SELECT 1 FROM appended_hashes WHERE sheet = ? AND hash = ?",
+                    (key, h, key, h),
+                ).fetchone()
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_open_indexes: dict[Path, SheetHashIndex] = {}
+_open_indexes_lock = threading.Lock()
+
+
+def open_sheet_index(path: str | Path) -> SheetHashIndex:
+    """Return the process-wide SheetHashIndex for path, opening it on first use."""
+    path = Path(path)
+    with _open_indexes_lock:
+        if path not in _open_indexes:
+            _open_indexes[path] = SheetHashIndex(path)
+        return _open_indexes[path]
+
+
+def _read_rows(service, spreadsheet_id: str, range_name: str) -> list[list]:
+    result = (
+        service.spreadsheets()
+        .values()
+        .get(spreadsheetId=spreadsheet_id, range=range_name)
+        .execute()
+    )
+    return result.get("values", [])
+
+
+def sync_sheet_index(
+    creds: Credentials,
+    spreadsheet_id: str,
+    sheet_name: str,
+    content_limit: int,
+    index: SheetHashIndex,
+) -> int:
+    """
+    Bring index up to date with the sheet; returns how many rows were read.
+
+    Normally reads from the watermark row down, i.e. only rows appended since
+    the last sync (plus the watermark row itself, to check it is unchanged).
+    Falls back to a full read when that row changed, the content_limit
+    differs, or reconcile_seconds have passed since the last full read.
+    """
+    service = get_service("sheets", "v4", creds)
+    now = time.time()
+    mark = index.watermark(spreadsheet_id, sheet_name)
+    if (
+        mark is not None
+        and mark.row_count > 0
+        and mark.content_limit == content_limit
+        and now - mark.reconciled_at < index.reconcile_seconds
+    ):
+        try:
+            rows = _read_rows(service, spreadsheet_id, f"'{sheet_name}'!A{mark.row_count}:J")
+        except HttpError:
+            rows = []
+        if rows and row_hash(rows[0], content_limit) == mark.last_hash:
+            new = rows[1:]
+            if new:
+                index.extend(
+                    spreadsheet_id,
+                    sheet_name,
+                    (row_hash(r, content_limit) for r in new),
+                    mark._replace(
+                        row_count=mark.row_count + len(new),
+                        last_hash=row_hash(new[-1], content_limit),
+                    ),
+                )
+            return len(rows)
+
+    try:
+        rows = _read_rows(service, spreadsheet_id, f"'{sheet_name}'!A:J")
+    except HttpError:
+        return 0  # keep what the index already has
+    index.replace(
+        spreadsheet_id,
+        sheet_name,
+        (row_hash(r, content_limit) for r in rows[1:]),
+        SheetWatermark(
+            row_count=len(rows),
+            last_hash=row_hash(rows[-1], content_limit) if rows else None,
+            content_limit=content_limit,
+            reconciled_at=now,
+        ),
+    )
+    return len(rows)
+
+
 def get_existing_hashes(
     creds: Credentials,
     spreadsheet_id: str,
@@ -60,17 +287,11 @@ def get_existing_hashes(
     content_limit: int,
 ) -> set[str]:
     """Return hashes of all data rows already on the sheet (skips header row)."""
-    service = build("sheets", "v4", credentials=creds)
+    service = get_service("sheets", "v4", creds)
     try:
-        result = (
-            service.spreadsheets()
-            .values()
-            .get(spreadsheetId=spreadsheet_id, range=f"'{sheet_name}'!A:J")
-            .execute()
-        )
+        rows = _read_rows(service, spreadsheet_id, f"'{sheet_name}'!A:J")
     except HttpError:
         return set()
-    rows = result.get("values", [])
     return {row_hash(r, content_limit) for r in rows[1:]}
 
 
@@ -80,27 +301,30 @@ def append_rows(
     sheet_name: str,
     rows: list[tuple],
     content_limit: int,
+    has_header: bool | None = None,
 ) -> None:
     """
     Append rows to the sheet.
 
     Each row is (sent_date, name, address, email_1, email_2, content,
     nearest_charger, distance_mi, hubspot_contact, hubspot_email).
-    Prepends a header row if the sheet is currently empty.
+    Prepends a header row if the sheet is currently empty. Pass has_header
+    when it is already known to skip the GET that checks for one.
     """
-    service = build("sheets", "v4", credentials=creds)
+    service = get_service("sheets", "v4", creds)
     range_name = f"'{sheet_name}'!A:J"
 
-    try:
-        existing = (
-            service.spreadsheets()
-            .values()
-            .get(spreadsheetId=spreadsheet_id, range=f"'{sheet_name}'!A1:J1")
-            .execute()
-        )
-        has_header = bool(existing.get("values"))
-    except HttpError:
-        has_header = False
+    if has_header is None:
+        try:
+            existing = (
+                service.spreadsheets()
+                .values()
+                .get(spreadsheetId=spreadsheet_id, range=f"'{sheet_name}'!A1:J1")
+                .execute()
+            )
+            has_header = bool(existing.get("values"))
+        except HttpError:
+            has_header = False
 
     def _fmt(r: tuple) -> list:
         sd, nm, addr, e1, e2, body, nc, dm, hs_contact, hs_email = r
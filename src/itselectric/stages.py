@@ -0,0 +1,158 @@
+"""Staged concurrent execution: stages joined by bounded queues.
+
+Each Stage runs its function on its own worker threads, optionally capped to
+a call rate. Items flow through the stages in parallel but run_stages() yields
+results in input order, so the caller can commit them sequentially. A window
+on items in flight gives end-to-end backpressure: a slow stage stalls the
+feeder instead of letting finished items pile up behind it.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator
+
+# Items allowed between being fed in and being yielded, per worker thread.
+_WINDOW_PER_WORKER = 4
+_POLL_SECONDS = 0.1
+_DONE = object()
+
+
+class Throttle:
+    """Spaces calls at least 1/per_second apart across all threads sharing it."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class Stage:
+    """One pipeline step: fn(item) -> item on `workers` threads, at most `rate` calls/s."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        workers: int = 1,
+        rate: float | None = None,
+    ):
+        if workers < 1:
+            raise ValueError(f"Stage {name!r} needs at least one worker")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.throttle = Throttle(rate) if rate else None
+
+
+def run_stages(
+    items: Iterable[Any],
+    stages: list[Stage],
+    queue_size: int = 16,
+) -> Iterator[tuple[Any, Exception | None]]:
+    """
+    Push items through stages concurrently; yield (result, error) in input order.
+
+    An item whose stage raises skips the remaining stages and is yielded with
+    the exception (result is then the last successful value). Closing the
+    generator early stops the feeder and all workers.
+    """
+    if not stages:
+        raise ValueError("run_stages needs at least one stage")
+    stop = threading.Event()
+    queues: list[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    window = threading.Semaphore(sum(s.workers for s in stages) * _WINDOW_PER_WORKER)
+    remaining = [s.workers for s in stages]
+    lock = threading.Lock()
+
+    def _put(q: queue.Queue, value) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(value, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(q: queue.Queue):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _feed() -> None:
+        index = 0
+        try:
+            for item in items:
+                while not window.acquire(timeout=_POLL_SECONDS):
+                    if stop.is_set():
+                        return
+                if not _put(queues[0], (index, item, None)):
+                    return
+                index += 1
+        except Exception as e:  # a failing source ends the run at that position
+            _put(queues[0], (index, None, e))
+        for _ in range(stages[0].workers):
+            _put(queues[0], _DONE)
+
+    def _work(k: int) -> None:
+        stage = stages[k]
+        while True:
+            message = _get(queues[k])
+            if message is _DONE:
+                break
+            index, value, error = message
+            if error is None:
+                try:
+                    if stage.throttle:
+                        stage.throttle.wait()
+                    value = stage.fn(value)
+                except Exception as e:
+                    error = e
+            if not _put(queues[k + 1], (index, value, error)):
+                return
+        with lock:
+            remaining[k] -= 1
+            last = remaining[k] == 0
+        if last:
+            downstream = stages[k + 1].workers if k + 1 < len(stages) else 1
+            for _ in range(downstream):
+                _put(queues[k + 1], _DONE)
+
+    threads = [threading.Thread(target=_feed, daemon=True, name="stage-feed")]
+    for k, stage in enumerate(stages):
+        threads += [
+            threading.Thread(target=_work, args=(k,), daemon=True, name=f"stage-{stage.name}-{w}")
+            for w in range(stage.workers)
+        ]
+    for t in threads:
+        t.start()
+
+    try:
+        pending: dict[int, tuple[Any, Exception | None]] = {}
+        next_index = 0
+        while True:
+            message = _get(queues[-1])
+            if message is _DONE:
+                break
+            index, value, error = message
+            pending[index] = (value, error)
+            while next_index in pending:
+                result = pending.pop(next_index)
+                next_index += 1
+                window.release()
+                yield result
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
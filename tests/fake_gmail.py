@@ -0,0 +1,183 @@
+"""In-memory stand-in for the Gmail API client returned by google_api.get_service().
+
+Supports the calls gmail.py makes — labels.list, messages.list/get,
+history.list, getProfile and HTTP batches — with Gmail's paging and historyId
+semantics, so sync logic can be tested offline. Every API call is recorded in
+`calls`; fail_next() injects transient errors.
+"""
+
+import httplib2  # type: ignore
+from googleapiclient.errors import HttpError  # type: ignore
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+def _http_error(status: int, reason: str) -> HttpError:
+    return HttpError(httplib2.Response({"status": status, "reason": reason}), reason.encode())
+
+
+class _Batch:
+    """Mimics BatchHttpRequest: every call runs, each result goes to the callback."""
+
+    def __init__(self, gmail: "FakeGmailService", callback):
+        self._gmail = gmail
+        self._callback = callback
+        self._requests: list[tuple[str, _Request]] = []
+
+    def add(self, request, callback=None, request_id=None):
+        if len(self._requests) >= 100:
+            raise ValueError("Gmail batches are limited to 100 calls")
+        self._requests.append((request_id or str(len(self._requests)), request))
+
+    def execute(self):
+        self._gmail.calls.append("batch")
+        for request_id, request in self._requests:
+            try:
+                response, exception = request.execute(), None
+            except HttpError as e:
+                response, exception = None, e
+            self._callback(request_id, response, exception)
+
+
+class _Labels:
+    def __init__(self, gmail: "FakeGmailService"):
+        self._gmail = gmail
+
+    def list(self, userId):
+        self._gmail.calls.append("labels.list")
+        labels = [{"id": i, "name": n} for n, i in self._gmail.label_ids.items()]
+        return _Request(lambda: {"labels": labels})
+
+
+class _Messages:
+    def __init__(self, gmail: "FakeGmailService"):
+        self._gmail = gmail
+
+    def list(self, userId, labelIds, maxResults=100, pageToken=None):
+        self._gmail.calls.append("messages.list")
+        newest_first = [
+            {"id": m_id}
+            for m_id, m in reversed(self._gmail.messages.items())
+            if set(labelIds) <= set(m["labelIds"])
+        ]
+        start = int(pageToken or 0)
+        end = start + min(maxResults, 500)
+        response: dict = {"messages": newest_first[start:end]}
+        if end < len(newest_first):
+            response["nextPageToken"] = str(end)
+        return _Request(lambda: response)
+
+    def get(self, userId, id):
+        self._gmail.calls.append("messages.get")
+
+        def _get():
+            failures = self._gmail.failures.get(id)
+            if failures:
+                status = failures.pop(0)
+                raise _http_error(status, "rateLimitExceeded" if status == 403 else "Error")
+            if id not in self._gmail.messages:
+                raise _http_error(404, "Not Found")
+            return self._gmail.messages[id]
+
+        return _Request(_get)
+
+
+class _History:
+    def __init__(self, gmail: "FakeGmailService"):
+        self._gmail = gmail
+
+    def list(self, userId, startHistoryId, labelId=None, historyTypes=None, pageToken=None):
+        gmail = self._gmail
+        gmail.calls.append("history.list")
+
+        def _list():
+            if int(startHistoryId) < gmail.oldest_history_id:
+                raise _http_error(404, "Requested entity was not found.")
+            records = [
+                r
+                for r in gmail.history
+                if int(r["id"]) > int(startHistoryId)
+                and (
+                    labelId is None
+                    or any(labelId in m["message"]["labelIds"] for m in r["messagesAdded"])
+                )
+            ]
+            start = int(pageToken or 0)
+            page = records[start : start + gmail.history_page_size]
+            response: dict = {"historyId": str(gmail.history_id)}
+            if page:
+                response["history"] = page
+            if start + gmail.history_page_size < len(records):
+                response["nextPageToken"] = str(start + gmail.history_page_size)
+            return response
+
+        return _Request(_list)
+
+
+class _Users:
+    def __init__(self, gmail: "FakeGmailService"):
+        self._gmail = gmail
+
+    def labels(self):
+        return _Labels(self._gmail)
+
+    def messages(self):
+        return _Messages(self._gmail)
+
+    def history(self):
+        return _History(self._gmail)
+
+    def getProfile(self, userId):
+        self._gmail.calls.append("getProfile")
+        return _Request(lambda: {"historyId": str(self._gmail.history_id)})
+
+
+class FakeGmailService:
+    def __init__(self, label_ids: dict[str, str] | None = None, history_page_size: int = 100):
+        self.label_ids = label_ids or {"INBOX": "INBOX"}  # name -> id
+        self.history_page_size = history_page_size
+        self.messages: dict[str, dict] = {}
+        self.history: list[dict] = []
+        self.history_id = 1000
+        self.oldest_history_id = 1000
+        self.calls: list[str] = []
+        self.failures: dict[str, list[int]] = {}  # message id -> statuses to fail with
+
+    def users(self):
+        return _Users(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    def add_message(self, message: dict, label: str = "INBOX") -> None:
+        """Deliver a message to label, recording a messageAdded history entry."""
+        self.history_id += 1
+        label_ids = [self.label_ids[label]]
+        self.messages[message["id"]] = {**message, "labelIds": label_ids}
+        self.history.append(
+            {
+                "id": str(self.history_id),
+                "messagesAdded": [{"message": {"id": message["id"], "labelIds": label_ids}}],
+            }
+        )
+
+    def fail_next(self, message_id: str, *statuses: int) -> None:
+        """Make the next messages.get calls for message_id fail with these statuses."""
+        self.failures.setdefault(message_id, []).extend(statuses)
+
+    def delete_message(self, message_id: str) -> None:
+        self.messages.pop(message_id, None)
+
+    def expire_history(self) -> None:
+        """Drop all history records, as Gmail does after about a week."""
+        self.oldest_history_id = self.history_id + 1
+        self.history.clear()
+
+    def count(self, call: str) -> int:
+        return self.calls.count(call)
@@ -49,3 +49,34 @@ def test_decision_tree_test_no_tree(client):
     client.put("/api/decision-tree", json={"type": "leaf", "template": "x"})
     resp = client.post("/api/decision-tree/test")
     assert resp.status_code in (200, 400)
+
+
+def test_decision_tree_backtest_streams_progress_and_result(client):
+    import json
+
+    from server.models import Charger, Contact
+
+    with server.main.app.state.session_factory() as s:
+        charger = s.query(Charger).first()
+        s.add(Contact(id="bt1", address="1 Main St, Boston, MA", parse_status="parsed",
+                      nearest_charger_id=charger.id, distance_miles=2.0))
+        s.commit()
+    tree = {"template": "waitlist"}
+    resp = client.post("/api/decision-tree/backtest", json=tree)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    lines = [ln[len("data: "):] for ln in resp.text.splitlines() if ln.startswith("data: ")]
+    assert lines[-1] == "[done]"
+    events = [json.loads(ln) for ln in lines[:-1]]
+    assert events[0]["type"] == "progress"
+    result = events[-1]
+    assert result["type"] == "result"
+    assert result["changed"] == 1
+    assert result["transitions"] == [{"from": None, "to": "waitlist", "count": 1}]
+
+
+def test_decision_tree_backtest_rejects_invalid_tree(client):
+    bad = {"condition": {"field": "x", "op": "nope", "value": 1},
+           "then": {"template": "a"}, "else": {"template": "b"}}
+    resp = client.post("/api/decision-tree/backtest", json=bad)
+    assert resp.status_code == 400
@@ -2,11 +2,14 @@
 import pytest
 import server.main
 from fastapi.testclient import TestClient
+from server.job_handlers import reset_credentials
 
 
 @pytest.fixture()
 def client(tmp_path, monkeypatch):
     monkeypatch.setattr(server.main, "DB_URL", f"sqlite:///{tmp_path}/test.db")
+    monkeypatch.setattr(server.main, "JOB_POLL_SECONDS", 0.02)
+    reset_credentials()
     with TestClient(server.main.app) as c:
         yield c
 
@@ -38,9 +41,107 @@ def test_send_contact_not_found(client):
     assert resp.status_code == 404
 
 
+def _wait_for_send_batch(client, batch_id: str) -> dict:
+    import time
+
+    deadline = time.monotonic() + 5
+    while True:
+        data = client.get(f"/api/contacts/send-batch/{batch_id}").json()
+        if data["status"] != "running" or time.monotonic() > deadline:
+            return data
+        time.sleep(0.02)
+
+
 def test_send_batch_empty(client):
     resp = client.post("/api/contacts/send-batch")
     assert resp.status_code == 200
     data = resp.json()
-    assert "sent" in data
-    assert data["sent"] == 0
+    assert (data["status"], data["total"], data["sent"], data["skipped"]) == ("completed", 0, 0, 0)
+
+
+def test_send_batch_queues_jobs_and_reports_progress(client):
+    from unittest.mock import MagicMock, patch
+
+    from server.models import Contact, OutboundEmail
+
+    with server.main.app.state.session_factory() as s:
+        for i in range(3):
+            s.add(Contact(id=f"sb{i}", name="Ada", email_primary=f"sb{i}@example.com",
+                          parse_status="parsed"))
+            s.add(OutboundEmail(contact_id=f"sb{i}", subject="Hi", body_html="<p>Hi</p>"))
+        s.commit()
+
+    with (
+        patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+        patch("server.job_handlers.send_email", return_value=True) as send,
+        patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+    ):
+        batch_id = client.post("/api/contacts/send-batch").json()["batch_id"]
+        done = _wait_for_send_batch(client, batch_id)
+
+    assert done["status"] == "completed"
+    assert (done["total"], done["sent"], done["done"]) == (3, 3, 3)
+    assert send.call_count == 3
+    with server.main.app.state.session_factory() as s:
+        assert s.query(OutboundEmail).filter_by(status="sent").count() == 3
+
+
+def test_send_batch_status_unknown_job(client):
+    assert client.get("/api/contacts/send-batch/nope").status_code == 404
+
+
+def test_reroute_assigns_nearest_charger(client):
+    import server.main
+    from server.models import Charger, Contact, GeoCache
+
+    with server.main.app.state.session_factory() as s:
+        s.query(Charger).delete()
+        s.add(Charger(id=1, street="1 Far St", city="Boston", state="MA", lat=42.36, lon=-71.06))
+        s.add(Charger(id=2, street="1 Near St", city="Brooklyn", state="NY", lat=40.69, lon=-73.99))
+        s.add(Contact(id="c1", address="1 Atlantic Ave, Brooklyn, NY", parse_status="parsed"))
+        s.add(Contact(id="c2", address="Nowhere", parse_status="parsed"))
+        s.add(GeoCache(address="1 ATLANTIC AVE BROOKLYN NY", lat=40.6929, lon=-73.9958))
+        s.commit()
+
+    resp = client.post("/api/contacts/reroute")
+    assert resp.status_code == 200
+    assert resp.json() == {"updated": 1, "unchanged": 0, "not_geocoded": 1}
+
+    with server.main.app.state.session_factory() as s:
+        contact = s.get(Contact, "c1")
+        assert contact.nearest_charger_id == 2
+        assert contact.distance_miles < 1
+
+
+def test_hubspot_sync_requires_token(client):
+    assert client.post("/api/contacts/hubspot-sync").status_code == 400
+
+
+def test_hubspot_sync_skips_unchanged_unless_forced(client):
+    from unittest.mock import patch
+
+    import server.main
+    from server.models import AppConfig, Contact
+
+    with server.main.app.state.session_factory() as s:
+        s.add(AppConfig(key="hubspot_access_token", value="tok"))
+        s.add(Contact(id="c1", name="Jane Smith", email_primary="jane@example.com",
+                      address="1 Main St, Brooklyn, NY 11201", parse_status="parsed"))
+        s.add(Contact(id="c2", raw_body="?", parse_status="unparsed"))
+        s.commit()
+
+    sent = []
+
+    def _upsert(token, contacts):
+        sent.append(len(contacts))
+        return {email: "hs-1" for _, email, _ in contacts}
+
+    with patch("server.pipeline_service.upsert_contacts", side_effect=_upsert):
+        first = client.post("/api/contacts/hubspot-sync").json()
+        second = client.post("/api/contacts/hubspot-sync").json()
+        forced = client.post("/api/contacts/hubspot-sync?force=true").json()
+
+    assert first == {"sent": 1, "unchanged": 0, "failed": 0}
+    assert second == {"sent": 0, "unchanged": 1, "failed": 0}
+    assert forced == {"sent": 1, "unchanged": 0, "failed": 0}
+    assert sent == [1, 1]
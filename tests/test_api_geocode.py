@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import server.main
+from fastapi.testclient import TestClient
+from server.models import GeocodeFailure
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(server.main, "DB_URL", f"sqlite:///{tmp_path}/test.db")
+    with TestClient(server.main.app) as c:
+        yield c
+
+
+def _add_failures():
+    old = datetime.now(timezone.utc) - timedelta(days=30)
+    with server.main.app.state.session_factory() as session:
+        session.add(GeocodeFailure(address="1 NOWHERE RD", reason="not_found"))
+        session.add(
+            GeocodeFailure(
+                address="2 NOWHERE RD", reason="not_found", first_failed_at=old, last_failed_at=old
+            )
+        )
+        session.commit()
+
+
+def test_list_geocode_failures(client):
+    _add_failures()
+    resp = client.get("/api/geocode-failures")
+    assert resp.status_code == 200
+    data = {f["address"]: f for f in resp.json()}
+    assert data["1 NOWHERE RD"]["expired"] is False
+    assert data["2 NOWHERE RD"]["expired"] is True
+    assert data["1 NOWHERE RD"]["reason"] == "not_found"
+
+
+def test_purge_expired_geocode_failures(client):
+    _add_failures()
+    resp = client.delete("/api/geocode-failures", params={"expired_only": True})
+    assert resp.json() == {"deleted": 1}
+    assert [f["address"] for f in client.get("/api/geocode-failures").json()] == ["1 NOWHERE RD"]
+
+
+def test_purge_geocode_failure_by_address(client):
+    _add_failures()
+    resp = client.delete("/api/geocode-failures", params={"address": "1 Nowhere Road"})
+    assert resp.json() == {"deleted": 1}
@@ -0,0 +1,90 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import server.main
+from fastapi.testclient import TestClient
+from server.job_handlers import reset_credentials
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(server.main, "DB_URL", f"sqlite:///{tmp_path}/test.db")
+    monkeypatch.setattr(server.main, "JOB_POLL_SECONDS", 0.02)
+    reset_credentials()
+    with TestClient(server.main.app) as c:
+        yield c
+
+
+def _wait_for_job(client, job_id: str) -> dict:
+    deadline = time.monotonic() + 5
+    while True:
+        data = client.get(f"/api/jobs/{job_id}").json()
+        if data["status"] in ("succeeded", "dead") or time.monotonic() > deadline:
+            return data
+        time.sleep(0.02)
+
+
+def _pending_email(contact_id: str = "c1") -> None:
+    from server.models import Contact, OutboundEmail
+
+    with server.main.app.state.session_factory() as s:
+        s.add(Contact(id=contact_id, name="Ada", email_primary="ada@example.com",
+                      parse_status="parsed"))
+        s.add(OutboundEmail(contact_id=contact_id, subject="Hi", body_html="<p>Hi</p>"))
+        s.commit()
+
+
+def test_send_contact_email_returns_before_the_worker_sends(client):
+    from server.models import OutboundEmail
+
+    _pending_email()
+    with (
+        patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+        patch("server.job_handlers.send_email", return_value=True) as send,
+        patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+    ):
+        resp = client.post("/api/contacts/c1/send")
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "queued"
+        job = _wait_for_job(client, resp.json()["job_id"])
+
+    assert (job["kind"], job["status"], job["attempts"]) == ("send_email", "succeeded", 1)
+    assert send.call_count == 1
+    with server.main.app.state.session_factory() as s:
+        assert s.query(OutboundEmail).filter_by(contact_id="c1").one().status == "sent"
+    # The email is no longer pending, so it cannot be queued twice.
+    assert client.post("/api/contacts/c1/send").status_code == 404
+
+
+def test_list_stats_and_retry_jobs(client):
+    from server.job_queue import enqueue
+
+    with server.main.app.state.session_factory() as s:
+        job = enqueue(s, "no_such_kind", {"x": 1})
+        job_id = job.id
+        s.commit()
+    assert _wait_for_job(client, job_id)["status"] == "dead"
+
+    jobs = client.get("/api/jobs?status=dead").json()
+    assert [j["id"] for j in jobs] == [job_id]
+    assert client.get("/api/jobs?kind=send_email").json() == []
+    assert client.get("/api/jobs/stats").json() == {"no_such_kind": {"dead": 1}}
+
+    assert client.post(f"/api/jobs/{job_id}/retry").status_code == 200
+    # Dead again after one attempt of its fresh budget (no handler is permanent).
+    again = _wait_for_job(client, job_id)
+    assert (again["status"], again["attempts"]) == ("dead", 1)
+
+
+def test_retry_unknown_or_succeeded_job(client):
+    from server.job_queue import enqueue
+
+    assert client.get("/api/jobs/nope").status_code == 404
+    assert client.post("/api/jobs/nope/retry").status_code == 404
+    with server.main.app.state.session_factory() as s:
+        job = enqueue(s, "no_such_kind", {})
+        job.status = "succeeded"
+        job_id = job.id
+        s.commit()
+    assert client.post(f"/api/jobs/{job_id}/retry").status_code == 409
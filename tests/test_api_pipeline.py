@@ -41,3 +41,47 @@ def test_pipeline_status_fields_present():
     assert "status" in data
     assert "last_run_at" in data
     assert "run_id" in data
+
+
+def test_list_pipeline_runs(tmp_path, monkeypatch):
+    import server.main
+    from server.models import PipelineRun
+
+    monkeypatch.setattr(server.main, "DB_URL", f"sqlite:///{tmp_path}/test.db")
+    with TestClient(app) as client:
+        with app.state.session_factory() as session:
+            session.add(PipelineRun(id="r1", label="INBOX", total=10, cursor=4, status="failed"))
+            session.commit()
+        resp = client.get("/api/pipeline/runs")
+
+    assert resp.status_code == 200
+    [run] = resp.json()
+    assert (run["id"], run["status"], run["cursor"], run["total"]) == ("r1", "failed", 4, 10)
+
+
+def test_startup_marks_running_runs_interrupted(tmp_path, monkeypatch):
+    import server.main
+    from server.models import PipelineRun
+
+    monkeypatch.setattr(server.main, "DB_URL", f"sqlite:///{tmp_path}/test.db")
+    with TestClient(app):
+        with app.state.session_factory() as session:
+            session.add(PipelineRun(id="r1", label="INBOX", status="running"))
+            session.commit()
+    with TestClient(app) as client:
+        assert client.get("/api/pipeline/runs").json()[0]["status"] == "interrupted"
+
+
+def test_http_metrics_reports_shared_client_hosts():
+    import httpx
+    from src.itselectric.http_client import HttpClient, set_client
+
+    stub = HttpClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+    previous = set_client(stub)
+    try:
+        stub.get("https://api.hubapi.com/crm/v3/objects/contacts/batch/upsert")
+        resp = TestClient(app).get("/api/pipeline/http-metrics")
+    finally:
+        set_client(previous)
+    assert resp.status_code == 200
+    assert resp.json()["hosts"]["api.hubapi.com"]["requests"] == 1
@@ -0,0 +1,81 @@
+"""Tests for replaying a decision tree over stored contacts."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import server.models  # noqa: F401
+from server.backtest_service import backtest_tree
+from server.db import Base
+from server.models import Charger, Contact, OutboundEmail
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+_NEAR_IS_GENERAL = {
+    "condition": {"field": "distance_miles", "op": "lte", "value": 5},
+    "then": {"template": "tell_me_more_general"},
+    "else": {"template": "waitlist"},
+}
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    s = sessionmaker(bind=engine)()
+    s.add(Charger(id=1, street="1 Main St", city="Brooklyn", state="NY", lat=40.69, lon=-73.99))
+    t0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i, distance in enumerate([1.0, 3.0, 8.0, 20.0]):
+        s.add(Contact(
+            id=f"c{i}", address=f"{i} Atlantic Ave, Brooklyn, NY 11201",
+            parse_status="parsed", nearest_charger_id=1, distance_miles=distance,
+        ))
+        s.add(OutboundEmail(contact_id=f"c{i}", routed_template="waitlist", created_at=t0))
+    # c0 was re-routed later; the newest row is the baseline.
+    s.add(OutboundEmail(
+        contact_id="c0", routed_template="tell_me_more_general", created_at=t0 + timedelta(days=1)
+    ))
+    # Never geocoded: not routable, so not counted.
+    s.add(Contact(id="c9", address="Nowhere", parse_status="parsed"))
+    s.commit()
+    yield s
+    s.close()
+
+
+def test_diff_against_latest_routed_template(session):
+    events = list(backtest_tree(session, _NEAR_IS_GENERAL, batch_size=3))
+    assert [e["type"] for e in events] == ["progress", "progress", "result"]
+    assert events[0] == {"type": "progress", "done": 3, "total": 4}
+    result = events[-1]
+    assert result["evaluated"] == 4
+    assert result["changed"] == 1  # only c1 moves; c0 already had the general template
+    assert result["transitions"] == [
+        {"from": "waitlist", "to": "tell_me_more_general", "count": 1}
+    ]
+    by_name = {row["template"]: row for row in result["templates"]}
+    assert by_name["tell_me_more_general"] == {
+        "template": "tell_me_more_general", "before": 1, "after": 2, "delta": 1,
+    }
+    assert by_name["waitlist"]["delta"] == -1
+
+
+def test_uses_extracted_driver_state(session):
+    tree = {
+        "dispatch": {
+            "field": "driver_state",
+            "cases": {"NY": {"template": "tell_me_more_brooklyn"}},
+            "default": {"template": None},
+        },
+    }
+    result = list(backtest_tree(session, tree))[-1]
+    assert result["templates"] == [
+        {"template": "tell_me_more_brooklyn", "before": 0, "after": 4, "delta": 4},
+        {"template": "tell_me_more_general", "before": 1, "after": 0, "delta": -1},
+        {"template": "waitlist", "before": 3, "after": 0, "delta": -3},
+    ]
+
+
+def test_invalid_tree_raises_before_reading(session):
+    bad = {"condition": {"field": "x", "op": "nope", "value": 1},
+           "then": {"template": "a"}, "else": {"template": "b"}}
+    with pytest.raises(ValueError, match="Unknown operator"):
+        backtest_tree(session, bad)
@@ -5,7 +5,10 @@ from pathlib import Path
 import pytest  # type: ignore
 import yaml  # type: ignore
 
-from itselectric.decision_tree import evaluate  # type: ignore
+from itselectric.decision_tree import (  # type: ignore
+    compile_tree,
+    evaluate,
+)
 
 _TREE_PATH = Path(__file__).parent.parent / "decision_tree.example.yaml"
 
@@ -257,3 +260,180 @@ class TestRealDecisionTree:
     def test_mi_driver_far_from_charger_gets_waitlist(self):
         ctx = self._ctx(driver="MI", charger_state="MI", charger_city="Detroit", distance=50)
         assert evaluate(self._tree, ctx) == "waitlist"
+
+
+class TestCompileTree:
+    def _tree(self):
+        with open(_TREE_PATH) as f:
+            return yaml.safe_load(f)
+
+    def test_matches_evaluate_on_real_tree(self):
+        tree = self._tree()
+        route = compile_tree(tree)
+        for driver in ("CA", "ny", "MA", "DC", "MI", "NJ", None):
+            for charger_state, city in (
+                ("CA", "Los Angeles"), ("CA", "San Francisco"), ("NY", "brooklyn"),
+                ("NY", "Newburgh"), ("MA", "Boston"), ("DC", "Washington"), ("MI", "Detroit"),
+            ):
+                for distance in (0.1, 0.5, 0.75, 1.3, 5, 7, 15, 50, 100, 243):
+                    ctx = {
+                        "driver_state": driver,
+                        "charger_state": charger_state,
+                        "charger_city": city,
+                        "distance_miles": distance,
+                    }
+                    assert route(ctx) == evaluate(tree, ctx), ctx
+
+    def test_ne_and_eq_are_case_insensitive(self):
+        route = compile_tree({
+            "condition": {"field": "driver_state", "op": "ne", "value": "ca"},
+            "then": {"template": "other"},
+            "else": {"template": "ca"},
+        })
+        assert route({"driver_state": "CA"}) == "ca"
+        assert route({"driver_state": "TX"}) == "other"
+
+    def test_unhashable_in_operand_still_compiles(self):
+        route = compile_tree({
+            "condition": {"field": "x", "op": "in", "value": [[1, 2], "A"]},
+            "then": {"template": "yes"},
+            "else": {"template": "no"},
+        })
+        assert route({"x": "a"}) == "yes"
+        assert route({"x": "b"}) == "no"
+
+    def test_recompiling_an_equal_tree_is_cached(self):
+        tree = self._tree()
+        assert compile_tree(tree) is compile_tree(self._tree())
+
+    def test_unknown_op_in_unreached_branch_fails_at_compile_time(self):
+        node = {
+            "condition": {"field": "distance_miles", "op": "lt", "value": 10},
+            "then": {"template": "a"},
+            "else": {
+                "condition": {"field": "distance_miles", "op": "contains", "value": 5},
+                "then": {"template": "b"},
+                "else": {"template": "c"},
+            },
+        }
+        with pytest.raises(ValueError, match="Unknown operator"):
+            compile_tree(node)
+
+    def test_malformed_branch_raises_value_error(self):
+        node = {"condition": {"field": "distance_miles", "op": "lt", "value": 10}}
+        with pytest.raises(ValueError, match="Malformed"):
+            compile_tree(node)
+
+    def test_in_with_a_non_list_operand_fails_at_compile_time(self):
+        node = {
+            "condition": {"field": "driver_state", "op": "in", "value": 5},
+            "then": {"template": "a"},
+            "else": {"template": "b"},
+        }
+        with pytest.raises(ValueError, match="'in' operator needs a list"):
+            compile_tree(node)
+
+    def test_non_mapping_node_raises_value_error(self):
+        node = {
+            "condition": {"field": "distance_miles", "op": "lt", "value": 10},
+            "then": 5,
+            "else": {"template": "b"},
+        }
+        with pytest.raises(ValueError, match="must be a mapping"):
+            compile_tree(node)
+
+    def test_type_mismatch_at_routing_raises_value_error(self):
+        by_range = compile_tree({
+            "range": {
+                "field": "driver_state",
+                "thresholds": [10],
+                "branches": [{"template": "a"}, {"template": "b"}],
+            },
+        })
+        with pytest.raises(ValueError, match="needs a number"):
+            by_range({"driver_state": "NY"})
+        by_op = compile_tree({
+            "condition": {"field": "driver_state", "op": "lt", "value": 10},
+            "then": {"template": "a"},
+            "else": {"template": "b"},
+        })
+        with pytest.raises(ValueError, match="Cannot apply 'lt'"):
+            by_op({"driver_state": "NY"})
+
+    def test_missing_context_field_raises_key_error(self):
+        route = compile_tree({
+            "condition": {"field": "distance_miles", "op": "lt", "value": 10},
+            "then": {"template": "a"},
+            "else": {"template": "b"},
+        })
+        with pytest.raises(KeyError):
+            route({})
+
+
+class TestDispatchAndRange:
+    _TREE = {
+        "dispatch": {
+            "field": "driver_state",
+            "cases": {
+                "ca": {"template": "tell_me_more_general"},
+                "NY": {
+                    "range": {
+                        "field": "distance_miles",
+                        "thresholds": [0.5, 5, 100],
+                        "branches": [
+                            {"template": "general_car_info"},
+                            {"template": "tell_me_more_brooklyn"},
+                            {"template": "waitlist"},
+                            {"template": None},
+                        ],
+                    },
+                },
+            },
+            "default": {"template": "waitlist"},
+        },
+    }
+
+    @pytest.mark.parametrize("route", [
+        lambda tree, ctx: evaluate(tree, ctx),
+        lambda tree, ctx: compile_tree(tree)(ctx),
+    ], ids=["evaluate", "compiled"])
+    @pytest.mark.parametrize("state,distance,expected", [
+        ("CA", 50, "tell_me_more_general"),
+        ("ny", 0.5, "general_car_info"),  # thresholds are inclusive upper bounds
+        ("NY", 0.51, "tell_me_more_brooklyn"),
+        ("NY", 5, "tell_me_more_brooklyn"),
+        ("NY", 100, "waitlist"),
+        ("NY", 243, None),
+        ("TX", 1, "waitlist"),
+        (None, 1, "waitlist"),
+    ])
+    def test_routes(self, route, state, distance, expected):
+        ctx = {"driver_state": state, "distance_miles": distance}
+        assert route(self._TREE, ctx) == expected
+
+    def test_missing_field_raises_key_error(self):
+        with pytest.raises(KeyError):
+            compile_tree(self._TREE)({"distance_miles": 1})
+
+    def test_unsorted_thresholds_rejected(self):
+        node = {"range": {"field": "distance_miles", "thresholds": [5, 0.5],
+                          "branches": [{"template": "a"}] * 3}}
+        with pytest.raises(ValueError, match="ascend"):
+            compile_tree(node)
+
+    def test_branch_count_must_match_thresholds(self):
+        node = {"range": {"field": "distance_miles", "thresholds": [5],
+                          "branches": [{"template": "a"}]}}
+        with pytest.raises(ValueError, match="needs 2 branches"):
+            compile_tree(node)
+
+    def test_duplicate_case_after_normalising_rejected(self):
+        node = {"dispatch": {"field": "driver_state", "default": {"template": None},
+                             "cases": {"CA": {"template": "a"}, "ca": {"template": "b"}}}}
+        with pytest.raises(ValueError, match="Duplicate"):
+            compile_tree(node)
+
+    def test_dispatch_requires_default(self):
+        node = {"dispatch": {"field": "driver_state", "cases": {"CA": {"template": "a"}}}}
+        with pytest.raises(ValueError, match="Malformed dispatch"):
+            compile_tree(node)
@@ -25,3 +25,46 @@ def test_render_email_has_footer():
 def test_render_empty_body():
     html = render_email("")
     assert "<!DOCTYPE html>" in html
+
+
+def test_compiled_template_matches_substitute_then_render():
+    from datetime import datetime, timezone
+
+    from src.itselectric.email_layout import render_template
+
+    md = "# Hi {name}\n\nYour nearest charger is in **{city}**, {state}."
+    variables = {"name": "Ada", "city": "Brooklyn", "state": "NY"}
+    html = render_template("t", datetime(2024, 1, 1, tzinfo=timezone.utc), md, variables)
+    assert html == render_email(md.format_map(variables))
+
+
+def test_compiled_template_escapes_values():
+    from src.itselectric.email_layout import CompiledEmail
+
+    html = CompiledEmail("Hello {name}, [map](https://maps.example/?q={address})").render(
+        {"name": "<script>x</script>", "address": '1 "Main" St & Co'}
+    )
+    assert "<script>" not in html
+    assert "&lt;script&gt;x&lt;/script&gt;" in html
+    assert 'href="https://maps.example/?q=1 &quot;Main&quot; St &amp; Co"' in html
+
+
+def test_compiled_template_keeps_unknown_placeholders_and_brace_escapes():
+    from src.itselectric.email_layout import CompiledEmail
+
+    html = CompiledEmail("Hi {name} {unknown} {{literal}}").render({"name": "Ada"})
+    assert "Hi Ada {unknown} {literal}" in html
+
+
+def test_compiled_template_cache_is_keyed_by_name_and_updated_at():
+    from datetime import datetime, timezone
+
+    from src.itselectric.email_layout import compiled_template
+
+    v1 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    v2 = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    first = compiled_template("cache_test", v1, "old {name}")
+    assert compiled_template("cache_test", v1, "old {name}") is first
+    edited = compiled_template("cache_test", v2, "new {name}")
+    assert edited is not first
+    assert "new Ada" in edited.render({"name": "Ada"})
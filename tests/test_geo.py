@@ -2,16 +2,26 @@
 
 import json
 import textwrap
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest  # type: ignore
 
 from itselectric.geo import (  # type: ignore
+    GEOCODE_NOT_FOUND,
+    GEOCODE_SERVICE_ERROR,
+    ChargerIndex,
+    GeocodeCache,
     _strip_unit,
+    canonicalize_address,
     extract_state_from_address,
     find_nearest_charger,
     geocode_address,
+    haversine_miles,
     load_chargers,
+    migrate_json_geocache,
+    nearest_chargers_batch,
+    open_geocode_cache,
 )
 
 # ── _strip_unit ───────────────────────────────────────────────────────────────
@@ -99,6 +109,42 @@ def test_geocode_address_apt_variants_share_cache_entry(tmp_path):
         assert mock_fn.call_count == 1
 
 
+# ── canonicalize_address ──────────────────────────────────────────────────────
+
+
+@pytest.mark.parametrize(
+    "address",
+    [
+        "15 Washington St., Brooklyn, NY 11205",
+        "15 washington street brooklyn ny 11205",
+        "15  Washington  Street , Brooklyn,NY 11205-1234",
+        "15 Washington St, Apt 4B, Brooklyn, NY 11205",
+        "15 Washington Str, Brooklyn, New York 11205",
+    ],
+)
+def test_canonicalize_address_variants_share_key(address):
+    assert canonicalize_address(address) == "15 WASHINGTON ST BROOKLYN NY 11205"
+
+
+def test_canonicalize_address_directionals():
+    assert canonicalize_address("123 North Vermont Avenue, Los Angeles, CA") == (
+        canonicalize_address("123 N. Vermont Ave, Los Angeles, CA")
+    )
+
+
+def test_canonicalize_address_inline_unit_keeps_city():
+    assert canonicalize_address("1 Main St Apt 5 Boston MA") == "1 MAIN ST BOSTON MA"
+
+
+def test_canonicalize_address_keeps_queens_house_number_hyphen():
+    assert canonicalize_address("12-34 Main St, Queens, NY") == "12-34 MAIN ST QUEENS NY"
+
+
+def test_canonicalize_address_empty():
+    assert canonicalize_address("") == ""
+    assert canonicalize_address(None) == ""
+
+
 # ── load_chargers ─────────────────────────────────────────────────────────────
 
 
@@ -250,6 +296,115 @@ def test_find_nearest_charger_returns_float_distance():
     assert dist > 0
 
 
+# ── ChargerIndex ──────────────────────────────────────────────────────────────
+
+
+def _linear_nearest(lat, lon, chargers):
+    from geopy.distance import geodesic  # type: ignore
+
+    nearest = min(chargers, key=lambda c: geodesic((lat, lon), (c["lat"], c["lon"])).miles)
+    return nearest, round(geodesic((lat, lon), (nearest["lat"], nearest["lon"])).miles, 2)
+
+
+def test_charger_index_matches_linear_geodesic_scan():
+    import random
+
+    rng = random.Random(7)
+    chargers = load_chargers() + [
+        {"name": f"R{i}", "lat": rng.uniform(-80, 80), "lon": rng.uniform(-180, 180)}
+        for i in range(500)
+    ]
+    index = ChargerIndex(chargers)
+    for _ in range(100):
+        lat, lon = rng.uniform(-80, 80), rng.uniform(-180, 180)
+        got_charger, got_dist = index.nearest(lat, lon)
+        want_charger, want_dist = _linear_nearest(lat, lon, chargers)
+        assert got_charger is want_charger
+        assert got_dist == want_dist
+
+
+def test_charger_index_refines_only_a_few_candidates():
+    index = ChargerIndex(load_chargers())
+    assert 1 <= len(index.candidates(40.6929, -73.9958)) < len(index)
+
+
+def test_charger_index_crosses_antimeridian():
+    chargers = [
+        {"name": "West", "lat": 0.0, "lon": 179.9},
+        {"name": "Far", "lat": 0.0, "lon": 170.0},
+    ]
+    charger, _ = ChargerIndex(chargers).nearest(0.0, -179.9)
+    assert charger["name"] == "West"
+
+
+def test_charger_index_tie_keeps_first_charger():
+    chargers = [
+        {"name": "First", "lat": 40.0, "lon": -74.0},
+        {"name": "Second", "lat": 40.0, "lon": -74.0},
+    ]
+    charger, _ = ChargerIndex(chargers).nearest(40.1, -74.1)
+    assert charger["name"] == "First"
+
+
+def test_charger_index_empty():
+    assert ChargerIndex([]).nearest(40.0, -74.0) is None
+
+
+def test_find_nearest_charger_accepts_prebuilt_index():
+    assert find_nearest_charger(40.700, -73.972, ChargerIndex(CHARGERS))[0]["name"] == "Hub A"
+
+
+def test_haversine_miles_close_to_geodesic():
+    from geopy.distance import geodesic  # type: ignore
+
+    boston, la = (42.3601, -71.0589), (34.0522, -118.2437)
+    approx = haversine_miles(*boston, *la)
+    assert approx == pytest.approx(geodesic(boston, la).miles, rel=0.006)
+
+
+# ── nearest_chargers_batch ────────────────────────────────────────────────────
+
+
+def _random_points(rng, n):
+    return [rng.uniform(25, 49) for _ in range(n)], [rng.uniform(-124, -67) for _ in range(n)]
+
+
+def test_nearest_chargers_batch_exact_matches_find_nearest_charger():
+    import random
+
+    rng = random.Random(11)
+    extra_lats, extra_lons = _random_points(rng, 300)
+    chargers = load_chargers() + [
+        {"name": f"R{i}", "lat": lat, "lon": lon}
+        for i, (lat, lon) in enumerate(zip(extra_lats, extra_lons))
+    ]
+    lats, lons = _random_points(rng, 200)
+    indices, distances = nearest_chargers_batch(lats, lons, ChargerIndex(chargers), exact=True)
+    for lat, lon, i, dist in zip(lats, lons, indices, distances):
+        charger, want = find_nearest_charger(lat, lon, chargers)
+        assert chargers[i] is charger
+        assert dist == want
+
+
+def test_nearest_chargers_batch_haversine_within_error_bound():
+    import random
+
+    from geopy.distance import geodesic  # type: ignore
+
+    rng = random.Random(5)
+    chargers = [{"lat": lat, "lon": lon} for lat, lon in zip(*_random_points(rng, 100))]
+    lats, lons = _random_points(rng, 100)
+    indices, distances = nearest_chargers_batch(lats, lons, chargers)
+    for lat, lon, i, dist in zip(lats, lons, indices, distances):
+        exact = geodesic((lat, lon), (chargers[i]["lat"], chargers[i]["lon"])).miles
+        assert abs(dist - exact) <= 0.006 * exact + 0.005
+
+
+def test_nearest_chargers_batch_no_chargers_raises():
+    with pytest.raises(ValueError):
+        nearest_chargers_batch([40.0], [-74.0], [])
+
+
 # ── geocode_address ───────────────────────────────────────────────────────────
 
 
@@ -276,9 +431,8 @@ def test_geocode_address_writes_cache(tmp_path):
         mock_fn.return_value = mock_location
         geocode_address("New York, NY", cache_path=cache_file)
 
-    cache = json.loads(cache_file.read_text())
-    assert "New York, NY" in cache
-    assert cache["New York, NY"] == pytest.approx([40.7128, -74.0060])
+    cached = open_geocode_cache(cache_file).get("New York, NY")
+    assert cached == (pytest.approx(40.7128), pytest.approx(-74.0060))
 
 
 def test_geocode_address_reads_cache_no_api_call(tmp_path):
@@ -300,6 +454,137 @@ def test_geocode_address_not_found(tmp_path):
     assert result is None
 
 
+def test_geocode_address_not_found_is_negative_cached(tmp_path):
+    cache_file = tmp_path / "geocache.sqlite3"
+    with patch("itselectric.geo._geocode_fn") as mock_fn:
+        mock_fn.return_value = None
+        geocode_address("zzz not a real address", cache_path=cache_file)
+        assert geocode_address("ZZZ not a real address.", cache_path=cache_file) is None
+    assert mock_fn.call_count == 1
+
+
+def test_geocode_address_service_error(tmp_path):
+    from geopy.exc import GeocoderTimedOut  # type: ignore
+
+    cache_file = tmp_path / "geocache.sqlite3"
+    with patch("itselectric.geo._geocode_fn", side_effect=GeocoderTimedOut("slow")):
+        assert geocode_address("1 Main St", cache_path=cache_file) is None
+    with patch("itselectric.geo._geocode_fn", side_effect=GeocoderTimedOut("slow")):
+        with pytest.raises(GeocoderTimedOut):
+            geocode_address("2 Main St", raise_errors=True)
+    assert GeocodeCache(cache_file).get_failure("1 Main St") == GEOCODE_SERVICE_ERROR
+
+
+def test_nominatim_retries_wait_on_the_1_per_second_throttle():
+    import httpx  # type: ignore
+
+    from itselectric import geo
+    from itselectric.http_client import HttpClient, set_client
+
+    responses = [httpx.Response(503), httpx.Response(200, json=[])]
+    client = HttpClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+    old = set_client(client)
+    try:
+        with (
+            patch.object(geo._NOMINATIM_THROTTLE, "wait") as wait,
+            patch("itselectric.http_client.time.sleep"),
+        ):
+            assert geo._geocode_fn("1 Main St") is None
+    finally:
+        set_client(old)
+    assert wait.call_count == 2  # first attempt and the retry
+    assert geo._NOMINATIM_THROTTLE.interval == 1.0
+
+
 def test_geocode_address_empty():
     assert geocode_address("") is None
     assert geocode_address(None) is None
+
+
+def test_geocode_address_json_migrated_once(tmp_path):
+    """A legacy JSON path is migrated into a sibling SQLite store and not re-read."""
+    cache_file = tmp_path / "geocache.json"
+    cache_file.write_text(json.dumps({"123 Main St": [42.0, -71.0]}))
+    geocode_address("123 Main St", cache_path=cache_file)
+    cache_file.unlink()
+
+    with patch("itselectric.geo._geocode_fn") as mock_fn:
+        result = geocode_address("123 Main St", cache_path=cache_file)
+        mock_fn.assert_not_called()
+
+    assert result == (pytest.approx(42.0), pytest.approx(-71.0))
+    assert (tmp_path / "geocache.sqlite3").exists()
+
+
+# ── GeocodeCache ──────────────────────────────────────────────────────────────
+
+
+def test_geocode_cache_put_get_roundtrip(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3")
+    assert cache.get("1 Main St") is None
+    cache.put("1 Main St", 40.0, -74.0)
+    assert cache.get("1 Main St") == (40.0, -74.0)
+    assert len(cache) == 1
+
+
+def test_geocode_cache_shared_between_connections(tmp_path):
+    """Writes from one connection (e.g. another process) are visible to another."""
+    writer = GeocodeCache(tmp_path / "geo.sqlite3")
+    reader = GeocodeCache(tmp_path / "geo.sqlite3")
+    writer.put("1 Main St", 40.0, -74.0)
+    assert reader.get("1 Main St") == (40.0, -74.0)
+
+
+def test_migrate_json_geocache_keeps_existing_rows(tmp_path):
+    json_file = tmp_path / "geocache.json"
+    json_file.write_text(json.dumps({"A": [1.0, 2.0], "B": [3.0, 4.0]}))
+    cache = GeocodeCache(tmp_path / "geo.sqlite3")
+    cache.put("A", 9.0, 9.0)
+
+    assert migrate_json_geocache(json_file, cache) == 1
+    assert cache.get("A") == (9.0, 9.0)
+    assert cache.get("B") == (3.0, 4.0)
+    assert migrate_json_geocache(json_file, cache) == 0
+
+
+def test_geocode_cache_spelling_variants_share_entry(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3")
+    cache.put("15 Washington St., Brooklyn, NY 11205", 40.69, -73.96)
+    assert cache.get("15 washington street brooklyn ny 11205") == (40.69, -73.96)
+
+
+def test_geocode_cache_rekey_legacy_rows(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "geo.sqlite3"
+    cache = GeocodeCache(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO geocache VALUES ('15 Washington St., Brooklyn, NY', 1.0, 2.0)")
+        conn.execute("INSERT INTO geocache VALUES ('15 washington street brooklyn ny', 3.0, 4.0)")
+
+    assert cache.rekey() == 2
+    assert len(cache) == 1
+    assert cache.get("15 Washington St, Brooklyn, NY") == (1.0, 2.0)
+    assert cache.rekey() == 0
+
+
+def test_geocode_cache_failure_ttl(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3", negative_ttl=60)
+    cache.put_failure("1 Nowhere Rd", GEOCODE_NOT_FOUND)
+    assert cache.get_failure("1 nowhere road") == GEOCODE_NOT_FOUND
+    assert cache.purge_failures(expired_only=True) == 0
+
+    with patch("itselectric.geo.time.time", return_value=time.time() + 120):
+        assert cache.get_failure("1 Nowhere Rd") is None
+        assert cache.purge_failures(expired_only=True) == 1
+
+
+def test_geocode_cache_put_clears_failure(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3")
+    cache.put_failure("1 Main St", GEOCODE_NOT_FOUND)
+    cache.put("1 Main St", 40.0, -74.0)
+    assert cache.get_failure("1 Main St") is None
+
+
+def test_migrate_json_geocache_missing_file(tmp_path):
+    assert migrate_json_geocache(tmp_path / "nope.json", GeocodeCache(tmp_path / "g.sqlite3")) == 0
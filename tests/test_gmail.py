@@ -7,13 +7,18 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from itselectric.gmail import (  # type: ignore
+    _QuotaThrottle,
     body_to_plain,
+    fetch_messages,
     format_sent_date,
     get_body_from_payload,
     html_to_plain,
     load_template,
+    message_was_sent,
     send_email,
+    sync_messages,
 )
+from tests.fake_gmail import FakeGmailService
 
 
 def _enc(text: str) -> str:
@@ -216,7 +221,7 @@ class TestSendEmail:
 
     def test_returns_true_on_success(self):
         creds = MagicMock()
-        with patch("itselectric.gmail.build", return_value=self._mock_service()):
+        with patch("itselectric.gmail.get_service", return_value=self._mock_service()):
             assert send_email(creds, "to@example.com", "Subject", "Body") is True
 
     def test_returns_false_on_http_error(self):
@@ -226,7 +231,7 @@ class TestSendEmail:
         svc.users().messages().send().execute.side_effect = HttpError(
             MagicMock(status=500), b"error"
         )
-        with patch("itselectric.gmail.build", return_value=svc):
+        with patch("itselectric.gmail.get_service", return_value=svc):
             assert send_email(creds, "to@example.com", "Subject", "Body") is False
 
     def test_sends_to_correct_address(self):
@@ -240,7 +245,7 @@ class TestSendEmail:
             return original_send()
         svc.users().messages().send = capture
 
-        with patch("itselectric.gmail.build", return_value=svc):
+        with patch("itselectric.gmail.get_service", return_value=svc):
             send_email(creds, "driver@example.com", "Hello", "<p>Body</p>")
 
         raw = base64.urlsafe_b64decode(captured["body"]["raw"])
@@ -258,7 +263,7 @@ class TestSendEmail:
             return original_send()
         svc.users().messages().send = capture
 
-        with patch("itselectric.gmail.build", return_value=svc):
+        with patch("itselectric.gmail.get_service", return_value=svc):
             send_email(creds, "x@example.com", "Subject", "<p>Hello</p>")
 
         raw = base64.urlsafe_b64decode(captured["body"]["raw"])
@@ -276,7 +281,7 @@ class TestSendEmail:
             return original_send()
         svc.users().messages().send = capture
 
-        with patch("itselectric.gmail.build", return_value=svc):
+        with patch("itselectric.gmail.get_service", return_value=svc):
             send_email(creds, "x@example.com", "My Subject", "Body")
 
         raw = base64.urlsafe_b64decode(captured["body"]["raw"])
@@ -297,7 +302,7 @@ class TestSendEmail:
             return original_send()
         svc.users().messages().send = capture
 
-        with patch("itselectric.gmail.build", return_value=svc):
+        with patch("itselectric.gmail.get_service", return_value=svc):
             send_email(
                 creds,
                 "x@example.com",
@@ -312,3 +317,171 @@ class TestSendEmail:
         payloads = msg.get_payload()
         assert any(p.get_content_type() == "text/html" for p in payloads)
         assert any(p.get("Content-ID") == "<logo>" for p in payloads)
+
+    def test_message_id_header_is_set(self):
+        captured = {}
+        svc = MagicMock()
+        svc.users().messages().send.side_effect = lambda **kw: captured.update(kw) or MagicMock()
+
+        with patch("itselectric.gmail.get_service", return_value=svc):
+            send_email(MagicMock(), "x@example.com", "S", "B", message_id="<o1@itselectric>")
+
+        msg = email_lib.message_from_bytes(base64.urlsafe_b64decode(captured["body"]["raw"]))
+        assert msg["Message-ID"] == "<o1@itselectric>"
+
+    def test_message_was_sent_searches_by_message_id(self):
+        svc = MagicMock()
+        svc.users().messages().list().execute.side_effect = [{"messages": [{"id": "m1"}]}, {}]
+        with patch("itselectric.gmail.get_service", return_value=svc):
+            assert message_was_sent(MagicMock(), "<o1@itselectric>") is True
+            assert message_was_sent(MagicMock(), "<o2@itselectric>") is False
+        svc.users().messages().list.assert_called_with(
+            userId="me", q="rfc822msgid:o2@itselectric", maxResults=1
+        )
+
+
+# ── fetch_messages ─────────────────────────────────────────────────────────────
+
+
+class TestFetchMessages:
+    @pytest.fixture(autouse=True)
+    def _no_sleep(self):
+        with patch("itselectric.gmail.time.sleep") as sleep:
+            self.sleep = sleep
+            yield
+
+    def _gmail(self, n: int) -> FakeGmailService:
+        gmail = FakeGmailService()
+        for i in range(n):
+            gmail.add_message({"id": f"m{i}", "payload": {}})
+        return gmail
+
+    def test_pages_past_500_and_batches_gets(self):
+        gmail = self._gmail(620)
+        messages = fetch_messages(None, "INBOX", 600, service=gmail)
+        assert len(messages) == 600
+        assert messages[0]["id"] == "m619"
+        assert gmail.count("messages.list") == 2
+        assert gmail.count("batch") == 12  # 600 / GMAIL_BATCH_SIZE
+
+    def test_retries_rate_limited_gets(self):
+        gmail = self._gmail(3)
+        gmail.fail_next("m1", 429, 503)
+        gmail.fail_next("m2", 403)
+        messages = fetch_messages(None, "INBOX", 10, service=gmail)
+        assert [m["id"] for m in messages] == ["m2", "m1", "m0"]
+        assert gmail.count("batch") == 3
+        assert [c.args[0] for c in self.sleep.call_args_list if c.args[0] >= 1] == [1, 2]
+
+    def test_gives_up_after_max_retries(self):
+        from googleapiclient.errors import HttpError  # type: ignore
+
+        gmail = self._gmail(1)
+        gmail.fail_next("m0", *[500] * 10)
+        with pytest.raises(HttpError):
+            fetch_messages(None, "INBOX", 10, service=gmail)
+
+    def test_non_retryable_error_propagates(self):
+        from googleapiclient.errors import HttpError  # type: ignore
+
+        gmail = self._gmail(1)
+        gmail.fail_next("m0", 400)
+        with pytest.raises(HttpError):
+            fetch_messages(None, "INBOX", 10, service=gmail)
+        assert gmail.count("batch") == 1
+
+    def test_known_ids_are_not_downloaded(self):
+        gmail = self._gmail(5)
+        calls = []
+
+        def known(ids):
+            calls.append(list(ids))
+            return {"m4", "m2"}
+
+        messages = fetch_messages(None, "INBOX", 10, service=gmail, known_ids=known)
+        assert [m["id"] for m in messages] == ["m3", "m1", "m0"]
+        assert gmail.count("messages.get") == 3
+        assert len(calls) == 1  # one set-based lookup for the whole listing
+
+    def test_quota_throttle_waits_once_burst_is_spent(self):
+        throttle = _QuotaThrottle(100)
+        throttle.acquire(100)
+        self.sleep.assert_not_called()
+        throttle.acquire(50)
+        assert self.sleep.call_args.args[0] == pytest.approx(0.5, abs=0.05)
+
+
+# ── sync_messages ──────────────────────────────────────────────────────────────
+
+
+class TestSyncMessages:
+    def _gmail(self, n: int, **kwargs) -> FakeGmailService:
+        gmail = FakeGmailService(**kwargs)
+        for i in range(n):
+            gmail.add_message({"id": f"m{i}", "payload": {}})
+        return gmail
+
+    def test_no_checkpoint_runs_full_scan(self):
+        gmail = self._gmail(3)
+        messages, history_id = sync_messages(None, "INBOX", 10, service=gmail)
+        assert [m["id"] for m in messages] == ["m2", "m1", "m0"]
+        assert history_id == "1003"
+
+    def test_checkpoint_fetches_only_delta(self):
+        gmail = self._gmail(3)
+        _, history_id = sync_messages(None, "INBOX", 10, service=gmail)
+        gmail.add_message({"id": "new", "payload": {}})
+        gmail.calls.clear()
+
+        messages, history_id = sync_messages(None, "INBOX", 10, history_id, service=gmail)
+        assert [m["id"] for m in messages] == ["new"]
+        assert history_id == "1004"
+        assert gmail.count("messages.get") == 1
+        assert gmail.count("messages.list") == 0
+
+    def test_no_new_messages_keeps_checkpoint_current(self):
+        gmail = self._gmail(2)
+        messages, history_id = sync_messages(None, "INBOX", 10, "1002", service=gmail)
+        assert messages == []
+        assert history_id == "1002"
+        assert gmail.count("messages.get") == 0
+
+    def test_expired_checkpoint_falls_back_to_full_scan(self):
+        gmail = self._gmail(2)
+        gmail.expire_history()
+        messages, history_id = sync_messages(None, "INBOX", 10, "1001", service=gmail)
+        assert [m["id"] for m in messages] == ["m1", "m0"]
+        assert history_id == "1002"
+
+    def test_delta_is_paged_and_capped_at_max_messages(self):
+        gmail = self._gmail(5, history_page_size=2)
+        messages, history_id = sync_messages(None, "INBOX", 3, "1000", service=gmail)
+        assert [m["id"] for m in messages] == ["m0", "m1", "m2"]
+        assert history_id == "1003"  # resume after the last message returned
+
+        messages, history_id = sync_messages(None, "INBOX", 3, history_id, service=gmail)
+        assert [m["id"] for m in messages] == ["m3", "m4"]
+        assert history_id == "1005"
+
+    def test_deleted_message_is_skipped(self):
+        gmail = self._gmail(2)
+        gmail.delete_message("m0")
+        messages, _ = sync_messages(None, "INBOX", 10, "1000", service=gmail)
+        assert [m["id"] for m in messages] == ["m1"]
+
+    def test_other_label_is_ignored(self):
+        gmail = self._gmail(1, label_ids={"INBOX": "INBOX", "Forms": "Label_1"})
+        gmail.add_message({"id": "form", "payload": {}}, label="Forms")
+        messages, _ = sync_messages(None, "Forms", 10, "1000", service=gmail)
+        assert [m["id"] for m in messages] == ["form"]
+
+    def test_known_ids_filter_history_delta(self):
+        gmail = self._gmail(3)
+        messages, _ = sync_messages(
+            None, "INBOX", 10, "1000", service=gmail, known_ids=lambda ids: {"m0", "m1"}
+        )
+        assert [m["id"] for m in messages] == ["m2"]
+        assert gmail.count("messages.get") == 1
+
+    def test_missing_label(self):
+        assert sync_messages(None, "Nope", 10, service=FakeGmailService()) == ([], None)
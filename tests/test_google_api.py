@@ -0,0 +1,38 @@
+"""Tests for the cached Google API service factory."""
+
+import threading
+from unittest.mock import patch
+
+from google.oauth2.credentials import Credentials
+
+from itselectric.google_api import clear_service_cache, discovery_document, get_service
+
+
+def test_service_is_built_once_per_thread_and_credentials():
+    clear_service_cache()
+    creds = Credentials(token="t")
+    gmail = get_service("gmail", "v1", creds)
+    assert get_service("gmail", "v1", creds) is gmail
+    assert get_service("sheets", "v4", creds) is not gmail
+    assert get_service("gmail", "v1", Credentials(token="t2")) is not gmail
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_service("gmail", "v1", creds)))
+    thread.start()
+    thread.join()
+    assert other[0] is not gmail  # httplib2 is not thread-safe: one client per thread
+
+
+def test_services_come_from_the_bundled_discovery_documents():
+    clear_service_cache()
+    assert '"name": "gmail"' in discovery_document("gmail", "v1")
+    with patch("itselectric.google_api.build") as network_build:
+        service = get_service("sheets", "v4", Credentials(token="t"))
+    network_build.assert_not_called()
+    assert hasattr(service.spreadsheets(), "values")
+
+
+def test_gmail_and_sheets_share_one_service_cache():
+    from itselectric import gmail, google_api, sheets
+
+    assert gmail.get_service is sheets.get_service is google_api.get_service
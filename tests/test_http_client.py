@@ -0,0 +1,133 @@
+"""Tests for the shared pooled HTTP client."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from itselectric.http_client import HttpClient, close_client, get_client, set_client
+
+
+def _mock_client(responses: list, **kwargs) -> tuple[HttpClient, list]:
+    """Client whose transport replays responses (status int or exception) in order."""
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        item = responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        status, headers = item if isinstance(item, tuple) else (item, {})
+        return httpx.Response(status, headers=headers, json={})
+
+    return HttpClient(transport=httpx.MockTransport(handler), **kwargs), seen
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep():
+    with patch("itselectric.http_client.time.sleep") as sleep:
+        yield sleep
+
+
+def test_retries_5xx_then_returns_success():
+    client, seen = _mock_client([503, 502, 200])
+    assert client.get("https://api.example.com/x").status_code == 200
+    assert len(seen) == 3
+
+
+def test_honours_retry_after(_no_sleep):
+    client, _ = _mock_client([(429, {"Retry-After": "7"}), 200])
+    client.get("https://api.example.com/x")
+    _no_sleep.assert_called_once_with(7.0)
+
+
+def test_returns_last_error_response_after_max_retries():
+    client, seen = _mock_client([500, 500, 500], max_retries=2)
+    assert client.get("https://api.example.com/x").status_code == 500
+    assert len(seen) == 3
+
+
+def test_client_errors_are_not_retried():
+    client, seen = _mock_client([404])
+    assert client.get("https://api.example.com/x").status_code == 404
+    assert len(seen) == 1
+
+
+def test_transport_error_is_retried_then_raised():
+    client, seen = _mock_client([httpx.ConnectError("down")] * 2, max_retries=1)
+    with pytest.raises(httpx.ConnectError):
+        client.get("https://api.example.com/x")
+    assert len(seen) == 2
+
+
+def test_throttle_waited_on_before_every_attempt():
+    class Counter:
+        calls = 0
+
+        def wait(self):
+            self.calls += 1
+
+    throttle = Counter()
+    client, _ = _mock_client([503, 200])
+    client.post("https://api.example.com/x", throttle=throttle)
+    assert throttle.calls == 2
+
+
+def test_metrics_are_kept_per_host():
+    client, _ = _mock_client([200, 503, 200, 404])
+    client.get("https://a.example.com/1")
+    client.get("https://a.example.com/2")
+    client.get("https://b.example.com/1")
+    metrics = client.metrics()
+    assert set(metrics) == {"a.example.com", "b.example.com"}
+    assert metrics["a.example.com"]["requests"] == 3
+    assert metrics["a.example.com"]["errors"] == 1
+    assert metrics["a.example.com"]["retries"] == 1
+    assert metrics["b.example.com"]["errors"] == 1
+    assert metrics["a.example.com"]["max_ms"] >= metrics["a.example.com"]["p50_ms"]
+
+
+def test_connections_are_kept_alive_between_requests():
+    ports = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            ports.append(self.client_address[1])
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    ).start()
+    client = HttpClient()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        for _ in range(5):
+            assert client.get(url).status_code == 200
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+    assert len(set(ports)) == 1  # one TCP connection for all five requests
+
+
+def test_shared_client_is_built_once_and_replaceable():
+    close_client()
+    try:
+        first = get_client()
+        assert get_client() is first
+        replacement = HttpClient()
+        assert set_client(replacement) is first
+        assert get_client() is replacement
+    finally:
+        close_client()
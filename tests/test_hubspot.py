@@ -2,7 +2,9 @@
 
 from unittest.mock import MagicMock, patch
 
-from itselectric.hubspot import upsert_contact
+import pytest
+
+from itselectric.hubspot import ContactBatcher, upsert_contact, upsert_contacts
 
 
 class TestUpsertContact:
@@ -14,7 +16,8 @@ class TestUpsertContact:
 
     def test_returns_contact_id_on_success(self):
         """A successful upsert returns the contact ID from the results array."""
-        with patch("itselectric.hubspot.requests.post") as mock_post:
+        with patch("itselectric.hubspot.get_client") as mock_client:
+            mock_post = mock_client.return_value.post
             mock_post.return_value = self._mock_upsert_response("101")
 
             contact_id = upsert_contact(
@@ -28,7 +31,8 @@ class TestUpsertContact:
 
     def test_calls_batch_upsert_endpoint(self):
         """Uses the batch upsert endpoint with email as the idProperty."""
-        with patch("itselectric.hubspot.requests.post") as mock_post:
+        with patch("itselectric.hubspot.get_client") as mock_client:
+            mock_post = mock_client.return_value.post
             mock_post.return_value = self._mock_upsert_response("101")
 
             upsert_contact(
@@ -46,7 +50,8 @@ class TestUpsertContact:
 
     def test_splits_name_into_first_and_last(self):
         """Full name is split on first space: 'Jane Smith' → firstname=Jane, lastname=Smith."""
-        with patch("itselectric.hubspot.requests.post") as mock_post:
+        with patch("itselectric.hubspot.get_client") as mock_client:
+            mock_post = mock_client.return_value.post
             mock_post.return_value = self._mock_upsert_response("7")
 
             upsert_contact(
@@ -62,7 +67,8 @@ class TestUpsertContact:
 
     def test_single_word_name_uses_empty_lastname(self):
         """A name with no space sets lastname to empty string."""
-        with patch("itselectric.hubspot.requests.post") as mock_post:
+        with patch("itselectric.hubspot.get_client") as mock_client:
+            mock_post = mock_client.return_value.post
             mock_post.return_value = self._mock_upsert_response("8")
 
             upsert_contact(
@@ -78,10 +84,11 @@ class TestUpsertContact:
 
     def test_returns_none_on_request_error(self):
         """If the API call raises an exception, return None (don't crash the pipeline)."""
-        import requests as req  # type: ignore
+        import httpx
 
-        with patch("itselectric.hubspot.requests.post") as mock_post:
-            mock_post.side_effect = req.RequestException("network error")
+        with patch("itselectric.hubspot.get_client") as mock_client:
+            mock_post = mock_client.return_value.post
+            mock_post.side_effect = httpx.ConnectError("network error")
 
             result = upsert_contact(
                 access_token="tok",
@@ -91,3 +98,174 @@ class TestUpsertContact:
             )
 
         assert result is None
+
+
+class _StandInHubSpot:
+    """Local HTTP server speaking just enough of batch/upsert for the batching tests."""
+
+    def __init__(self):
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.batches: list[list[str]] = []
+        self.reject: set[str] = set()  # any of these in a batch → 400 for the whole batch
+        self.drop_once: set[str] = set()  # left out of the first response (207)
+        self.throttle_next = 0  # answer this many requests with 429
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                emails = [i["properties"]["email"] for i in body["inputs"]]
+                if server.throttle_next:
+                    server.throttle_next -= 1
+                    self._reply(429, {"category": "RATE_LIMITS"}, {"Retry-After": "0"})
+                    return
+                server.batches.append(emails)
+                if server.reject & set(emails):
+                    self._reply(400, {"category": "VALIDATION_ERROR"})
+                    return
+                dropped = server.drop_once & set(emails)
+                server.drop_once -= dropped
+                results = [
+                    {"id": f"id-{e}", "properties": {"email": e.lower()}}
+                    for e in reversed(emails)  # HubSpot does not preserve input order
+                    if e not in dropped
+                ]
+                self._reply(207 if dropped else 200, {"status": "COMPLETE", "results": results})
+
+            def _reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture()
+def hubspot_server():
+    import itselectric.hubspot as hubspot
+
+    server = _StandInHubSpot()
+    with patch.object(hubspot, "_limiter", hubspot._RollingLimiter(100, 10.0)):
+        yield server
+    server.close()
+
+
+def _contacts(n: int) -> list[tuple[str, str, str]]:
+    return [(f"Driver {i}", f"d{i}@example.com", f"{i} Main St, Brooklyn, NY 11201")
+            for i in range(n)]
+
+
+class TestUpsertContacts:
+    def test_sends_at_most_100_inputs_per_request(self, hubspot_server):
+        ids = upsert_contacts("tok", _contacts(250), base_url=hubspot_server.url)
+        assert sorted(len(b) for b in hubspot_server.batches) == [50, 100, 100]
+        assert ids["d7@example.com"] == "id-d7@example.com"
+        assert all(ids.values())
+
+    def test_maps_ids_back_by_email_not_position(self, hubspot_server):
+        contacts = [
+            ("Jane Smith", "Jane@Example.com", "1 Main St"),
+            ("Bo", "bo@example.com", "2 Main St"),
+        ]
+        ids = upsert_contacts("tok", contacts, base_url=hubspot_server.url)
+        assert ids == {
+            "Jane@Example.com": "id-Jane@Example.com",
+            "bo@example.com": "id-bo@example.com",
+        }
+
+    def test_retries_only_items_missing_from_partial_response(self, hubspot_server):
+        hubspot_server.drop_once = {"d2@example.com", "d4@example.com"}
+        ids = upsert_contacts("tok", _contacts(5), base_url=hubspot_server.url)
+        assert all(ids.values())
+        assert sorted(hubspot_server.batches[1]) == ["d2@example.com", "d4@example.com"]
+
+    def test_rejected_batch_is_split_to_isolate_bad_input(self, hubspot_server):
+        hubspot_server.reject = {"d5@example.com"}
+        ids = upsert_contacts("tok", _contacts(8), base_url=hubspot_server.url)
+        assert ids.pop("d5@example.com") is None
+        assert all(ids.values())
+        assert len(hubspot_server.batches) <= 7  # log2 bisection, not one request per contact
+
+    def test_retries_after_rate_limit_response(self, hubspot_server):
+        hubspot_server.throttle_next = 2
+        ids = upsert_contacts("tok", _contacts(3), base_url=hubspot_server.url)
+        assert all(ids.values())
+        assert len(hubspot_server.batches) == 1
+
+    def test_unreachable_server_returns_none_for_every_contact(self):
+        with patch("itselectric.http_client.time.sleep"):
+            ids = upsert_contacts("tok", _contacts(2), base_url="http://127.0.0.1:9")
+        assert ids == {"d0@example.com": None, "d1@example.com": None}
+
+
+class TestContactBatcher:
+    def test_flushes_when_batch_is_full(self, hubspot_server):
+        with ContactBatcher("tok", batch_size=3, max_wait=60, base_url=hubspot_server.url) as b:
+            futures = [b.submit(*c) for c in _contacts(3)]
+            assert futures[2].result(timeout=5) == "id-d2@example.com"
+        assert hubspot_server.batches == [["d0@example.com", "d1@example.com", "d2@example.com"]]
+
+    def test_flushes_after_max_wait(self, hubspot_server):
+        with ContactBatcher("tok", max_wait=0.05, base_url=hubspot_server.url) as b:
+            future = b.submit("Jane", "jane@example.com", "1 Main St")
+            assert future.result(timeout=5) == "id-jane@example.com"
+
+    def test_flush_and_close_send_partial_batches(self, hubspot_server):
+        b = ContactBatcher("tok", max_wait=60, base_url=hubspot_server.url)
+        first = b.submit("A", "a@example.com", "1 Main St")
+        b.flush()
+        assert first.result(timeout=5) == "id-a@example.com"
+        second = b.submit("B", "b@example.com", "2 Main St")
+        b.close()
+        assert second.result(timeout=0) == "id-b@example.com"
+        assert b.batches_sent == 2
+
+    def test_submit_after_close_raises(self, hubspot_server):
+        b = ContactBatcher("tok", base_url=hubspot_server.url)
+        b.close()
+        with pytest.raises(RuntimeError):
+            b.submit("A", "a@example.com", "1 Main St")
+
+
+def test_rolling_limiter_blocks_past_the_window_limit():
+    import time
+
+    from itselectric.hubspot import _RollingLimiter
+
+    limiter = _RollingLimiter(max_calls=2, window=0.2)
+    start = time.perf_counter()
+    for _ in range(3):
+        limiter.wait()
+    assert time.perf_counter() - start >= 0.19
+
+
+def test_payload_hash_changes_only_with_sent_properties():
+    from itselectric.hubspot import contact_payload_hash
+
+    base = contact_payload_hash("Jane Smith", "jane@example.com", "1 Main St, Brooklyn, NY 11201")
+    assert base == contact_payload_hash(
+        "Jane Smith", "jane@example.com", "1 Main St, Brooklyn, NY 11201"
+    )
+    assert base != contact_payload_hash(
+        "Jane Smith", "jane@example.com", "2 Main St, Brooklyn, NY 11201"
+    )
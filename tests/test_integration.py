@@ -175,7 +175,8 @@ class TestFullPipeline:
 
         from itselectric.hubspot import upsert_contact
 
-        with patch("itselectric.hubspot.requests.post") as mock_post:
+        with patch("itselectric.hubspot.get_client") as mock_client:
+            mock_post = mock_client.return_value.post
             messages = load_fixture_messages(FIXTURES_DIR)
             token = ""
             for msg in messages:
@@ -0,0 +1,245 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+import server.models  # noqa: F401
+from server.db import Base
+from server.job_handlers import reset_credentials
+from server.job_queue import (
+    PermanentJobError,
+    backoff_seconds,
+    claim_next,
+    enqueue,
+    handler,
+    retry_job,
+    run_job,
+    run_pending,
+)
+from server.models import AppConfig, Contact, Job, OutboundEmail, SheetsOutboxRow
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+calls: list[dict] = []
+dead: list[str] = []
+
+
+@handler("test_ok")
+def _ok(session, payload):
+    calls.append(payload)
+
+
+@handler("test_flaky", on_dead=lambda session, payload, error: dead.append(error))
+def _flaky(session, payload):
+    raise RuntimeError("service unavailable")
+
+
+@handler("test_permanent")
+def _permanent(session, payload):
+    raise PermanentJobError("bad payload")
+
+
+@pytest.fixture()
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    calls.clear()
+    dead.clear()
+    reset_credentials()
+    yield session
+    session.close()
+
+
+def _make_due(session, job: Job) -> None:
+    job.run_after = datetime.now(timezone.utc) - timedelta(seconds=1)
+    session.commit()
+
+
+def test_enqueue_with_same_idempotency_key_returns_existing_job(db_session):
+    first = enqueue(db_session, "test_ok", {"n": 1}, idempotency_key="k1")
+    db_session.commit()
+    again = enqueue(db_session, "test_ok", {"n": 2}, idempotency_key="k1")
+    db_session.commit()
+    assert again.id == first.id
+    assert db_session.query(Job).count() == 1
+    assert run_pending(db_session) == 1
+    assert calls == [{"n": 1}]
+    assert db_session.get(Job, first.id).status == "succeeded"
+
+
+def test_failed_job_backs_off_then_dead_letters(db_session):
+    job = enqueue(db_session, "test_flaky", {}, max_attempts=3)
+    db_session.commit()
+
+    assert run_pending(db_session) == 1
+    job = db_session.get(Job, job.id)
+    assert (job.status, job.attempts) == ("queued", 1)
+    assert job.last_error == "RuntimeError: service unavailable"
+    assert run_pending(db_session) == 0  # backing off
+
+    for _ in range(2):
+        _make_due(db_session, job)
+        run_pending(db_session)
+    assert (job.status, job.attempts) == ("dead", 3)
+    assert job.finished_at is not None
+    assert dead == ["RuntimeError: service unavailable"]
+
+
+def test_backoff_doubles_and_is_capped():
+    assert [backoff_seconds(n) for n in (1, 2, 3)] == [30, 60, 120]
+    assert backoff_seconds(20) == 3600
+
+
+def test_permanent_error_dead_letters_without_retrying(db_session):
+    job = enqueue(db_session, "test_permanent", {})
+    unknown = enqueue(db_session, "test_no_such_kind", {})
+    db_session.commit()
+    run_pending(db_session)
+    assert (db_session.get(Job, job.id).status, db_session.get(Job, job.id).attempts) == ("dead", 1)
+    assert "No handler" in db_session.get(Job, unknown.id).last_error
+
+
+def test_claimed_job_is_invisible_until_its_lock_expires(db_session):
+    job = enqueue(db_session, "test_ok", {})
+    db_session.commit()
+
+    claimed = claim_next(db_session, "w1", visibility_timeout=300)
+    assert (claimed.id, claimed.status, claimed.locked_by) == (job.id, "running", "w1")
+    assert claim_next(db_session, "w2") is None
+
+    # w1 died holding the job: once the lock expires another worker takes it.
+    claimed.locked_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    reclaimed = claim_next(db_session, "w2")
+    assert (reclaimed.locked_by, reclaimed.attempts) == ("w2", 2)
+    assert run_job(db_session, reclaimed) == "succeeded"
+
+
+def test_retry_requeues_a_dead_job(db_session):
+    job = enqueue(db_session, "test_flaky", {}, idempotency_key="k", max_attempts=1)
+    db_session.commit()
+    run_pending(db_session)
+    assert job.status == "dead"
+
+    retry_job(db_session, job)
+    assert (job.status, job.attempts, job.finished_at) == ("queued", 0, None)
+    run_pending(db_session)
+    assert job.status == "dead"
+
+    # Enqueueing a dead job's key again also brings it back.
+    assert enqueue(db_session, "test_flaky", {}, idempotency_key="k").status == "queued"
+    job.status = "succeeded"
+    with pytest.raises(ValueError):
+        retry_job(db_session, job)
+
+
+def _queued_email(session) -> OutboundEmail:
+    session.add(Contact(id="c1", name="Ada", email_primary="ada@example.com",
+                        parse_status="parsed"))
+    outbound = OutboundEmail(id="o1", contact_id="c1", subject="Hi", body_html="<p>Hi</p>",
+                             status="queued")
+    session.add(outbound)
+    session.add(AppConfig(key="spreadsheet_id", value="sheet123"))
+    enqueue(session, "send_email", {"outbound_id": "o1", "sent_by": "manual",
+                                    "append_to_sheet": True})
+    session.commit()
+    return outbound
+
+
+def test_send_email_job_sends_once_and_buffers_the_sheets_row(db_session):
+    outbound = _queued_email(db_session)
+    with (
+        patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+        patch("server.job_handlers.send_email", return_value=True) as send,
+        patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+    ):
+        assert run_pending(db_session) == 1
+        # A duplicate delivery of the send job is a no-op.
+        enqueue(db_session, "send_email", {"outbound_id": "o1"})
+        db_session.commit()
+        run_pending(db_session)
+
+    assert send.call_count == 1
+    assert (outbound.status, outbound.sent_by) == ("sent", "manual")
+    buffered = db_session.query(SheetsOutboxRow).one()
+    assert (buffered.spreadsheet_id, buffered.sheet) == ("sheet123", "Sheet1")
+    assert json.loads(buffered.row)[3] == "ada@example.com"
+    # The first buffered row schedules a delayed flush.
+    assert db_session.query(Job).filter_by(kind="sheets_flush", status="queued").count() == 1
+
+
+def test_rerun_after_crash_mid_send_checks_gmail_before_resending(db_session):
+    outbound = _queued_email(db_session)
+    # The previous attempt committed "sending", then died before recording the result.
+    outbound.status = "sending"
+    db_session.commit()
+    with (
+        patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+        patch("server.job_handlers.message_was_sent", return_value=True) as was_sent,
+        patch("server.job_handlers.send_email") as send,
+        patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+    ):
+        run_pending(db_session)
+
+    was_sent.assert_called_once()
+    assert was_sent.call_args.args[1] == "<outbound-o1@itselectric-automation>"
+    send.assert_not_called()
+    assert outbound.status == "sent"
+    assert db_session.query(SheetsOutboxRow).count() == 1
+
+
+def test_rerun_resends_with_the_same_message_id_if_gmail_has_no_copy(db_session):
+    outbound = _queued_email(db_session)
+    outbound.status = "sending"
+    db_session.commit()
+    with (
+        patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+        patch("server.job_handlers.message_was_sent", return_value=False),
+        patch("server.job_handlers.send_email", return_value=True) as send,
+        patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+    ):
+        run_pending(db_session)
+
+    assert send.call_args.kwargs["message_id"] == "<outbound-o1@itselectric-automation>"
+    assert outbound.status == "sent"
+
+
+def test_failed_send_leaves_sending_marker_for_the_retry(db_session):
+    outbound = _queued_email(db_session)
+    with (
+        patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+        patch("server.job_handlers.send_email", return_value=False),
+        patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+    ):
+        run_pending(db_session)
+    assert outbound.status == "sending"
+    assert db_session.query(Job).filter_by(kind="send_email").one().status == "queued"
+
+
+def test_dead_send_email_job_marks_outbound_failed(db_session):
+    outbound = _queued_email(db_session)
+    db_session.query(Job).update({"max_attempts": 1})
+    db_session.commit()
+    with (
+        patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+        patch("server.job_handlers.send_email", return_value=False),
+        patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+    ):
+        run_pending(db_session)
+    assert outbound.status == "failed"
+    assert outbound.error_message == "RuntimeError: Gmail API returned failure"
+    assert db_session.query(Job).filter_by(kind="sheets_flush").count() == 0
+
+
+def test_shared_credentials_are_reused_until_reset():
+    from server.job_handlers import _credentials
+
+    reset_credentials()
+    with patch("server.job_handlers.get_credentials", side_effect=lambda: MagicMock()) as load:
+        first = _credentials()
+        assert _credentials() is first
+        reset_credentials()
+        assert _credentials() is not first
+    assert load.call_count == 2
+    reset_credentials()
@@ -28,3 +28,24 @@ def test_tables_created_on_metadata_create_all():
     assert "templates" in tables
     assert "geocache" in tables
     assert "app_config" in tables
+
+
+def test_file_engine_uses_sized_pool(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path}/pool.db", pool_size=3, max_overflow=1)
+    assert engine.pool.size() == 3
+
+
+def test_requests_share_one_engine(tmp_path, monkeypatch):
+    from unittest.mock import patch
+
+    import server.main
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(server.main, "DB_URL", f"sqlite:///{tmp_path}/test.db")
+    with TestClient(server.main.app) as client:
+        engine = server.main.app.state.engine
+        with patch("server.db.get_engine") as mock_get_engine:
+            for _ in range(3):
+                assert client.get("/api/contacts").status_code == 200
+        mock_get_engine.assert_not_called()
+        assert server.main.app.state.engine is engine
@@ -4,6 +4,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 import server.models  # noqa: F401
 from server.db import Base
+from server.job_handlers import reset_credentials
 from server.models import Charger, Contact, OutboundEmail, Template
 from server.pipeline_service import run_pipeline
 from sqlalchemy import create_engine
@@ -23,6 +24,7 @@ def db_session():
     session.add(Charger(street="1 Main St", city="Brooklyn", state="NY", lat=40.6943, lon=-73.9249))
     session.add(Template(name="tell_me_more_general", subject="Hi!", body_md="<p>Hi {name}</p>"))
     session.commit()
+    reset_credentials()
     yield session
     session.close()
 
@@ -46,7 +48,7 @@ FIXTURE_EMAIL = {
 
 def test_run_pipeline_creates_contact_row(db_session):
     with (
-        patch("server.pipeline_service.fetch_messages", return_value=[FIXTURE_EMAIL]),
+        patch("server.pipeline_service.sync_messages", return_value=([FIXTURE_EMAIL], "1001")),
         patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
         patch(
             "server.pipeline_service.geocode_address",
@@ -68,7 +70,7 @@ def test_run_pipeline_creates_outbound_email_row(db_session):
         "else": {"template": None},
     }
     with (
-        patch("server.pipeline_service.fetch_messages", return_value=[FIXTURE_EMAIL]),
+        patch("server.pipeline_service.sync_messages", return_value=([FIXTURE_EMAIL], "1001")),
         patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
         patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
     ):
@@ -85,7 +87,7 @@ def test_run_pipeline_skips_duplicate_message(db_session):
     db_session.commit()
 
     with (
-        patch("server.pipeline_service.fetch_messages", return_value=[FIXTURE_EMAIL]),
+        patch("server.pipeline_service.sync_messages", return_value=([FIXTURE_EMAIL], "1001")),
         patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
     ):
         run_pipeline(db_session, decision_tree=None, auto_send=False, log=lambda m: None)
@@ -103,7 +105,7 @@ def test_run_pipeline_unparsed_email_creates_unparsed_row(db_session):
         },
     }
     with (
-        patch("server.pipeline_service.fetch_messages", return_value=[unparsed_msg]),
+        patch("server.pipeline_service.sync_messages", return_value=([unparsed_msg], "1001")),
         patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
     ):
         run_pipeline(db_session, decision_tree=None, auto_send=False, log=lambda m: None)
@@ -113,6 +115,21 @@ def test_run_pipeline_unparsed_email_creates_unparsed_row(db_session):
     assert contact.parse_status == "unparsed"
 
 
+def test_run_pipeline_geocache_hit_for_spelling_variant(db_session):
+    from server.models import GeoCache
+
+    db_session.add(GeoCache(address="1 ATLANTIC AVE BROOKLYN NY 11201", lat=40.69, lon=-73.99))
+    db_session.commit()
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.geocode_address") as mock_geocode,
+    ):
+        run_pipeline(db_session, fixture_messages=[FIXTURE_EMAIL], log=lambda m: None)
+
+    mock_geocode.assert_not_called()
+    assert db_session.query(Contact).filter_by(id="msg_001").first().distance_miles is not None
+
+
 def test_run_pipeline_uses_fixture_messages_when_provided(db_session):
     with patch("server.pipeline_service.get_credentials", return_value=MagicMock()):
         run_pipeline(
@@ -123,3 +140,518 @@ def test_run_pipeline_uses_fixture_messages_when_provided(db_session):
         )
 
     assert db_session.query(Contact).filter_by(id="msg_001").count() == 1
+
+
+def test_geocode_failure_is_negative_cached(db_session):
+    from server.models import GeocodeFailure
+    from server.pipeline_service import geocode_with_db_cache
+
+    with patch("server.pipeline_service.geocode_address", return_value=None) as mock_geocode:
+        assert geocode_with_db_cache("1 Nowhere Rd, Nowhere, NY", db_session) is None
+        assert geocode_with_db_cache("1 nowhere road nowhere ny", db_session) is None
+    assert mock_geocode.call_count == 1
+    failure = db_session.get(GeocodeFailure, "1 NOWHERE RD NOWHERE NY")
+    assert failure.reason == "not_found"
+
+    with patch("server.pipeline_service.geocode_address", return_value=(40.0, -74.0)):
+        coords = geocode_with_db_cache("1 Nowhere Rd, Nowhere, NY", db_session, retry_failed=True)
+    assert coords == (40.0, -74.0)
+    assert db_session.get(GeocodeFailure, "1 NOWHERE RD NOWHERE NY") is None
+
+
+def test_geocode_failure_expires_after_ttl(db_session):
+    from datetime import datetime, timedelta, timezone
+
+    from server.models import AppConfig, GeocodeFailure
+    from server.pipeline_service import geocode_with_db_cache
+
+    db_session.add(AppConfig(key="geocode_negative_ttl_hours", value="1"))
+    db_session.add(
+        GeocodeFailure(
+            address="1 NOWHERE RD",
+            reason="not_found",
+            last_failed_at=datetime.now(timezone.utc) - timedelta(hours=2),
+        )
+    )
+    db_session.flush()
+
+    with patch("server.pipeline_service.geocode_address", return_value=None) as mock_geocode:
+        geocode_with_db_cache("1 Nowhere Rd", db_session)
+    mock_geocode.assert_called_once()
+    assert db_session.get(GeocodeFailure, "1 NOWHERE RD").attempts == 2
+
+
+def test_geocoder_service_error_is_not_a_not_found(db_session):
+    from geopy.exc import GeocoderUnavailable  # type: ignore
+    from server.models import GeocodeFailure
+    from server.pipeline_service import geocode_with_db_cache
+
+    with patch(
+        "server.pipeline_service.geocode_address", side_effect=GeocoderUnavailable("down")
+    ):
+        assert geocode_with_db_cache("1 Main St", db_session) is None
+    assert db_session.get(GeocodeFailure, "1 MAIN ST").reason == "service_error"
+
+
+def test_run_pipeline_decision_tree_error_skips_only_that_message(db_session):
+    def failing_route(ctx):
+        raise ValueError("bad operand")
+
+    logs: list[str] = []
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.compile_tree", return_value=failing_route),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+    ):
+        run_pipeline(
+            db_session,
+            decision_tree={"template": "x"},
+            fixture_messages=[FIXTURE_EMAIL],
+            log=logs.append,
+        )
+
+    assert "  Decision tree error: bad operand" in logs
+    assert db_session.query(Contact).filter_by(id="msg_001").first() is not None
+    assert db_session.query(OutboundEmail).count() == 0
+
+
+@pytest.mark.parametrize(
+    "tree, error",
+    [
+        (
+            {
+                "condition": {"field": "driver_state", "op": "in", "value": 5},
+                "then": {"template": "tell_me_more_general"},
+                "else": {"template": None},
+            },
+            "'in' operator needs a list",
+        ),
+        (
+            {
+                "range": {
+                    "field": "driver_state",
+                    "thresholds": [10],
+                    "branches": [{"template": "tell_me_more_general"}, {"template": None}],
+                },
+            },
+            "needs a number",
+        ),
+    ],
+)
+def test_run_pipeline_malformed_tree_node_leaves_contacts_unrouted(db_session, tree, error):
+    logs: list[str] = []
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+    ):
+        processed = run_pipeline(
+            db_session, decision_tree=tree, fixture_messages=[FIXTURE_EMAIL], log=logs.append
+        )
+
+    assert processed == ["msg_001"]
+    assert any(line.startswith("  Decision tree error:") and error in line for line in logs)
+    assert db_session.query(OutboundEmail).count() == 0
+
+
+def test_run_pipeline_incremental_sync_fetches_only_new_messages(db_session):
+    from server.models import AppConfig
+
+    from tests.fake_gmail import FakeGmailService
+
+    gmail = FakeGmailService()
+    gmail.add_message(FIXTURE_EMAIL)
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("src.itselectric.gmail.get_service", return_value=gmail),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+    ):
+        assert run_pipeline(db_session, log=lambda m: None) == ["msg_001"]
+        gmail.add_message({**FIXTURE_EMAIL, "id": "msg_002"})
+        gmail.calls.clear()
+        assert run_pipeline(db_session, log=lambda m: None) == ["msg_002"]
+
+    assert gmail.count("messages.get") == 1
+    assert gmail.count("messages.list") == 0
+    checkpoint = db_session.query(AppConfig).filter_by(key="__gmail_history_ids__").first()
+    assert checkpoint.value == '{"INBOX": "1002"}'
+
+
+def test_run_pipeline_full_scan_downloads_only_unseen_messages(db_session):
+    from server.models import AppConfig
+
+    from tests.fake_gmail import FakeGmailService
+
+    db_session.add(AppConfig(key="gmail_sync_mode", value="full"))
+    db_session.add(Contact(id="msg_001", parse_status="parsed", name="Jane"))
+    db_session.commit()
+    gmail = FakeGmailService()
+    gmail.add_message(FIXTURE_EMAIL)
+    gmail.add_message({**FIXTURE_EMAIL, "id": "msg_002"})
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("src.itselectric.gmail.get_service", return_value=gmail),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+    ):
+        assert run_pipeline(db_session, log=lambda m: None) == ["msg_002"]
+
+    assert gmail.count("messages.get") == 1
+
+
+def test_known_contact_ids_chunks_large_id_lists(db_session):
+    from server.pipeline_service import known_contact_ids
+
+    db_session.add_all([Contact(id=f"m{i}", parse_status="parsed") for i in range(0, 2000, 2)])
+    db_session.commit()
+    known = known_contact_ids(db_session, [f"m{i}" for i in range(2000)])
+    assert len(known) == 1000
+    assert "m0" in known and "m1" not in known
+
+
+def _count_statements(session, fn) -> int:
+    from sqlalchemy import event
+
+    statements = []
+
+    def _before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+    return len(statements)
+
+
+def test_run_pipeline_query_count_is_constant_in_message_count(db_session):
+    from server.models import AppConfig, GeoCache
+
+    db_session.add(GeoCache(address="1 ATLANTIC AVE BROOKLYN NY 11201", lat=40.69, lon=-73.99))
+    # One commit chunk per run, so only per-message statements could differ.
+    db_session.add(AppConfig(key="pipeline_commit_batch", value="100"))
+    db_session.commit()
+    tree = {
+        "condition": {"field": "distance_miles", "op": "lte", "value": 999},
+        "then": {"template": "tell_me_more_general"},
+        "else": {"template": None},
+    }
+
+    def _run(prefix: str, n: int) -> int:
+        messages = [{**FIXTURE_EMAIL, "id": f"{prefix}{i}"} for i in range(n)]
+        return _count_statements(
+            db_session,
+            lambda: run_pipeline(
+                db_session, decision_tree=tree, fixture_messages=messages, log=lambda m: None
+            ),
+        )
+
+    with patch("server.pipeline_service.get_credentials", return_value=MagicMock()):
+        small = _run("a", 3)
+        large = _run("b", 30)
+
+    assert small == large
+    assert db_session.query(OutboundEmail).count() == 33
+
+
+def test_run_pipeline_commits_in_chunks_and_records_run(db_session):
+    from server.models import AppConfig, PipelineRun
+
+    db_session.add(AppConfig(key="pipeline_commit_batch", value="2"))
+    db_session.commit()
+    messages = [{**FIXTURE_EMAIL, "id": f"m{i}"} for i in range(5)]
+    commits = []
+    original_commit = db_session.commit
+
+    def _commit():
+        commits.append(db_session.query(Contact).count())
+        original_commit()
+
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+        patch.object(db_session, "commit", side_effect=_commit),
+    ):
+        run_pipeline(db_session, fixture_messages=messages, log=lambda m: None, run_id="r1")
+
+    assert commits == [0, 2, 4, 5]  # run record, two chunks, final
+    record = db_session.get(PipelineRun, "r1")
+    assert (record.status, record.cursor, record.processed, record.total) == (
+        "completed", 5, 5, 5
+    )
+
+
+def test_run_pipeline_resumes_after_last_committed_message(db_session):
+    from server.models import AppConfig, PipelineRun
+
+    from tests.fake_gmail import FakeGmailService
+
+    db_session.add(AppConfig(key="pipeline_commit_batch", value="2"))
+    db_session.commit()
+    gmail = FakeGmailService()
+    for i in range(5):
+        gmail.add_message({**FIXTURE_EMAIL, "id": f"m{i}"})
+
+    from server.pipeline_service import extract_parsed
+
+    calls = {"n": 0}
+
+    def _flaky_extract(text):
+        calls["n"] += 1
+        if calls["n"] == 4:
+            raise RuntimeError("boom")
+        return extract_parsed(text)
+
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("src.itselectric.gmail.get_service", return_value=gmail),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+        patch("server.pipeline_service.extract_parsed", side_effect=_flaky_extract),
+    ):
+        with pytest.raises(RuntimeError):
+            run_pipeline(db_session, log=lambda m: None, run_id="first")
+        failed = db_session.get(PipelineRun, "first")
+        assert (failed.status, failed.cursor) == ("failed", 2)
+        assert db_session.query(Contact).count() == 2
+
+        gmail.calls.clear()
+        processed = run_pipeline(db_session, log=lambda m: None, run_id="second")
+
+    assert processed == ["m2", "m1", "m0"]
+    assert gmail.count("messages.list") == 0  # resumed from the stored plan
+    assert gmail.count("messages.get") == 3
+    resumed = db_session.get(PipelineRun, "second")
+    assert (resumed.status, resumed.resumed_from) == ("completed", "first")
+    assert db_session.get(PipelineRun, "first").status == "resumed"
+    assert db_session.query(Contact).count() == 5
+
+
+def _email_at(i: int) -> dict:
+    text = (
+        f"[plain]: it's electric Driver {i} "
+        f"The user has an address of {i} Atlantic Ave Brooklyn NY 11201 "
+        f"and has an email of driver{i}@example.com\n"
+        f"Email address submitted in form\ndriver{i}@example.com"
+    )
+    return {**FIXTURE_EMAIL, "id": f"m{i}", "payload": {
+        "mimeType": "text/plain", "body": {"data": _b64(text)},
+    }}
+
+
+def test_run_pipeline_stages_overlap_but_commit_in_message_order(db_session):
+    import time
+
+    from server.models import AppConfig
+
+    db_session.add(AppConfig(key="pipeline_geocode_workers", value="8"))
+    db_session.commit()
+    messages = [_email_at(i) for i in range(8)]  # distinct addresses: all geocache misses
+    lines = []
+
+    def _slow_geocode(address, **kwargs):
+        time.sleep(0.1)
+        return (40.6929, -73.9958)
+
+    start = time.perf_counter()
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.geocode_address", side_effect=_slow_geocode),
+    ):
+        processed = run_pipeline(db_session, fixture_messages=messages, log=lines.append)
+    elapsed = time.perf_counter() - start
+
+    assert processed == [f"m{i}" for i in range(8)]
+    assert elapsed < 0.6  # 0.8 s if the lookups ran one after another
+    processing = [line for line in lines if line.startswith("  Processing")]
+    assert processing == [f"  Processing: Driver {i} / {i} Atlantic Ave Brooklyn NY 11201"
+                          for i in range(8)]
+
+
+def test_run_pipeline_batches_hubspot_upserts(db_session):
+    from server.models import AppConfig
+
+    db_session.add(AppConfig(key="hubspot_access_token", value="tok"))
+    db_session.commit()
+    messages = [_email_at(i) for i in range(6)]
+    batches = []
+
+    def _upsert_contacts(token, contacts, base_url):
+        batches.append(len(contacts))
+        return {email: f"hs-{email}" for _, email, _ in contacts if email != "driver3@example.com"}
+
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+        patch("src.itselectric.hubspot.upsert_contacts", side_effect=_upsert_contacts),
+    ):
+        run_pipeline(db_session, fixture_messages=messages, log=lambda m: None)
+
+    assert sum(batches) == 6
+    assert len(batches) < 6
+    statuses = {c.id: c.hubspot_status for c in db_session.query(Contact)}
+    assert statuses.pop("m3") == "failed"
+    assert set(statuses.values()) == {"synced"}
+
+
+def test_run_pipeline_hubspot_batches_are_not_capped_by_the_stage_window(db_session):
+    from server.models import AppConfig
+
+    db_session.add(AppConfig(key="hubspot_access_token", value="tok"))
+    db_session.add(AppConfig(key="pipeline_commit_batch", value="10"))
+    db_session.commit()
+    messages = [_email_at(i) for i in range(45)]  # run_stages keeps ~20 in flight
+    batches = []
+
+    def _upsert_contacts(token, contacts, base_url):
+        batches.append(len(contacts))
+        return {email: f"hs-{email}" for _, email, _ in contacts}
+
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+        patch("src.itselectric.hubspot.upsert_contacts", side_effect=_upsert_contacts),
+    ):
+        run_pipeline(db_session, fixture_messages=messages, log=lambda m: None)
+
+    assert batches == [45]
+    assert {c.hubspot_status for c in db_session.query(Contact)} == {"synced"}
+
+
+def test_run_pipeline_auto_send_queues_jobs_instead_of_sending(db_session):
+    from server.job_queue import run_pending
+    from server.models import Job
+
+    tree = {
+        "condition": {"field": "distance_miles", "op": "lte", "value": 999},
+        "then": {"template": "tell_me_more_general"},
+        "else": {"template": None},
+    }
+    messages = [{**FIXTURE_EMAIL, "id": f"m{i}"} for i in range(3)]
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+        patch("server.job_handlers.send_email", return_value=True) as send,
+    ):
+        run_pipeline(
+            db_session, decision_tree=tree, auto_send=True, fixture_messages=messages,
+            log=lambda m: None,
+        )
+        assert send.call_count == 0
+        assert {e.status for e in db_session.query(OutboundEmail)} == {"queued"}
+        assert db_session.query(Job).filter_by(kind="send_email", status="queued").count() == 3
+
+        with (
+            patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+            patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+        ):
+            assert run_pending(db_session) == 3
+
+    assert send.call_count == 3
+    assert "Hi Jane Smith" in send.call_args.args[3]
+    statuses = {(e.status, e.sent_by) for e in db_session.query(OutboundEmail)}
+    assert statuses == {("sent", "auto")}
+
+
+def test_run_pipeline_skips_hubspot_for_unchanged_contacts(db_session):
+    from server.models import AppConfig, HubSpotSync
+
+    db_session.add(AppConfig(key="hubspot_access_token", value="tok"))
+    db_session.commit()
+    sent = []
+
+    def _upsert_contacts(token, contacts, base_url):
+        sent.extend(email for _, email, _ in contacts)
+        return {email: f"hs-{email}" for _, email, _ in contacts}
+
+    def _run(prefix, messages):
+        messages = [{**m, "id": f"{prefix}{m['id']}"} for m in messages]
+        run_pipeline(db_session, fixture_messages=messages, log=lambda m: None)
+
+    history = [_email_at(i) for i in range(4)]
+    with (
+        patch("server.pipeline_service.get_credentials", return_value=MagicMock()),
+        patch("server.pipeline_service.geocode_address", return_value=(40.6929, -73.9958)),
+        patch("src.itselectric.hubspot.upsert_contacts", side_effect=_upsert_contacts),
+    ):
+        _run("a", history)
+        assert len(sent) == 4
+        sent.clear()
+        _run("b", history)  # same people, same details: no CRM calls at all
+        assert sent == []
+
+        moved = _email_at(2)
+        moved["payload"]["body"]["data"] = _b64(
+            "[plain]: it's electric Driver 2 "
+            "The user has an address of 9 Court St Brooklyn NY 11201 "
+            "and has an email of driver2@example.com\n"
+            "Email address submitted in form\ndriver2@example.com"
+        )
+        _run("c", [moved])
+        assert sent == ["driver2@example.com"]
+
+    assert db_session.query(HubSpotSync).count() == 4
+    statuses = {c.hubspot_status for c in db_session.query(Contact)}
+    assert statuses == {"synced"}
+
+
+def _pending_emails(session, count: int) -> None:
+    charger = session.query(Charger).first()
+    for i in range(count):
+        session.add(Contact(
+            id=f"c{i}", name=f"<b>Driver {i}</b>", address="1 Atlantic Ave Brooklyn NY 11201",
+            email_primary=f"driver{i}@example.com", parse_status="parsed",
+            nearest_charger_id=charger.id,
+        ))
+        session.add(OutboundEmail(
+            contact_id=f"c{i}", template_name="tell_me_more_general", subject="Hi!",
+        ))
+    session.add(Contact(id="no_email", parse_status="parsed"))
+    session.add(OutboundEmail(contact_id="no_email", template_name="tell_me_more_general"))
+    session.commit()
+
+
+def test_run_send_batch_queues_one_send_job_per_pending_email(db_session):
+    from server.job_queue import run_pending
+    from server.models import AppConfig, Job, SheetsOutboxRow
+    from server.pipeline_service import run_send_batch, send_batch_progress
+
+    _pending_emails(db_session, 12)
+    db_session.add(AppConfig(key="spreadsheet_id", value="sheet123"))
+    db_session.commit()
+
+    batch = run_send_batch(db_session)
+    assert (batch["status"], batch["total"], batch["done"], batch["skipped"]) == (
+        "running", 12, 0, 1
+    )
+    # Queued emails are not pending any more, so a second batch queues nothing.
+    assert run_send_batch(db_session)["total"] == 0
+    assert db_session.query(Job).filter_by(kind="send_email").count() == 12
+
+    bodies = {}
+
+    def _send(creds, to, subject, body, message_id=None):
+        bodies[to] = body
+        return to != "driver3@example.com"
+
+    db_session.query(Job).update({"max_attempts": 1})
+    db_session.commit()
+    with (
+        patch("server.job_handlers.get_credentials", return_value=MagicMock()),
+        patch("server.job_handlers.send_email", side_effect=_send),
+        patch("server.job_handlers.GMAIL_SEND_THROTTLE.wait"),
+    ):
+        run_pending(db_session)
+
+    progress = send_batch_progress(db_session, batch["batch_id"])
+    assert (progress["status"], progress["done"], progress["sent"], progress["failed"]) == (
+        "completed", 12, 11, 1
+    )
+    assert {r["contact_id"] for r in progress["results"]} == {f"c{i}" for i in range(12)}
+    assert progress["finished_at"] is not None
+    # Variables are HTML-escaped into the compiled template.
+    assert "&lt;b&gt;Driver 0&lt;/b&gt;" in bodies["driver0@example.com"]
+    statuses = {e.contact_id: e.status for e in db_session.query(OutboundEmail).all()}
+    assert (statuses["c0"], statuses["c3"], statuses["no_email"]) == ("sent", "failed", "pending")
+    # Batch sends record their Sheets rows like manual sends.
+    assert db_session.query(SheetsOutboxRow).count() == 11
+    assert send_batch_progress(db_session, "nope") is None
@@ -6,6 +6,7 @@ from server.db import Base
 from server.models import AppConfig, Charger, GeoCache, Template
 from server.seed import (
     DEFAULT_CHARGERS_CSV,
+    rekey_geocache,
     seed_chargers,
     seed_config,
     seed_decision_tree_from_yaml,
@@ -44,11 +45,37 @@ def test_seed_geocache_imports_json(session, tmp_path):
     cache_file = tmp_path / "geocache.json"
     cache_file.write_text(json.dumps(cache))
     seed_geocache(session, str(cache_file))
-    entry = session.query(GeoCache).filter_by(address="123 Main St, Boston MA").first()
+    entry = session.query(GeoCache).filter_by(address="123 MAIN ST BOSTON MA").first()
     assert entry is not None
     assert abs(entry.lat - 42.36) < 0.001
 
 
+def test_seed_geocache_merges_spelling_variants(session, tmp_path):
+    cache = {
+        "15 Washington St., Brooklyn, NY 11205": [40.69, -73.96],
+        "15 washington street brooklyn ny 11205": [40.70, -73.97],
+    }
+    cache_file = tmp_path / "geocache.json"
+    cache_file.write_text(json.dumps(cache))
+    assert seed_geocache(session, str(cache_file)) == 1
+    assert session.query(GeoCache).count() == 1
+
+
+def test_rekey_geocache_canonicalizes_and_merges(session):
+    session.add(GeoCache(address="15 Washington St., Brooklyn, NY 11205", lat=1.0, lon=2.0))
+    session.add(GeoCache(address="15 WASHINGTON ST BROOKLYN NY 11205", lat=3.0, lon=4.0))
+    session.add(GeoCache(address="1 Main Street, Boston, MA", lat=5.0, lon=6.0))
+    session.flush()
+
+    assert rekey_geocache(session) == 2
+    keys = {g.address: (g.lat, g.lon) for g in session.query(GeoCache).all()}
+    assert keys == {
+        "15 WASHINGTON ST BROOKLYN NY 11205": (3.0, 4.0),
+        "1 MAIN ST BOSTON MA": (5.0, 6.0),
+    }
+    assert rekey_geocache(session) == 0
+
+
 def test_seed_geocache_skips_missing_file(session):
     seed_geocache(session, "/nonexistent/geocache.json")
     assert session.query(GeoCache).count() == 0
@@ -78,6 +105,21 @@ def test_seed_templates_from_yaml_creates_rows(session, tmp_path):
     assert "waitlist" in names
 
 
+def test_seed_templates_from_yaml_walks_dispatch_and_range_nodes(session, tmp_path):
+    tree_yaml = tmp_path / "tree.yaml"
+    tree_yaml.write_text(
+        "dispatch:\n  field: driver_state\n  cases:\n"
+        "    MA:\n      template: tell_me_more_massachusetts\n"
+        "    NY:\n      range:\n        field: distance_miles\n        thresholds: [5]\n"
+        "        branches:\n          - template: tell_me_more_brooklyn\n"
+        "          - template: null\n"
+        "  default:\n    template: waitlist\n"
+    )
+    seed_templates_from_yaml(session, str(tree_yaml))
+    names = {t.name for t in session.query(Template).all()}
+    assert names == {"tell_me_more_massachusetts", "tell_me_more_brooklyn", "waitlist"}
+
+
 def test_seed_decision_tree_from_yaml_inserts_when_absent(session, tmp_path):
     yaml_file = tmp_path / "tree.yaml"
     yaml_file.write_text(
@@ -2,7 +2,15 @@
 
 from unittest.mock import MagicMock, patch
 
-from itselectric.sheets import COLUMNS, append_rows, row_hash, truncate
+from itselectric.sheets import (
+    COLUMNS,
+    SheetHashIndex,
+    append_rows,
+    get_existing_hashes,
+    row_hash,
+    sync_sheet_index,
+    truncate,
+)
 
 
 def _make_row(contact_status="created", email_status="sent"):
@@ -34,9 +42,9 @@ class TestSheetColumns:
 
 class TestAppendRowsHubSpotStatus:
     def test_row_includes_contact_and_email_status(self):
-        with patch("itselectric.sheets.build", return_value=_mock_service_with_header()) as _:
+        with patch("itselectric.sheets.get_service", return_value=_mock_service_with_header()) as _:
             mock_service = _mock_service_with_header()
-            with patch("itselectric.sheets.build", return_value=mock_service):
+            with patch("itselectric.sheets.get_service", return_value=mock_service):
                 append_rows(MagicMock(), "sheet-id", "Sheet1", [_make_row()], 5000)
 
         appended = mock_service.spreadsheets().values().append.call_args.kwargs["body"]["values"]
@@ -46,7 +54,7 @@ class TestAppendRowsHubSpotStatus:
 
     def test_failed_statuses_written(self):
         mock_service = _mock_service_with_header()
-        with patch("itselectric.sheets.build", return_value=mock_service):
+        with patch("itselectric.sheets.get_service", return_value=mock_service):
             append_rows(MagicMock(), "sheet-id", "Sheet1", [_make_row("failed", "failed")], 5000)
 
         row = mock_service.spreadsheets().values().append.call_args.kwargs["body"]["values"][0]
@@ -55,7 +63,7 @@ class TestAppendRowsHubSpotStatus:
 
     def test_empty_statuses_written(self):
         mock_service = _mock_service_with_header()
-        with patch("itselectric.sheets.build", return_value=mock_service):
+        with patch("itselectric.sheets.get_service", return_value=mock_service):
             append_rows(MagicMock(), "sheet-id", "Sheet1", [_make_row("", "")], 5000)
 
         row = mock_service.spreadsheets().values().append.call_args.kwargs["body"]["values"][0]
@@ -117,7 +125,107 @@ def test_row_hash_parsed_vs_unparsed_differ():
     assert row_hash(parsed, LIMIT) != row_hash(unparsed, LIMIT)
 
 
+def test_row_hash_key_separates_otherwise_identical_rows():
+    row = ["2024-01-01", "Alice", "1 Main St", "a@example.com", "", "body"]
+    assert row_hash(row, LIMIT, "out-1") != row_hash(row, LIMIT, "out-2")
+    assert row_hash(row, LIMIT, "out-1") != row_hash(row, LIMIT)
+    assert row_hash(row, LIMIT, None) == row_hash(row, LIMIT)
+
+
 def test_row_hash_short_row():
     """Should not raise on rows with fewer than 6 columns."""
     row_hash(["2024-01-01"], LIMIT)
     row_hash([], LIMIT)
+
+
+def test_append_rows_with_known_header_skips_the_header_check():
+    mock_service = MagicMock()
+    with patch("itselectric.sheets.get_service", return_value=mock_service):
+        append_rows(MagicMock(), "sheet-id", "Sheet1", [_make_row()], 5000, has_header=True)
+    mock_service.spreadsheets().values().get.assert_not_called()
+    assert len(mock_service.spreadsheets().values().append.call_args.kwargs["body"]["values"]) == 1
+
+
+class _FakeSheet:
+    """values().get over an in-memory list of rows; records each requested range."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.ranges = []
+        self.service = MagicMock()
+        self.service.spreadsheets().values().get.side_effect = self._get
+
+    def _get(self, spreadsheetId, range):
+        self.ranges.append(range)
+        start = int(range.split("!A")[1].split(":")[0] or 1)
+        request = MagicMock()
+        request.execute.return_value = {"values": self.rows[start - 1 :]}
+        return request
+
+
+def _sheet_row(i):
+    return ["2024-01-01", f"Driver {i}", "1 Main St", f"d{i}@example.com", "", "body"]
+
+
+class TestSheetHashIndex:
+    def _sync(self, sheet, index):
+        with patch("itselectric.sheets.get_service", return_value=sheet.service):
+            sync_sheet_index(MagicMock(), "sid", "Sheet1", 5000, index)
+            return index.hashes("sid", "Sheet1")
+
+    def test_reads_only_rows_appended_since_the_last_sync(self, tmp_path):
+        sheet = _FakeSheet([COLUMNS] + [_sheet_row(i) for i in range(3)])
+        index = SheetHashIndex(tmp_path / "index.sqlite3")
+        assert len(self._sync(sheet, index)) == 3
+        assert sheet.ranges == ["'Sheet1'!A:J"]
+
+        sheet.rows += [_sheet_row(3), _sheet_row(4)]
+        hashes = self._sync(sheet, index)
+        # Re-reads the watermark row (4) to check it, then the two new rows.
+        assert sheet.ranges[-1] == "'Sheet1'!A4:J"
+        assert hashes == {row_hash(_sheet_row(i), 5000) for i in range(5)}
+        assert index.watermark("sid", "Sheet1").row_count == 6
+
+        # The index persists: a new instance continues from the same watermark.
+        reopened = SheetHashIndex(tmp_path / "index.sqlite3")
+        assert self._sync(sheet, reopened) == hashes
+        assert sheet.ranges[-1] == "'Sheet1'!A6:J"
+
+    def test_edited_rows_or_stale_index_trigger_a_full_read(self, tmp_path):
+        sheet = _FakeSheet([COLUMNS] + [_sheet_row(i) for i in range(3)])
+        index = SheetHashIndex(tmp_path / "index.sqlite3")
+        self._sync(sheet, index)
+
+        del sheet.rows[1]  # a row above the watermark was deleted
+        hashes = self._sync(sheet, index)
+        assert sheet.ranges[-2:] == ["'Sheet1'!A4:J", "'Sheet1'!A:J"]
+        assert row_hash(_sheet_row(0), 5000) not in hashes
+
+        index.reconcile_seconds = 0
+        self._sync(sheet, index)
+        assert sheet.ranges[-1] == "'Sheet1'!A:J"
+
+    def test_missing_returns_hashes_not_on_the_sheet(self, tmp_path):
+        sheet = _FakeSheet([COLUMNS, _sheet_row(0)])
+        index = SheetHashIndex(tmp_path / "index.sqlite3")
+        self._sync(sheet, index)
+        on_sheet, new = row_hash(_sheet_row(0), 5000), row_hash(_sheet_row(1), 5000)
+        assert index.missing("sid", "Sheet1", [on_sheet, new]) == {new}
+
+    def test_keyed_hashes_survive_a_full_read(self, tmp_path):
+        sheet = _FakeSheet([COLUMNS, _sheet_row(0)])
+        index = SheetHashIndex(tmp_path / "index.sqlite3")
+        keyed = row_hash(_sheet_row(0), 5000, "out-1")
+        index.add("sid", "Sheet1", [keyed])
+        index.reconcile_seconds = 0
+        self._sync(sheet, index)
+        assert index.missing("sid", "Sheet1", [keyed, row_hash(_sheet_row(0), 5000, "out-2")]) == {
+            row_hash(_sheet_row(0), 5000, "out-2")
+        }
+
+    def test_get_existing_hashes_reads_the_whole_sheet(self):
+        sheet = _FakeSheet([COLUMNS] + [_sheet_row(i) for i in range(2)])
+        with patch("itselectric.sheets.get_service", return_value=sheet.service):
+            hashes = get_existing_hashes(MagicMock(), "sid", "Sheet1", 5000)
+        assert hashes == {row_hash(_sheet_row(i), 5000) for i in range(2)}
+        assert sheet.ranges == ["'Sheet1'!A:J"]
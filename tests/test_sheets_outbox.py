@@ -0,0 +1,159 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+import server.models  # noqa: F401
+from server.db import Base
+from server.models import AppConfig, Job, SheetsOutboxRow
+from server.sheets_outbox import buffer_row, flush_outbox, outbox_metrics
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture()
+def db_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(AppConfig(key="sheets_flush_rows", value="3"))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _row(i: int) -> list[str]:
+    return ["2024-01-01", f"Driver {i}", "1 Main St", f"d{i}@example.com", "", "body",
+            "", "", "synced", "tell_me_more_general"]
+
+
+def test_buffer_row_queues_a_delayed_flush_then_one_at_the_size_limit(db_session):
+    buffer_row(db_session, "s1", "Sheet1", _row(0))
+    db_session.commit()
+    (delayed,) = db_session.query(Job).filter_by(kind="sheets_flush").all()
+    assert delayed.run_after.replace(tzinfo=timezone.utc) > (
+        datetime.now(timezone.utc) + timedelta(seconds=50)
+    )
+
+    buffer_row(db_session, "s1", "Sheet1", _row(1))
+    buffer_row(db_session, "s1", "Sheet1", _row(2))
+    db_session.commit()
+    assert db_session.query(Job).filter_by(kind="sheets_flush").count() == 2
+
+
+def test_row_buffered_during_a_flush_gets_its_own_delayed_flush(db_session):
+    buffer_row(db_session, "s1", "Sheet1", _row(0))
+    db_session.commit()
+    (flush_job,) = db_session.query(Job).filter_by(kind="sheets_flush").all()
+    flush_job.status = "running"  # claimed by a worker; its flush reads the outbox now
+    db_session.commit()
+
+    def append_then_buffer(*args, **kwargs):
+        buffer_row(db_session, "s1", "Sheet1", _row(1))
+
+    with patch("server.sheets_outbox.append_rows", side_effect=append_then_buffer) as append:
+        assert flush_outbox(db_session, MagicMock()) == 1
+    assert [r[1] for r in append.call_args.args[3]] == ["Driver 0"]
+
+    # Only one row is pending, below the size trigger, yet a delayed flush is queued.
+    assert db_session.query(SheetsOutboxRow).count() == 1
+    (queued,) = db_session.query(Job).filter_by(kind="sheets_flush", status="queued").all()
+    assert queued.run_after.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+
+    # Further rows share that flush rather than queuing more.
+    buffer_row(db_session, "s1", "Sheet1", _row(2))
+    db_session.commit()
+    assert db_session.query(Job).filter_by(kind="sheets_flush", status="queued").count() == 1
+
+
+def test_flush_appends_once_per_sheet_and_remembers_the_header(db_session):
+    for i in range(3):
+        buffer_row(db_session, "s1", "Sheet1", _row(i))
+    buffer_row(db_session, "s2", "Leads", _row(9))
+    db_session.commit()
+
+    with patch("server.sheets_outbox.append_rows") as append:
+        assert flush_outbox(db_session, MagicMock()) == 4
+    assert append.call_count == 2
+    first = append.call_args_list[0]
+    assert first.args[1:3] == ("s1", "Sheet1")
+    assert [r[1] for r in first.args[3]] == ["Driver 0", "Driver 1", "Driver 2"]
+    assert first.kwargs["has_header"] is None  # unknown: append_rows checks once
+    assert db_session.query(SheetsOutboxRow).count() == 0
+
+    buffer_row(db_session, "s1", "Sheet1", _row(3))
+    db_session.commit()
+    with patch("server.sheets_outbox.append_rows") as append:
+        flush_outbox(db_session, MagicMock())
+    assert append.call_args.kwargs["has_header"] is True
+    assert json.loads(db_session.get(AppConfig, "__sheets_headers__").value) == [
+        "s1/Sheet1", "s2/Leads",
+    ]
+
+
+def test_failed_flush_keeps_rows_and_reports_lag(db_session):
+    buffer_row(db_session, "s1", "Sheet1", _row(0))
+    db_session.commit()
+    before = outbox_metrics(db_session)["errors"]
+
+    with (
+        patch("server.sheets_outbox.append_rows", side_effect=RuntimeError("quota exceeded")),
+        pytest.raises(RuntimeError),
+    ):
+        flush_outbox(db_session, MagicMock())
+    db_session.rollback()
+
+    metrics = outbox_metrics(db_session)
+    assert metrics["pending_rows"] == 1
+    assert metrics["lag_seconds"] >= 0
+    assert metrics["errors"] == before + 1
+    assert metrics["last_error"] == "RuntimeError: quota exceeded"
+
+
+def test_flush_skips_rows_already_on_the_sheet(db_session, tmp_path):
+    from src.itselectric.sheets import SheetHashIndex, SheetWatermark, row_hash
+
+    index = SheetHashIndex(tmp_path / "index.sqlite3")
+    index.replace("s1", "Sheet1", [row_hash(_row(0), 5000)], SheetWatermark(2, None, 5000, 0))
+    for i in (0, 1, 1):
+        buffer_row(db_session, "s1", "Sheet1", _row(i))
+    db_session.commit()
+    before = outbox_metrics(db_session)["rows_deduplicated"]
+
+    with (
+        patch("server.sheets_outbox.sync_sheet_index") as sync,
+        patch("server.sheets_outbox.append_rows") as append,
+    ):
+        assert flush_outbox(db_session, MagicMock(), index) == 3
+    assert sync.call_count == 1
+    assert [r[1] for r in append.call_args.args[3]] == ["Driver 1"]
+    assert outbox_metrics(db_session)["rows_deduplicated"] == before + 2
+    assert db_session.query(SheetsOutboxRow).count() == 0
+
+
+def test_flush_keeps_a_second_email_to_the_same_contact(db_session, tmp_path):
+    from src.itselectric.sheets import SheetHashIndex, SheetWatermark, row_hash
+
+    index = SheetHashIndex(tmp_path / "index.sqlite3")
+    # The pipeline's unkeyed row for the contact is already on the sheet.
+    index.replace("s1", "Sheet1", [row_hash(_row(0), 5000)], SheetWatermark(2, None, 5000, 0))
+    buffer_row(db_session, "s1", "Sheet1", _row(0), dedup_key="out-1")
+    buffer_row(db_session, "s1", "Sheet1", _row(0), dedup_key="out-2")
+    db_session.commit()
+
+    with (
+        patch("server.sheets_outbox.sync_sheet_index"),
+        patch("server.sheets_outbox.append_rows") as append,
+    ):
+        assert flush_outbox(db_session, MagicMock(), index) == 2
+    assert len(append.call_args.args[3]) == 2
+
+    # A retried flush of an email already appended is dropped.
+    buffer_row(db_session, "s1", "Sheet1", _row(0), dedup_key="out-2")
+    db_session.commit()
+    with (
+        patch("server.sheets_outbox.sync_sheet_index"),
+        patch("server.sheets_outbox.append_rows") as append,
+    ):
+        flush_outbox(db_session, MagicMock(), index)
+    append.assert_not_called()
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+from src.itselectric.stages import Stage, Throttle, run_stages
+
+
+def _sleepy(seconds_by_item):
+    def fn(item):
+        time.sleep(seconds_by_item(item))
+        return item
+    return fn
+
+
+def test_results_come_back_in_input_order():
+    stages = [
+        Stage("a", _sleepy(lambda i: 0.02 if i % 3 == 0 else 0), workers=4),
+        Stage("b", lambda i: i * 10, workers=2),
+    ]
+    results = list(run_stages(range(20), stages))
+    assert results == [(i * 10, None) for i in range(20)]
+
+
+def test_failed_item_skips_later_stages_and_keeps_its_position():
+    def boom(i):
+        if i == 2:
+            raise ValueError("bad item")
+        return i
+
+    seen = []
+
+    def record(i):
+        seen.append(i)
+        return i
+
+    results = list(run_stages(range(5), [Stage("a", boom), Stage("b", record)]))
+    assert [r for r, _ in results] == [0, 1, 2, 3, 4]
+    assert isinstance(results[2][1], ValueError)
+    assert [e for _, e in results].count(None) == 4
+    assert 2 not in seen
+
+
+def test_stage_workers_run_concurrently():
+    stage = Stage("slow", _sleepy(lambda i: 0.1), workers=8)
+    start = time.perf_counter()
+    assert len(list(run_stages(range(16), [stage]))) == 16
+    assert time.perf_counter() - start < 0.8  # 1.6 s if run one at a time
+
+
+def test_in_flight_items_are_bounded():
+    fed = []
+
+    def source():
+        for i in range(200):
+            fed.append(i)
+            yield i
+
+    results = run_stages(source(), [Stage("a", lambda i: i)])
+    next(results)
+    time.sleep(0.2)
+    assert len(fed) < 20  # feeder blocked by the window, not all 200 read
+    results.close()
+
+
+def test_closing_early_stops_worker_threads():
+    before = threading.active_count()
+    results = run_stages(range(1000), [Stage("a", _sleepy(lambda i: 0.001), workers=4)])
+    next(results)
+    results.close()
+    assert threading.active_count() == before
+
+
+def test_source_error_is_yielded_at_its_position():
+    def source():
+        yield 1
+        raise RuntimeError("listing failed")
+
+    results = list(run_stages(source(), [Stage("a", lambda i: i)]))
+    assert results[0] == (1, None)
+    assert isinstance(results[1][1], RuntimeError)
+
+
+def test_stage_needs_a_worker():
+    with pytest.raises(ValueError):
+        Stage("a", lambda i: i, workers=0)
+
+
+def test_throttle_spaces_calls():
+    throttle = Throttle(per_second=50)
+    start = time.perf_counter()
+    for _ in range(6):
+        throttle.wait()
+    assert time.perf_counter() - start >= 0.09  # 5 intervals of 20 ms
@@ -30,7 +30,7 @@ vi.mock('./api/client', () => ({
       sent_by: 'auto', error_message: null,
     }],
   }),
-  sendContact: vi.fn().mockResolvedValue({ ok: true, status: 'sent' }),
+  sendContact: vi.fn().mockResolvedValue({ ok: true, status: 'queued', job_id: 'job1' }),
   skipContact: vi.fn().mockResolvedValue({ ok: true }),
   previewImport: vi.fn().mockResolvedValue({
     import_id: 'imp-1',
@@ -50,6 +50,20 @@ test('InboxDetail shows Send button for pending contact', async () => {
   expect(await screen.findByText('Send')).toBeInTheDocument()
 })
 
+test('InboxDetail shows a queued send as in progress, not as an error', async () => {
+  const { getContact } = await import('./api/client')
+  const detail = await getContact('msg1')
+  vi.mocked(getContact).mockResolvedValueOnce({
+    ...detail,
+    outbound_emails: [{ ...detail.outbound_emails[0], status: 'queued' }],
+  })
+  const { InboxDetail } = await import('./pages/InboxDetail')
+  render(<InboxDetail id="msg1" onAction={() => {}} />)
+  const badge = await screen.findByText('queued')
+  expect(badge.className).toContain('text-blue-700')
+  expect(screen.queryByText('Send')).not.toBeInTheDocument()
+})
+
 test('inbox route shows contact name', async () => {
   render(
     <MemoryRouter initialEntries={['/inbox']}>
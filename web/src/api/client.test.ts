@@ -5,6 +5,8 @@ import {
   listContacts,
   getContact,
   sendContact,
+  sendBatch,
+  getSendBatch,
   skipContact,
   previewImport,
   confirmImport,
@@ -81,9 +83,10 @@ describe('getContact', () => {
 
 describe('sendContact', () => {
   it('POSTs to send endpoint', async () => {
-    mockFetch({ ok: true, status: 'sent' })
+    mockFetch({ ok: true, status: 'queued', job_id: 'job1' })
     const result = await sendContact('msg1')
     expect(result.ok).toBe(true)
+    expect(result.job_id).toBe('job1')
     expect(fetch).toHaveBeenCalledWith(
       '/api/contacts/msg1/send',
       expect.objectContaining({ method: 'POST' })
@@ -91,6 +94,20 @@ describe('sendContact', () => {
   })
 })
 
+describe('sendBatch', () => {
+  it('POSTs to send-batch and polls progress by batch_id', async () => {
+    mockFetch({ batch_id: 'b1', status: 'running', total: 2, done: 0, skipped: 0 })
+    const started = await sendBatch()
+    expect(started.batch_id).toBe('b1')
+    expect(fetch).toHaveBeenCalledWith(
+      '/api/contacts/send-batch',
+      expect.objectContaining({ method: 'POST' })
+    )
+    await getSendBatch('b1')
+    expect(fetch).toHaveBeenCalledWith('/api/contacts/send-batch/b1')
+  })
+})
+
 describe('skipContact', () => {
   it('POSTs to skip endpoint', async () => {
     mockFetch({ ok: true })
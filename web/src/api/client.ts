@@ -28,11 +28,40 @@ export interface OutboundEmail {
   subject: string | null
   body_html: string | null
   sent_at: string | null
-  status: string
+  status: OutboundStatus
   sent_by: string
   error_message: string | null
 }
 
+// pending → queued (a send job is waiting) → sending → sent | failed; or skipped.
+export type OutboundStatus = 'pending' | 'queued' | 'sending' | 'sent' | 'failed' | 'skipped'
+
+export interface SendQueued {
+  ok: boolean
+  status: 'queued'
+  job_id: string
+}
+
+export interface SendBatchResult {
+  contact_id: string | null
+  outbound_id: string
+  status: OutboundStatus | 'deleted'
+  error: string | null
+}
+
+export interface SendBatchProgress {
+  batch_id: string
+  status: 'running' | 'completed'
+  total: number
+  done: number
+  sent: number
+  failed: number
+  results: SendBatchResult[]
+  started_at: string | null
+  finished_at: string | null
+  skipped?: number // only in the response that starts the batch
+}
+
 export interface ContactDetail {
   contact: Contact
   outbound_emails: OutboundEmail[]
@@ -102,11 +131,19 @@ export function getContact(id: string): Promise<ContactDetail> {
 export function sendContact(
   id: string,
   opts?: { templateOverride?: string }
-): Promise<{ ok: boolean; status: string }> {
+): Promise<SendQueued> {
   const qs = opts?.templateOverride ? `?template_override=${opts.templateOverride}` : ''
   return request(`/api/contacts/${id}/send${qs}`, { method: 'POST' })
 }
 
+export function sendBatch(): Promise<SendBatchProgress> {
+  return request('/api/contacts/send-batch', { method: 'POST' })
+}
+
+export function getSendBatch(batchId: string): Promise<SendBatchProgress> {
+  return request(`/api/contacts/send-batch/${batchId}`)
+}
+
 export function skipContact(id: string): Promise<{ ok: boolean }> {
   return request(`/api/contacts/${id}/skip`, { method: 'POST' })
 }
@@ -10,6 +10,8 @@ interface Props {
 const STATUS_BADGE: Record<string, string> = {
   sent:     'text-green-700 bg-green-50',
   pending:  'text-orange-700 bg-orange-50',
+  queued:   'text-blue-700 bg-blue-50',
+  sending:  'text-blue-700 bg-blue-50',
   skipped:  'text-gray-500 bg-gray-100',
   failed:   'text-red-700 bg-red-50',
   unparsed: 'text-gray-500 bg-gray-100',
@@ -1,7 +1,7 @@
 import { render, screen } from '@testing-library/react'
 import userEvent from '@testing-library/user-event'
 import { vi } from 'vitest'
-import TreeNodeEditor from './TreeNodeEditor'
+import TreeNodeEditor, { toEditableTree, toSavedTree } from './TreeNodeEditor'
 import type { TreeNode } from './TreeNodeEditor'
 
 const TEMPLATES = ['general_car_info', 'waitlist', 'tell_me_more_dc', 'close', 'far']
@@ -85,3 +85,97 @@ test('renders then and else branches for condition node', () => {
   expect(screen.getByDisplayValue('close')).toBeInTheDocument()
   expect(screen.getByDisplayValue('far')).toBeInTheDocument()
 })
+
+test('clicking convert to dispatch replaces leaf with a dispatch node', async () => {
+  const onChange = vi.fn()
+  render(<TreeNodeEditor node={{ template: '' }} onChange={onChange} templates={TEMPLATES} />)
+  await userEvent.click(screen.getByRole('button', { name: /convert to dispatch/i }))
+  expect(onChange).toHaveBeenCalledWith(expect.objectContaining({
+    dispatch: expect.objectContaining({ field: 'driver_state', default: { template: '' } }),
+  }))
+})
+
+test('renders dispatch cases and default branch', () => {
+  const node: TreeNode = {
+    dispatch: {
+      field: 'driver_state',
+      cases: [['DC', { template: 'tell_me_more_dc' }]],
+      default: { template: 'waitlist' },
+    },
+  }
+  render(<TreeNodeEditor node={node} onChange={() => {}} templates={TEMPLATES} />)
+  expect(screen.getByRole('combobox', { name: /dispatch field/i })).toHaveValue('driver_state')
+  expect(screen.getByRole('textbox', { name: /case value/i })).toHaveValue('DC')
+  expect(screen.getByDisplayValue('tell_me_more_dc')).toBeInTheDocument()
+  expect(screen.getByDisplayValue('waitlist')).toBeInTheDocument()
+})
+
+test('adding a second case before naming the first keeps both', async () => {
+  const node: TreeNode = {
+    dispatch: { field: 'driver_state', cases: [['', { template: '' }]], default: { template: '' } },
+  }
+  const onChange = vi.fn()
+  render(<TreeNodeEditor node={node} onChange={onChange} templates={TEMPLATES} />)
+  await userEvent.click(screen.getByRole('button', { name: /add case/i }))
+  expect(onChange).toHaveBeenCalledWith({
+    dispatch: {
+      field: 'driver_state',
+      cases: [['', { template: '' }], ['', { template: '' }]],
+      default: { template: '' },
+    },
+  })
+})
+
+test('dispatch cases round-trip between the saved mapping and editor pairs', () => {
+  const saved = {
+    dispatch: {
+      field: 'driver_state',
+      cases: { DC: { template: 'tell_me_more_dc' }, MD: { template: 'waitlist' } },
+      default: { template: 'far' },
+    },
+  }
+  const editable = toEditableTree(saved)
+  expect(editable).toEqual({
+    dispatch: {
+      field: 'driver_state',
+      cases: [['DC', { template: 'tell_me_more_dc' }], ['MD', { template: 'waitlist' }]],
+      default: { template: 'far' },
+    },
+  })
+  expect(toSavedTree(editable)).toEqual(saved)
+})
+
+test('saving rejects empty or duplicate dispatch case values', () => {
+  const withCases = (cases: [string, TreeNode][]): TreeNode => ({
+    dispatch: { field: 'driver_state', cases, default: { template: '' } },
+  })
+  expect(() => toSavedTree(withCases([['', { template: 'close' }]]))).toThrow(/no value/)
+  expect(() =>
+    toSavedTree(withCases([['DC', { template: 'close' }], ['dc', { template: 'far' }]]))
+  ).toThrow(/more than one "dc"/)
+  // The YAML preview is lenient, so an unfinished case does not break it.
+  expect(toSavedTree(withCases([['', { template: '' }]]), false)).toEqual({
+    dispatch: { field: 'driver_state', cases: { '': { template: '' } }, default: { template: '' } },
+  })
+})
+
+test('adding a range threshold appends a branch', async () => {
+  const node: TreeNode = {
+    range: {
+      field: 'distance_miles',
+      thresholds: [5],
+      branches: [{ template: 'close' }, { template: 'far' }],
+    },
+  }
+  const onChange = vi.fn()
+  render(<TreeNodeEditor node={node} onChange={onChange} templates={TEMPLATES} />)
+  expect(screen.getByRole('spinbutton', { name: /threshold/i })).toHaveValue(5)
+  await userEvent.click(screen.getByRole('button', { name: /add threshold/i }))
+  expect(onChange).toHaveBeenCalledWith({
+    range: {
+      field: 'distance_miles',
+      thresholds: [5, 6],
+      branches: [{ template: 'close' }, { template: 'far' }, { template: '' }],
+    },
+  })
+})
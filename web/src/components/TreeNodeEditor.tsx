@@ -8,19 +8,115 @@ export type ConditionNode = {
   then: TreeNode
   else: TreeNode
 }
-export type TreeNode = LeafNode | ConditionNode
+/**
+ * Hash lookup on a field's value (case-insensitive), with a default branch.
+ * While editing, cases are ordered [value, node] pairs, so a blank or repeated
+ * value is not collapsed; toSavedTree turns them into the saved mapping.
+ */
+export type DispatchNode = {
+  dispatch: { field: string; cases: [string, TreeNode][]; default: TreeNode }
+}
+/** branches[i] is taken when the value is <= thresholds[i]; the last branch is above them all. */
+export type RangeNode = {
+  range: { field: string; thresholds: number[]; branches: TreeNode[] }
+}
+export type TreeNode = LeafNode | ConditionNode | DispatchNode | RangeNode
 
 export function isLeaf(node: TreeNode | null | undefined): node is LeafNode {
   if (!node || typeof node !== 'object') return true
   return 'template' in node
 }
 
+export function isDispatch(node: TreeNode): node is DispatchNode {
+  return 'dispatch' in node
+}
+
+export function isRange(node: TreeNode): node is RangeNode {
+  return 'range' in node
+}
+
+/** A tree as loaded (YAML or API) → editor form: dispatch cases become ordered pairs. */
+export function toEditableTree(raw: unknown): TreeNode {
+  if (!raw || typeof raw !== 'object') return raw as TreeNode
+  const node = raw as Record<string, unknown>
+  if ('dispatch' in node) {
+    const spec = (node.dispatch ?? {}) as Record<string, unknown>
+    const cases = Array.isArray(spec.cases)
+      ? (spec.cases as [string, unknown][])
+      : Object.entries((spec.cases ?? {}) as Record<string, unknown>)
+    return {
+      dispatch: {
+        field: String(spec.field ?? ''),
+        cases: cases.map(([key, sub]): [string, TreeNode] => [String(key), toEditableTree(sub)]),
+        default: toEditableTree(spec.default ?? { template: '' }),
+      },
+    }
+  }
+  if ('range' in node) {
+    const spec = node.range as RangeNode['range']
+    return { range: { ...spec, branches: (spec.branches ?? []).map(toEditableTree) } }
+  }
+  if ('condition' in node) {
+    return {
+      ...(node as ConditionNode),
+      then: toEditableTree(node.then),
+      else: toEditableTree(node.else),
+    }
+  }
+  return node as TreeNode
+}
+
+/**
+ * Editor form → the tree the API stores. With strict (on save), a dispatch
+ * case with an empty value or a value repeated (case-insensitively) throws
+ * instead of silently dropping a case.
+ */
+export function toSavedTree(node: TreeNode, strict = true): Record<string, unknown> {
+  if (isLeaf(node)) return node
+  if (isDispatch(node)) {
+    const { field, cases, default: otherwise } = node.dispatch
+    const saved: Record<string, unknown> = {}
+    const seen = new Set<string>()
+    for (const [key, sub] of cases) {
+      if (strict && !key.trim()) {
+        throw new Error(`Dispatch on ${field} has a case with no value`)
+      }
+      if (strict && seen.has(key.toLowerCase())) {
+        throw new Error(`Dispatch on ${field} has more than one "${key}" case`)
+      }
+      seen.add(key.toLowerCase())
+      saved[key] = toSavedTree(sub, strict)
+    }
+    return { dispatch: { field, cases: saved, default: toSavedTree(otherwise, strict) } }
+  }
+  if (isRange(node)) {
+    const { range } = node
+    return { range: { ...range, branches: range.branches.map((b) => toSavedTree(b, strict)) } }
+  }
+  return { ...node, then: toSavedTree(node.then, strict), else: toSavedTree(node.else, strict) }
+}
+
 const BLANK_CONDITION: ConditionNode = {
   condition: { field: 'distance_miles', op: 'lte', value: '' },
   then: { template: '' },
   else: { template: '' },
 }
 
+const BLANK_DISPATCH: DispatchNode = {
+  dispatch: { field: 'driver_state', cases: [['', { template: '' }]], default: { template: '' } },
+}
+
+const BLANK_RANGE: RangeNode = {
+  range: {
+    field: 'distance_miles',
+    thresholds: [5],
+    branches: [{ template: '' }, { template: '' }],
+  },
+}
+
+const SELECT_CLASS = `text-sm border border-gray-300 rounded px-2 py-1
+                     focus:outline-none focus:ring-1 focus:ring-blue-500`
+
 interface Props {
   node: TreeNode
   onChange: (node: TreeNode) => void
@@ -55,6 +151,173 @@ export default function TreeNodeEditor({ node, onChange, templates, depth = 0 }:
         >
           + condition
         </button>
+        <button
+          aria-label="Convert to dispatch"
+          onClick={() => onChange(structuredClone(BLANK_DISPATCH))}
+          className="text-xs text-blue-600 hover:underline"
+        >
+          + dispatch
+        </button>
+        <button
+          aria-label="Convert to range"
+          onClick={() => onChange(structuredClone(BLANK_RANGE))}
+          className="text-xs text-blue-600 hover:underline"
+        >
+          + range
+        </button>
+      </div>
+    )
+  }
+
+  const child = (n: TreeNode, update: (n: TreeNode) => void) => (
+    <TreeNodeEditor node={n} onChange={update} templates={templates} depth={depth + 1} />
+  )
+  const removeButton = (label: string) => (
+    <button
+      aria-label={label}
+      onClick={() => onChange({ template: '' })}
+      className="text-xs text-red-500 hover:underline"
+    >
+      × remove
+    </button>
+  )
+
+  if (isDispatch(node)) {
+    const { dispatch } = node
+    const entries = dispatch.cases
+    const update = (patch: Partial<DispatchNode['dispatch']>) =>
+      onChange({ dispatch: { ...dispatch, ...patch } })
+    const setCases = (next: [string, TreeNode][]) => update({ cases: next })
+
+    return (
+      <div className="space-y-2">
+        <div className="flex flex-wrap items-center gap-2">
+          <span className="text-xs font-semibold text-gray-500 uppercase tracking-wide">match</span>
+          <select
+            aria-label="Dispatch field"
+            value={dispatch.field}
+            onChange={(e) => update({ field: e.target.value })}
+            className={SELECT_CLASS}
+          >
+            {FIELDS.map((f) => <option key={f} value={f}>{f}</option>)}
+          </select>
+          <button
+            aria-label="Add case"
+            onClick={() => setCases([...entries, ['', { template: '' }]])}
+            className="text-xs text-blue-600 hover:underline"
+          >
+            + case
+          </button>
+          {removeButton('Remove dispatch')}
+        </div>
+        <div className="pl-6 border-l-2 border-gray-100 space-y-3">
+          {entries.map(([key, sub], i) => (
+            <div key={i}>
+              <div className="flex items-center gap-2">
+                <input
+                  aria-label="Case value"
+                  type="text"
+                  value={key}
+                  onChange={(e) =>
+                    setCases(entries.map(([k, n], j) => (j === i ? [e.target.value, n] : [k, n])))
+                  }
+                  className={`${SELECT_CLASS} w-32`}
+                  placeholder="value"
+                />
+                <button
+                  aria-label="Remove case"
+                  onClick={() => setCases(entries.filter((_, j) => j !== i))}
+                  className="text-xs text-red-500 hover:underline"
+                >
+                  ×
+                </button>
+              </div>
+              <div className="mt-1">
+                {child(sub, (n) =>
+                  setCases(entries.map(([k, old], j) => (j === i ? [k, n] : [k, old]))))}
+              </div>
+            </div>
+          ))}
+          <div>
+            <span className="text-xs font-semibold text-red-500 uppercase tracking-wide">default</span>
+            <div className="mt-1">
+              {child(dispatch.default ?? { template: '' }, (n) => update({ default: n }))}
+            </div>
+          </div>
+        </div>
+      </div>
+    )
+  }
+
+  if (isRange(node)) {
+    const { range } = node
+    const update = (patch: Partial<RangeNode['range']>) => onChange({ range: { ...range, ...patch } })
+    const last = range.thresholds[range.thresholds.length - 1] ?? 0
+
+    return (
+      <div className="space-y-2">
+        <div className="flex flex-wrap items-center gap-2">
+          <span className="text-xs font-semibold text-gray-500 uppercase tracking-wide">range</span>
+          <select
+            aria-label="Range field"
+            value={range.field}
+            onChange={(e) => update({ field: e.target.value })}
+            className={SELECT_CLASS}
+          >
+            {FIELDS.map((f) => <option key={f} value={f}>{f}</option>)}
+          </select>
+          <button
+            aria-label="Add threshold"
+            onClick={() => update({
+              thresholds: [...range.thresholds, last + 1],
+              branches: [...range.branches, { template: '' }],
+            })}
+            className="text-xs text-blue-600 hover:underline"
+          >
+            + threshold
+          </button>
+          {removeButton('Remove range')}
+        </div>
+        <div className="pl-6 border-l-2 border-gray-100 space-y-3">
+          {range.branches.map((sub, i) => (
+            <div key={i}>
+              <div className="flex items-center gap-2">
+                {i < range.thresholds.length ? (
+                  <>
+                    <span className="text-xs font-semibold text-green-600">≤</span>
+                    <input
+                      aria-label="Threshold"
+                      type="number"
+                      value={range.thresholds[i]}
+                      onChange={(e) => update({
+                        thresholds: range.thresholds.map((t, j) => (j === i ? Number(e.target.value) : t)),
+                      })}
+                      className={`${SELECT_CLASS} w-24`}
+                    />
+                    {range.thresholds.length > 1 && (
+                      <button
+                        aria-label="Remove threshold"
+                        onClick={() => update({
+                          thresholds: range.thresholds.filter((_, j) => j !== i),
+                          branches: range.branches.filter((_, j) => j !== i),
+                        })}
+                        className="text-xs text-red-500 hover:underline"
+                      >
+                        ×
+                      </button>
+                    )}
+                  </>
+                ) : (
+                  <span className="text-xs font-semibold text-red-500">&gt; {last}</span>
+                )}
+              </div>
+              <div className="mt-1">
+                {child(sub, (n) =>
+                  update({ branches: range.branches.map((old, j) => (j === i ? n : old)) }))}
+              </div>
+            </div>
+          ))}
+        </div>
       </div>
     )
   }
@@ -117,6 +117,26 @@ test('shows visual tree when getDecisionTree returns a tree', async () => {
   expect(screen.getByDisplayValue('general_car_info')).toBeInTheDocument()
 })
 
+test('saving a dispatch with a duplicate case shows an error instead of saving', async () => {
+  const { getDecisionTree, updateDecisionTree } = await import('../api/client')
+  vi.mocked(updateDecisionTree).mockClear()
+  vi.mocked(getDecisionTree).mockResolvedValueOnce({
+    dispatch: {
+      field: 'driver_state',
+      cases: { DC: { template: 'general_car_info' }, MD: { template: 'waitlist' } },
+      default: { template: 'waitlist' },
+    },
+  })
+  render(<Config />)
+  const [, second] = await screen.findAllByRole('textbox', { name: /case value/i })
+  await userEvent.clear(second)
+  await userEvent.type(second, 'DC')
+  expect(screen.getAllByRole('textbox', { name: /case value/i })).toHaveLength(2)
+  await userEvent.click(screen.getByRole('button', { name: /save decision tree/i }))
+  expect(await screen.findByText(/more than one "DC" case/)).toBeInTheDocument()
+  expect(updateDecisionTree).not.toHaveBeenCalled()
+})
+
 test('shows Add root node button when no tree saved', async () => {
   render(<Config />)
   await screen.findByRole('button', { name: 'general_car_info' })
@@ -14,7 +14,7 @@ import {
   previewTemplateHtml,
 } from '../api/client'
 import type { Template, DecisionTreeTestResult } from '../api/client'
-import TreeNodeEditor from '../components/TreeNodeEditor'
+import TreeNodeEditor, { toEditableTree, toSavedTree } from '../components/TreeNodeEditor'
 import type { TreeNode } from '../components/TreeNodeEditor'
 
 export default function Config() {
@@ -62,7 +62,7 @@ export default function Config() {
       .then(([tmpls, rawTree, cfg]) => {
         setTemplates(tmpls as Template[])
         if (rawTree && typeof rawTree === 'object') {
-          setTree(rawTree as TreeNode)
+          setTree(toEditableTree(rawTree))
           setTreeYaml(yaml.dump(rawTree))
         }
         setConfigData(cfg.data ?? {})
@@ -84,7 +84,7 @@ export default function Config() {
 
   function handleTreeChange(newTree: TreeNode) {
     setTree(newTree)
-    setTreeYaml(yaml.dump(newTree))
+    setTreeYaml(yaml.dump(toSavedTree(newTree, false)))
     setYamlError(null)
     setTreeSaved(false)
   }
@@ -95,7 +95,7 @@ export default function Config() {
     try {
       const parsed = yaml.load(newYaml)
       if (parsed && typeof parsed === 'object') {
-        setTree(parsed as TreeNode)
+        setTree(toEditableTree(parsed))
         setYamlError(null)
       }
     } catch (err) {
@@ -166,10 +166,17 @@ export default function Config() {
 
   async function handleSaveTree() {
     if (!tree) return
+    let saved: Record<string, unknown>
+    try {
+      saved = toSavedTree(tree)
+    } catch (err) {
+      setTreeError(err instanceof Error ? err.message : String(err))
+      return
+    }
     setTreeSaving(true)
     setTreeError(null)
     try {
-      await updateDecisionTree(tree as Record<string, unknown>)
+      await updateDecisionTree(saved)
       setTreeSaved(true)
     } catch (err) {
       setTreeError(String(err))
@@ -134,6 +134,31 @@ else:
     template: general_waitlist`}</Block>
       </Section>
 
+      <Section title="Dispatch and range nodes">
+        <p className="text-sm text-gray-700 leading-relaxed">
+          A <Code>dispatch</Code> node replaces a long chain of <Code>eq</Code> checks on one field:
+          it jumps straight to the case matching the value (case-insensitive), or to
+          {' '}<Code>default</Code>. A <Code>range</Code> node splits a number at sorted thresholds:
+          each branch covers values up to and including its threshold, and the last branch covers
+          everything above. Both cost one step however many states, cities or thresholds they list.
+        </p>
+        <Block>{`dispatch:
+  field: charger_state
+  cases:
+    DC:
+      template: tell_me_more_dc
+    NY:
+      range:
+        field: distance_miles
+        thresholds: [0.5, 5]
+        branches:
+          - template: general_car_info       # <= 0.5
+          - template: tell_me_more_brooklyn  # <= 5
+          - template: waitlist               # > 5
+  default:
+    template: waitlist`}</Block>
+      </Section>
+
       <Section title="Visual editor tips">
         <ul className="text-sm text-gray-700 space-y-2 list-disc list-inside">
           <li>Use <strong>+ condition</strong> on any branch to nest another check inside it.</li>
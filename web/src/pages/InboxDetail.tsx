@@ -18,6 +18,23 @@ export function InboxDetail({ id, onAction, onDelete }: Props) {
   const [editAddress, setEditAddress] = useState('')
   const [fixing, setFixing] = useState(false)
 
+  // Sends are queued for the job workers: refresh until this one is sent or failed.
+  const outboundStatus = detail?.outbound_emails[0]?.status
+  const inFlight = outboundStatus === 'queued' || outboundStatus === 'sending'
+  useEffect(() => {
+    if (!inFlight) return
+    const timer = setTimeout(() => {
+      getContact(id)
+        .then((fresh) => {
+          setDetail(fresh)
+          const status = fresh.outbound_emails[0]?.status
+          if (status !== 'queued' && status !== 'sending') onAction()
+        })
+        .catch(() => {})
+    }, 2000)
+    return () => clearTimeout(timer)
+  }, [id, inFlight, detail, onAction])
+
   useEffect(() => {
     setLoading(true)
     setDetail(null)
@@ -159,6 +176,8 @@ export function InboxDetail({ id, onAction, onDelete }: Props) {
                   ? 'bg-green-100 text-green-700'
                   : outbound.status === 'pending'
                   ? 'bg-yellow-100 text-yellow-700'
+                  : outbound.status === 'queued' || outbound.status === 'sending'
+                  ? 'bg-blue-100 text-blue-700'
                   : outbound.status === 'skipped'
                   ? 'bg-gray-100 text-gray-600'
                   : 'bg-red-100 text-red-700'